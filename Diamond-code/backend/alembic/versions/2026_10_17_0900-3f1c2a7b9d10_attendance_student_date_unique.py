@@ -0,0 +1,40 @@
+"""attendance student/date unique constraint
+
+Revision ID: 3f1c2a7b9d10
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7b9d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep one record per student per day before adding the constraint: the
+    # approved one if any, else one submitted for approval, else the newest
+    op.execute(
+        "DELETE FROM attendance WHERE id IN ("
+        "SELECT id FROM ("
+        "SELECT id, ROW_NUMBER() OVER ("
+        "PARTITION BY student_id, date ORDER BY "
+        "CASE WHEN admin_approved THEN 0 ELSE 1 END, "
+        "CASE WHEN submitted_for_approval THEN 0 ELSE 1 END, "
+        "id DESC"
+        ") AS position FROM attendance"
+        ") AS ranked WHERE position > 1)"
+    )
+    with op.batch_alter_table("attendance") as batch_op:
+        batch_op.create_unique_constraint("uq_attendance_student_date", ["student_id", "date"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("attendance") as batch_op:
+        batch_op.drop_constraint("uq_attendance_student_date", type_="unique")
@@ -0,0 +1,52 @@
+"""notification outbox
+
+Revision ID: 8a4e6b2c1f37
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-17 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e6b2c1f37'
+down_revision: Union[str, None] = '3f1c2a7b9d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("batch_id", sa.String(length=36), nullable=False),
+        sa.Column("channel", sa.Enum("PUSH", "WHATSAPP", name="notificationchannel"), nullable=False),
+        sa.Column("attendance_id", sa.Integer(), sa.ForeignKey("attendance.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "PROCESSING", "SENT", "FAILED", "SKIPPED", name="notificationjobstatus"),
+            nullable=False
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="5"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(timezone=True)),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("result", sa.String(length=100)),
+        sa.Column("sent_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_notification_outbox_id", "notification_outbox", ["id"])
+    op.create_index("ix_notification_outbox_batch_id", "notification_outbox", ["batch_id"])
+    op.create_index("ix_notification_outbox_status_next_attempt", "notification_outbox", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("notification_outbox")
+    sa.Enum(name="notificationjobstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="notificationchannel").drop(op.get_bind(), checkfirst=True)
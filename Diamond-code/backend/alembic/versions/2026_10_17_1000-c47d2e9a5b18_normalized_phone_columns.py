@@ -0,0 +1,64 @@
+"""normalized phone columns
+
+Adds indexed E.164 copies of the phone columns used for login and parent
+lookups, and backfills them from the existing data.
+
+Revision ID: c47d2e9a5b18
+Revises: 8a4e6b2c1f37
+Create Date: 2026-10-17 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.phone import normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d2e9a5b18'
+down_revision: Union[str, None] = '8a4e6b2c1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# (table, normalized column, source columns in order of preference)
+PHONE_COLUMNS = [
+    ("students", "parent_phone_normalized", ["parent_phone"]),
+    ("parents", "phone_normalized", ["phone_number"]),
+    ("teachers", "phone_normalized", ["phone", "phone_number"]),
+]
+
+
+def _backfill(table_name: str, target: str, sources: list) -> None:
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column("id"), sa.column(target), *[sa.column(name) for name in sources])
+
+    rows = bind.execute(sa.select(table.c.id, *[table.c[name] for name in sources])).fetchall()
+    updates = []
+    for row in rows:
+        raw = next((value for value in row[1:] if value), None)
+        normalized = normalize_phone(raw)
+        if normalized:
+            updates.append({"row_id": row[0], "normalized": normalized})
+
+    statement = table.update().where(table.c.id == sa.bindparam("row_id")).values({target: sa.bindparam("normalized")})
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        bind.execute(statement, updates[start:start + BACKFILL_BATCH_SIZE])
+
+
+def upgrade() -> None:
+    for table_name, target, sources in PHONE_COLUMNS:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.add_column(sa.Column(target, sa.String(length=16), nullable=True))
+            batch_op.create_index(f"ix_{table_name}_{target}", [target])
+        _backfill(table_name, target, sources)
+
+
+def downgrade() -> None:
+    for table_name, target, _ in reversed(PHONE_COLUMNS):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_index(f"ix_{table_name}_{target}")
+            batch_op.drop_column(target)
@@ -0,0 +1,59 @@
+"""attendance daily rollup
+
+Revision ID: 5e9b3d71a2c4
+Revises: c47d2e9a5b18
+Create Date: 2026-10-17 10:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9b3d71a2c4'
+down_revision: Union[str, None] = 'c47d2e9a5b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Reuse the enum type created for attendance.status
+    status_type = postgresql.ENUM("PRESENT", "ABSENT", "LATE", "LEAVE", name="attendancestatus", create_type=False)
+
+    op.create_table(
+        "attendance_daily_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("class_name", sa.String(length=20), nullable=False, server_default=""),
+        sa.Column("status", status_type, nullable=False),
+        sa.Column("admin_approved", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("record_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("whatsapp_sent_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("date", "class_name", "status", "admin_approved", name="uq_attendance_rollup_cell"),
+    )
+    op.create_index("ix_attendance_daily_rollup_id", "attendance_daily_rollup", ["id"])
+
+    # Backfill from existing attendance in one INSERT ... SELECT
+    op.execute(
+        """
+        INSERT INTO attendance_daily_rollup (date, class_name, status, admin_approved, record_count, whatsapp_sent_count)
+        SELECT a.date,
+               COALESCE(s.class_name, ''),
+               a.status,
+               COALESCE(a.admin_approved, false),
+               COUNT(a.id),
+               SUM(CASE WHEN a.whatsapp_sent THEN 1 ELSE 0 END)
+        FROM attendance a
+        JOIN students s ON s.id = a.student_id
+        GROUP BY a.date, COALESCE(s.class_name, ''), a.status, COALESCE(a.admin_approved, false)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attendance_daily_rollup_id", table_name="attendance_daily_rollup")
+    op.drop_table("attendance_daily_rollup")
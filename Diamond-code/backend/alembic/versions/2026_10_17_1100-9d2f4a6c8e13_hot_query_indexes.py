@@ -0,0 +1,43 @@
+"""hot query indexes
+
+Composite indexes for the attendance approval, inbox, activity feed, class
+roster and OTP lookups. attendance(student_id, date) is already covered by
+uq_attendance_student_date. On PostgreSQL the indexes are built
+CONCURRENTLY so writes are not blocked while they build.
+
+Revision ID: 9d2f4a6c8e13
+Revises: 5e9b3d71a2c4
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f4a6c8e13'
+down_revision: Union[str, None] = '5e9b3d71a2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_attendance_date_approval", "attendance", ["date", "admin_approved", "submitted_for_approval"]),
+    ("ix_communications_recipient_inbox", "communications", ["recipient_type", "recipient_id", "message_type", "is_read"]),
+    ("ix_activity_logs_action_created", "activity_logs", ["action_type", "created_at"]),
+    ("ix_students_class_active", "students", ["class_name", "is_active"]),
+    ("ix_otps_phone_expires", "otps", ["phone_number", "expires_at"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
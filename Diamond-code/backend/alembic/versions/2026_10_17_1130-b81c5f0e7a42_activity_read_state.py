@@ -0,0 +1,88 @@
+"""activity read state
+
+Replaces the activity_logs.viewed_by_user_ids JSON array with a per-user
+high-water mark (activity_read_marks) plus individual views above it
+(activity_views), and moves the existing JSON data into activity_views.
+
+Revision ID: b81c5f0e7a42
+Revises: 9d2f4a6c8e13
+Create Date: 2026-10-17 11:30:00
+
+"""
+import json
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81c5f0e7a42'
+down_revision: Union[str, None] = '9d2f4a6c8e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+activity_logs = sa.table("activity_logs", sa.column("id"), sa.column("viewed_by_user_ids"))
+activity_views = sa.table("activity_views", sa.column("user_id"), sa.column("activity_id"), sa.column("viewed_at"))
+users = sa.table("users", sa.column("id"))
+
+
+def upgrade() -> None:
+    op.create_table(
+        'activity_read_marks',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('last_viewed_activity_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_table(
+        'activity_views',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('activity_id', sa.Integer(), sa.ForeignKey('activity_logs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('viewed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('user_id', 'activity_id', name='pk_activity_views'),
+    )
+
+    bind = op.get_bind()
+    user_ids = {row[0] for row in bind.execute(sa.select(users.c.id))}
+    now = datetime.utcnow()
+    views = []
+    for activity_id, viewed_by in bind.execute(sa.select(activity_logs.c.id, activity_logs.c.viewed_by_user_ids)):
+        try:
+            viewers = set(json.loads(viewed_by or '[]'))
+        except (TypeError, ValueError):
+            continue
+        views.extend(
+            {"user_id": user_id, "activity_id": activity_id, "viewed_at": now}
+            for user_id in viewers if user_id in user_ids
+        )
+    for start in range(0, len(views), BACKFILL_BATCH_SIZE):
+        bind.execute(activity_views.insert(), views[start:start + BACKFILL_BATCH_SIZE])
+
+    with op.batch_alter_table('activity_logs') as batch_op:
+        batch_op.drop_column('viewed_by_user_ids')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('activity_logs') as batch_op:
+        batch_op.add_column(sa.Column('viewed_by_user_ids', sa.Text(), nullable=False, server_default='[]'))
+
+    # High-water marks cannot be expanded back exactly; only individual views are restored
+    bind = op.get_bind()
+    viewers = {}
+    for user_id, activity_id in bind.execute(sa.select(activity_views.c.user_id, activity_views.c.activity_id)):
+        viewers.setdefault(activity_id, []).append(user_id)
+    updates = [
+        {"row_id": activity_id, "viewed": json.dumps(sorted(user_ids))}
+        for activity_id, user_ids in viewers.items()
+    ]
+    statement = activity_logs.update().where(activity_logs.c.id == sa.bindparam("row_id")).values(
+        viewed_by_user_ids=sa.bindparam("viewed")
+    )
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        bind.execute(statement, updates[start:start + BACKFILL_BATCH_SIZE])
+
+    op.drop_table('activity_views')
+    op.drop_table('activity_read_marks')
@@ -0,0 +1,58 @@
+"""id counters
+
+Counter table behind UniqueIdGenerator, seeded with the highest number
+already issued in each Diamond-XXX-NNN series.
+
+Revision ID: e6a3c9d4f215
+Revises: b81c5f0e7a42
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a3c9d4f215'
+down_revision: Union[str, None] = 'b81c5f0e7a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Counter name -> (ID prefix, table holding the issued IDs)
+ID_SERIES = {
+    "student": ("Diamond-STU", "students"),
+    "teacher": ("Diamond-TCH", "teachers"),
+    "admin": ("Diamond-ADM", "users"),
+    "parent": ("Diamond-PAR", "users"),
+}
+
+
+def _highest_issued(bind, prefix: str, table_name: str) -> int:
+    table = sa.table(table_name, sa.column("unique_id"))
+    highest = 0
+    for (unique_id,) in bind.execute(sa.select(table.c.unique_id).where(table.c.unique_id.like(f"{prefix}-%"))):
+        suffix = unique_id.rsplit('-', 1)[-1]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def upgrade() -> None:
+    counters = op.create_table(
+        'id_counters',
+        sa.Column('name', sa.String(length=20), primary_key=True),
+        sa.Column('last_value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    bind = op.get_bind()
+    op.bulk_insert(counters, [
+        {"name": name, "last_value": _highest_issued(bind, prefix, table_name)}
+        for name, (prefix, table_name) in ID_SERIES.items()
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('id_counters')
@@ -0,0 +1,59 @@
+"""import jobs
+
+Background roster import jobs with per-chunk progress.
+
+Revision ID: 4c7e1b9a3d56
+Revises: e6a3c9d4f215
+Create Date: 2026-10-17 12:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e1b9a3d56'
+down_revision: Union[str, None] = 'e6a3c9d4f215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("file_path", sa.String(length=500), nullable=False),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("QUEUED", "RUNNING", "COMPLETED", "FAILED", name="importjobstatus"),
+            nullable=False
+        ),
+        sa.Column("total_rows", sa.Integer()),
+        sa.Column("total_chunks", sa.Integer()),
+        sa.Column("chunks_committed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rows_processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("imported_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("imported", sa.JSON(), nullable=False),
+        sa.Column("errors", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(timezone=True)),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("started_at", sa.DateTime(timezone=True)),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_import_jobs_id", "import_jobs", ["id"])
+    op.create_index("ix_import_jobs_status_next_attempt", "import_jobs", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("import_jobs")
+    sa.Enum(name="importjobstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""import job sync mode
+
+mode=sync roster imports: the job's mode and the counts of the delta it applied.
+
+Revision ID: a92d5f3e6b81
+Revises: 4c7e1b9a3d56
+Create Date: 2026-10-17 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a92d5f3e6b81'
+down_revision: Union[str, None] = '4c7e1b9a3d56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.add_column(sa.Column("mode", sa.String(length=10), nullable=False, server_default="append"))
+        batch_op.add_column(sa.Column("sync_summary", sa.JSON()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.drop_column("sync_summary")
+        batch_op.drop_column("mode")
@@ -0,0 +1,78 @@
+"""message receipts
+
+In-app messages are delivered through message_receipts (one row per
+recipient with its read state), so a broadcast stores its subject and body
+once. Existing in-app messages get a receipt for their recipient. The
+inbox and unread count no longer read communications by recipient, so the
+ix_communications_recipient_inbox index from 9d2f4a6c8e13 is dropped.
+
+Revision ID: d5e8a1c7f940
+Revises: a92d5f3e6b81
+Create Date: 2026-10-17 13:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a1c7f940'
+down_revision: Union[str, None] = 'a92d5f3e6b81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+communications = sa.table(
+    "communications",
+    sa.column("id"), sa.column("recipient_type"), sa.column("recipient_id"),
+    sa.column("message_type"), sa.column("is_read"), sa.column("read_at")
+)
+message_receipts = sa.table(
+    "message_receipts",
+    sa.column("message_id"), sa.column("recipient_type"), sa.column("recipient_id"),
+    sa.column("is_read"), sa.column("read_at")
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'message_receipts',
+        sa.Column('message_id', sa.Integer(), sa.ForeignKey('communications.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('recipient_type', sa.String(length=20), nullable=False),
+        sa.Column('recipient_id', sa.Integer(), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('read_at', sa.DateTime(timezone=True)),
+        sa.PrimaryKeyConstraint('message_id', 'recipient_type', 'recipient_id', name='pk_message_receipts'),
+    )
+    op.create_index('ix_message_receipts_inbox', 'message_receipts', ['recipient_type', 'recipient_id', 'message_id'])
+    op.create_index('ix_message_receipts_unread', 'message_receipts', ['recipient_type', 'recipient_id', 'is_read'])
+
+    # One INSERT ... SELECT: every existing in-app message is a direct message to one recipient
+    op.execute(message_receipts.insert().from_select(
+        ["message_id", "recipient_type", "recipient_id", "is_read", "read_at"],
+        sa.select(
+            communications.c.id,
+            communications.c.recipient_type,
+            communications.c.recipient_id,
+            sa.func.coalesce(communications.c.is_read, sa.false()),
+            communications.c.read_at
+        ).where(
+            communications.c.message_type == "IN_APP",
+            communications.c.recipient_type.isnot(None),
+            communications.c.recipient_id.isnot(None)
+        )
+    ))
+
+    op.drop_index('ix_communications_recipient_inbox', table_name='communications', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_communications_recipient_inbox', 'communications',
+        ['recipient_type', 'recipient_id', 'message_type', 'is_read'], if_not_exists=True
+    )
+    # Broadcasts (recipient_id NULL) have no per-recipient copy to go back to and stop showing in inboxes
+    op.drop_index('ix_message_receipts_unread', table_name='message_receipts')
+    op.drop_index('ix_message_receipts_inbox', table_name='message_receipts')
+    op.drop_table('message_receipts')
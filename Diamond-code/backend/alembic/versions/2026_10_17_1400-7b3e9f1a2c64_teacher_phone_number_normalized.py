@@ -0,0 +1,53 @@
+"""teacher phone_number normalized
+
+teachers.phone_normalized holds only one of the two phone columns (phone,
+falling back to phone_number). Adds an indexed E.164 copy of phone_number
+so a teacher whose columns differ can still log in with either, and
+backfills it from the existing data.
+
+Revision ID: 7b3e9f1a2c64
+Revises: d5e8a1c7f940
+Create Date: 2026-10-17 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.phone import normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9f1a2c64'
+down_revision: Union[str, None] = 'd5e8a1c7f940'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('teachers') as batch_op:
+        batch_op.add_column(sa.Column('phone_number_normalized', sa.String(length=16), nullable=True))
+        batch_op.create_index('ix_teachers_phone_number_normalized', ['phone_number_normalized'])
+
+    bind = op.get_bind()
+    teachers = sa.table('teachers', sa.column('id'), sa.column('phone_number'), sa.column('phone_number_normalized'))
+    updates = []
+    for row in bind.execute(sa.select(teachers.c.id, teachers.c.phone_number)).fetchall():
+        normalized = normalize_phone(row.phone_number)
+        if normalized:
+            updates.append({"row_id": row.id, "normalized": normalized})
+
+    statement = teachers.update().where(teachers.c.id == sa.bindparam("row_id")).values(
+        phone_number_normalized=sa.bindparam("normalized")
+    )
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        bind.execute(statement, updates[start:start + BACKFILL_BATCH_SIZE])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('teachers') as batch_op:
+        batch_op.drop_index('ix_teachers_phone_number_normalized')
+        batch_op.drop_column('phone_number_normalized')
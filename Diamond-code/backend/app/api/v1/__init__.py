@@ -88,6 +88,13 @@ except ImportError as e:
     logger.error(f"❌ Failed to import messages router: {e}")
     messages_router = APIRouter()
 
+try:
+    from .exports import router as exports_router
+    logger.info("✅ Successfully imported exports router")
+except ImportError as e:
+    logger.error(f"❌ Failed to import exports router: {e}")
+    exports_router = APIRouter()
+
 api_router = APIRouter()
 
 # Include routers
@@ -102,4 +109,5 @@ api_router.include_router(communications_router, prefix="/communications", tags=
 api_router.include_router(notices_router, prefix="/notices", tags=["notices"])
 api_router.include_router(whatsapp_router, prefix="/whatsapp", tags=["whatsapp"])
 api_router.include_router(imports_router, prefix="/import", tags=["import"])
+api_router.include_router(exports_router, prefix="/export", tags=["export"])
 api_router.include_router(activities_router, prefix="/activities", tags=["activities"])
\ No newline at end of file
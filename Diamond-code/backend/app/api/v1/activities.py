@@ -36,6 +36,21 @@ async def get_recent_activities(
         )
 
 
+@router.get("/unread-count")
+async def get_unread_activity_count(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Count important activities the current user has not viewed (admin only)"""
+    try:
+        return {"count": ActivityService.get_unread_count(db, current_user.id)}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error counting unread activities: {str(e)}"
+        )
+
+
 @router.post("/mark-viewed")
 async def mark_activities_viewed(
     activity_ids: Optional[List[int]] = None,
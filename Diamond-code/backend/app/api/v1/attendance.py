@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, aliased
 from typing import List, Optional
 from datetime import date, datetime, timedelta
-from sqlalchemy import text
+from sqlalchemy import text, and_, or_
 from pydantic import BaseModel
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.dependencies import get_current_admin_user, get_current_teacher_user, get_current_mobile_user
 from app.models.attendance import Attendance, AttendanceStatus
 from app.models.student import Student
@@ -12,10 +14,21 @@ from app.models.user import User
 from app.models.teacher import Teacher
 from app.models.parent import Parent
 from app.services.activity_service import ActivityService
-from app.services.whatsapp_service import WhatsAppService
+from app.services.attendance_rollup import AttendanceRollupService
+from app.services.attendance_service import AttendanceMarkingService
+from app.services.notification_outbox import NotificationOutboxService
+from app.services.notification_worker import notification_worker
+from app.utils.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.utils.phone import normalize_phone
 
 router = APIRouter()
 
+# /history page size once a client pages (cursor or limit sent); rows are
+# fetched from the cursor in chunks of HISTORY_YIELD_PER
+HISTORY_DEFAULT_LIMIT = 1000
+HISTORY_MAX_LIMIT = 5000
+HISTORY_YIELD_PER = 500
+
 
 class ApproveAttendanceRequest(BaseModel):
     attendance_ids: List[int]
@@ -61,73 +74,49 @@ async def mark_attendance(
                     detail=f"Teacher record not found for user {current_user.email}"
                 )
 
-        created_records = []
-        skipped_records = []
-
+        # Validate and collect the batch (last entry wins if a student appears twice)
+        records = {}
         for record in student_records:
-            # Validate student record fields
             if 'student_id' not in record or 'status' not in record:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Each student record must have student_id and status"
                 )
+            records[int(record['student_id'])] = {
+                "status": AttendanceStatus(record['status']),
+                "remarks": record.get('remarks', '')
+            }
+
+        # Check all students exist with a single IN query
+        students = AttendanceMarkingService.get_students_by_id(db, list(records.keys()))
+        missing_ids = [student_id for student_id in records if student_id not in students]
+        if missing_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Student with ID {missing_ids[0]} not found"
+            )
 
-            # Check if student exists
-            student = db.query(Student).filter(Student.id == record['student_id']).first()
-            if not student:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Student with ID {record['student_id']} not found"
-                )
-
-            # Check if attendance already marked for this student on this date
-            existing_attendance = db.query(Attendance).filter(
-                Attendance.student_id == record['student_id'],
-                Attendance.date == attendance_date
-            ).first()
-
-            if existing_attendance:
-                # Check if already submitted for approval - skip this student instead of blocking
-                if existing_attendance.submitted_for_approval:
-                    skipped_records.append({
-                        "student_id": student.id,
-                        "student_name": student.full_name,
-                        "reason": "already_submitted"
-                    })
-                    continue  # Skip this student, continue with others
-
-                # Update existing record
-                existing_attendance.status = AttendanceStatus(record['status'])
-                existing_attendance.remarks = record.get('remarks', '')
-                existing_attendance.teacher_id = teacher.id
-                existing_attendance.is_draft = is_draft
-
-                # If submitting for approval, set the flags
-                if not is_draft:
-                    existing_attendance.submitted_for_approval = True
-                    existing_attendance.submitted_at = datetime.now()
-
-                db.commit()
-                db.refresh(existing_attendance)
-                created_records.append(existing_attendance)
-            else:
-                # Create new attendance record
-                new_attendance = Attendance(
-                    student_id=record['student_id'],
-                    date=attendance_date,
-                    status=AttendanceStatus(record['status']),
-                    remarks=record.get('remarks', ''),
-                    teacher_id=teacher.id,
-                    is_draft=is_draft,
-                    submitted_for_approval=not is_draft,  # If not draft, then submitted
-                    submitted_at=datetime.now() if not is_draft else None,
-                    admin_approved=False  # Requires admin approval
-                )
+        # Upsert the whole batch in one transaction; rows already submitted are skipped
+        written_ids = set(AttendanceMarkingService.upsert_batch(
+            db=db,
+            teacher_id=teacher.id,
+            attendance_date=attendance_date,
+            records=records,
+            is_draft=is_draft,
+            class_names={student_id: class_name for student_id, (_, class_name) in students.items()}
+        ))
+        db.commit()
 
-                db.add(new_attendance)
-                db.commit()
-                db.refresh(new_attendance)
-                created_records.append(new_attendance)
+        created_records = [student_id for student_id in records if student_id in written_ids]
+        skipped_records = [
+            {
+                "student_id": student_id,
+                "student_name": students[student_id][0],
+                "reason": "already_submitted"
+            }
+            for student_id in records
+            if student_id not in written_ids
+        ]
 
         # Log activity for submitted attendance (not drafts)
         if not is_draft:
@@ -166,6 +155,8 @@ async def mark_attendance(
             "status": "draft" if is_draft else "pending_admin_approval"
         }
 
+    except HTTPException:
+        raise
     except ValueError as e:
         print(f"ValueError in mark_attendance: {str(e)}")
         raise HTTPException(
@@ -223,7 +214,7 @@ async def approve_attendance(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Approve attendance records and send push notifications to parents"""
+    """Approve attendance records and queue push/WhatsApp notifications to parents"""
     try:
         attendance_ids = request.attendance_ids
         if not attendance_ids:
@@ -243,34 +234,36 @@ async def approve_attendance(
                 detail="No attendance records found with provided IDs"
             )
 
-        approved_count = 0
-        whatsapp_queue = []
+        to_approve = [record for record in attendance_records if not record.admin_approved]
+        students = {
+            student.id: student
+            for student in db.query(Student).filter(
+                Student.id.in_([record.student_id for record in to_approve])
+            ).all()
+        } if to_approve else {}
 
-        for record in attendance_records:
-            if record.admin_approved:
-                continue  # Skip already approved records
-
-            # Approve the record
+        approved_at = datetime.now()
+        for record in to_approve:
             record.admin_approved = True
-            record.approved_by_admin_id = current_user.id
-            record.approved_at = datetime.now()
-
-            # Get student details for WhatsApp notification
-            student = db.query(Student).filter(Student.id == record.student_id).first()
-            if student:
-                whatsapp_queue.append({
-                    "student_name": student.full_name,
-                    "student_unique_id": student.unique_id,
-                    "parent_phone": student.parent_phone,
-                    "parent_name": student.parent_name,
-                    "attendance_status": record.status.value,
-                    "date": record.date.strftime("%Y-%m-%d"),
-                    "remarks": record.remarks
-                })
-
-            approved_count += 1
+            record.approved_by = current_user.id
+            record.approved_at = approved_at
+        approved_count = len(to_approve)
+        AttendanceRollupService.record_approved(
+            db, to_approve,
+            class_names={student_id: student.class_name for student_id, student in students.items()}
+        )
+
+        # Notification jobs are committed together with the approval and delivered by the worker
+        batch_id = NotificationOutboxService.new_batch_id()
+        jobs_queued = NotificationOutboxService.enqueue_attendance_notifications(
+            db=db,
+            batch_id=batch_id,
+            records=to_approve,
+            students=students
+        )
 
         db.commit()
+        notification_worker.notify()
 
         # Log activity
         try:
@@ -284,137 +277,24 @@ async def approve_attendance(
                 entity_id=None,
                 metadata={
                     "approved_count": approved_count,
-                    "whatsapp_notifications": len(whatsapp_queue)
+                    "notification_batch_id": batch_id,
+                    "notifications_queued": jobs_queued
                 }
             )
         except Exception as e:
             print(f"Error logging activity: {str(e)}")
             # Don't fail approval if activity logging fails
 
-        # Send Push Notifications to Parents (FCM v1 API)
-        from app.services.fcm_push_notification_service import FCMPushNotificationService
-        from app.models.parent import Parent
-
-        notification_results = []
-        notifications_sent = 0
-
-        try:
-            for item in whatsapp_queue:
-                parent_phone = item.get("parent_phone")
-                if not parent_phone:
-                    continue
-
-                # Normalize phone number for comparison (handle +91 prefix variations)
-                phone_without_prefix = parent_phone.replace('+91', '') if parent_phone.startswith('+91') else parent_phone
-                phone_with_prefix = f"+91{phone_without_prefix}" if not parent_phone.startswith('+91') else parent_phone
-
-                # Get parent's FCM token from database
-                parent = db.query(Parent).filter(
-                    (Parent.phone_number == parent_phone) |
-                    (Parent.phone_number == phone_with_prefix) |
-                    (Parent.phone_number == phone_without_prefix)
-                ).first()
-
-                if parent and parent.push_token:
-                    # Send FCM push notification
-                    result = await FCMPushNotificationService.send_attendance_notification(
-                        fcm_token=parent.push_token,
-                        student_name=item["student_name"],
-                        status=item["attendance_status"],
-                        date=item["date"]
-                    )
-
-                    if result.get("status") == "success":
-                        notifications_sent += 1
-
-                    notification_results.append({
-                        "parent_phone": parent_phone,
-                        "student": item["student_name"],
-                        "result": result.get("status")
-                    })
-                else:
-                    print(f"⚠️ No push token for parent: {parent_phone}")
-                    notification_results.append({
-                        "parent_phone": parent_phone,
-                        "student": item["student_name"],
-                        "result": "no_push_token"
-                    })
-
-            print(f"✅ Sent {notifications_sent} push notifications out of {len(whatsapp_queue)} records")
-
-        except Exception as e:
-            print(f"❌ Error sending push notifications: {str(e)}")
-            # Don't fail the attendance approval if notifications fail
-
-        # Send WhatsApp Notifications to Parents
-        whatsapp_results = []
-        whatsapp_sent = 0
-        whatsapp_failed = 0
-
-        try:
-            whatsapp_service = WhatsAppService()
-            
-            for item in whatsapp_queue:
-                parent_phone = item.get("parent_phone")
-                if not parent_phone:
-                    continue
-                
-                # Get the student and attendance record for WhatsApp message
-                student = db.query(Student).filter(Student.unique_id == item["student_unique_id"]).first()
-                attendance_record = db.query(Attendance).filter(
-                    Attendance.student_id == student.id if student else 0,
-                    Attendance.date == datetime.strptime(item["date"], "%Y-%m-%d").date()
-                ).first()
-                
-                if student and attendance_record:
-                    try:
-                        result = await whatsapp_service.send_individual_attendance_message(
-                            attendance_record=attendance_record,
-                            student=student,
-                            db=db
-                        )
-                        
-                        if result:
-                            whatsapp_sent += 1
-                            whatsapp_results.append({
-                                "parent_phone": parent_phone,
-                                "student": item["student_name"],
-                                "result": "sent"
-                            })
-                        else:
-                            whatsapp_failed += 1
-                            whatsapp_results.append({
-                                "parent_phone": parent_phone,
-                                "student": item["student_name"],
-                                "result": "failed"
-                            })
-                    except Exception as e:
-                        print(f"❌ WhatsApp error for {item['student_name']}: {str(e)}")
-                        whatsapp_failed += 1
-                        whatsapp_results.append({
-                            "parent_phone": parent_phone,
-                            "student": item["student_name"],
-                            "result": f"error: {str(e)}"
-                        })
-
-            print(f"✅ Sent {whatsapp_sent} WhatsApp messages, {whatsapp_failed} failed")
-
-        except Exception as e:
-            print(f"❌ Error initializing WhatsApp service: {str(e)}")
-            # Don't fail the attendance approval if WhatsApp fails
-
         return {
             "message": f"Successfully approved {approved_count} attendance records",
             "approved_count": approved_count,
-            "push_notifications_sent": notifications_sent,
-            "push_notifications_total": len(whatsapp_queue),
-            "whatsapp_sent": whatsapp_sent,
-            "whatsapp_failed": whatsapp_failed,
-            "notification_results": notification_results[:5],  # Show first 5 for preview
-            "whatsapp_results": whatsapp_results[:5],  # Show first 5 for preview
-            "status": "approved_and_notifications_sent"
+            "notification_batch_id": batch_id,
+            "notifications_queued": jobs_queued,
+            "status": "approved_notifications_queued"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -422,6 +302,21 @@ async def approve_attendance(
             detail=f"Error approving attendance: {str(e)}"
         )
 
+@router.get("/notifications/{batch_id}")
+async def get_notification_batch_status(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Delivery status of the notifications queued by one approval (admin only, for polling)"""
+    result = NotificationOutboxService.get_batch_status(db, batch_id)
+    if result["total"] == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No notifications found for batch {batch_id}"
+        )
+    return result
+
 @router.get("/student/{student_id}")
 async def get_student_attendance(
     student_id: int,
@@ -521,30 +416,19 @@ async def get_attendance_summary(
     # Get total students
     total_students = db.query(Student).count()
 
-    # Get attendance records in date range
-    attendance_query = db.query(Attendance).filter(
-        Attendance.date >= start_date,
-        Attendance.date <= end_date
+    # One GROUP BY over the daily rollup instead of a count() per figure
+    summary = AttendanceRollupService.summarize(
+        AttendanceRollupService.aggregate(db, start_date=start_date, end_date=end_date)
     )
-
-    total_records = attendance_query.count()
-    approved_records = attendance_query.filter(Attendance.admin_approved == True).count()
-    pending_records = attendance_query.filter(Attendance.admin_approved == False).count()
-
-    # Get status breakdown
-    status_breakdown = {}
-    for status_str in ["present", "absent", "late", "leave"]:
-        try:
-            # Convert string to enum for PostgreSQL compatibility
-            status_enum = AttendanceStatus(status_str)
-            count = attendance_query.filter(
-                Attendance.status == status_enum,
-                Attendance.admin_approved == True
-            ).count()
-            status_breakdown[status_str] = count
-        except ValueError:
-            # If status string is not valid, skip it
-            status_breakdown[status_str] = 0
+    total_records = summary["total_records"]
+    approved_records = summary["approved_records"]
+    pending_records = summary["pending_approval"]
+
+    # Status breakdown of approved records
+    status_breakdown = {
+        status_str: summary["approved_status_counts"].get(status_str, 0)
+        for status_str in ["present", "absent", "late", "leave"]
+    }
 
     # Calculate working days (excluding weekends)
     working_days = 0
@@ -581,19 +465,46 @@ async def get_attendance_history(
     end_date: Optional[date] = None,
     class_name: Optional[str] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=HISTORY_MAX_LIMIT),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_mobile_user)
 ):
-    """Get attendance history with student details (teachers and parents)"""
+    """
+    Get attendance history with student details (teachers and parents)
+
+    Newest first. The body is the JSON list of records. Without cursor or
+    limit every matching record is returned; otherwise the body is one page
+    and, when there are more, the X-Next-Cursor header carries the cursor
+    for the next page.
+    """
     # Default to last 7 days if no dates provided
     if not start_date:
         start_date = date.today() - timedelta(days=7)
     if not end_date:
         end_date = date.today()
 
-    # Query attendance records with joins
-    query = db.query(Attendance).join(
+    # One joined query selecting only the columns in the response
+    approver = aliased(User)
+    query = db.query(
+        Attendance.id,
+        Attendance.date,
+        Attendance.status,
+        Attendance.remarks,
+        Attendance.admin_approved,
+        Student.id.label("student_id"),
+        Student.full_name.label("student_name"),
+        Student.unique_id.label("student_unique_id"),
+        Student.class_name,
+        Student.section,
+        Teacher.full_name.label("marked_by"),
+        approver.full_name.label("approved_by")
+    ).join(
         Student, Attendance.student_id == Student.id
+    ).outerjoin(
+        Teacher, Attendance.teacher_id == Teacher.id
+    ).outerjoin(
+        approver, Attendance.approved_by == approver.id
     ).filter(
         Attendance.date >= start_date,
         Attendance.date <= end_date
@@ -605,22 +516,10 @@ async def get_attendance_history(
 
     if isinstance(current_user, Parent):
         # Parents: Can ONLY see their own children
-        # Normalize phone number for comparison (handle +91 prefix variations)
-        parent_phone = current_user.phone_number
-        phone_without_prefix = parent_phone.replace('+91', '') if parent_phone.startswith('+91') else parent_phone
-        phone_with_prefix = f"+91{phone_without_prefix}" if not parent_phone.startswith('+91') else parent_phone
-
-        children = db.query(Student).filter(
-            (Student.parent_phone == parent_phone) |
-            (Student.parent_phone == phone_with_prefix) |
-            (Student.parent_phone == phone_without_prefix)
-        ).all()
-        if children:
-            student_ids = [child.id for child in children]
-            query = query.filter(Student.id.in_(student_ids))
-        else:
-            # No children found, return empty list
+        parent_phone = normalize_phone(current_user.phone_number)
+        if not parent_phone:
             return []
+        query = query.filter(Student.parent_phone_normalized == parent_phone)
 
     # Add optional filters
     if class_name:
@@ -634,31 +533,61 @@ async def get_attendance_history(
             # Invalid status value, skip filter
             pass
 
-    attendance_records = query.all()
+    # Keyset pagination on (date, id), newest first
+    if cursor:
+        try:
+            cursor_date, cursor_id = decode_cursor(cursor)
+            cursor_date = date.fromisoformat(cursor_date)
+            cursor_id = int(cursor_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(or_(
+            Attendance.date < cursor_date,
+            and_(Attendance.date == cursor_date, Attendance.id < cursor_id)
+        ))
+    query = query.order_by(Attendance.date.desc(), Attendance.id.desc())
+
+    headers = {}
+    if limit is None and cursor:
+        limit = HISTORY_DEFAULT_LIMIT
+    if limit is not None:
+        # Headers go out before the body, so find the page boundary first with a key-only probe
+        boundary = query.with_entities(Attendance.date, Attendance.id).offset(limit - 1).limit(2).all()
+        if len(boundary) == 2:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(boundary[0].date, boundary[0].id)
+        query = query.limit(limit)
+
+    return StreamingResponse(
+        _stream_history(query),
+        media_type="application/json",
+        headers=headers
+    )
 
-    result = []
-    for record in attendance_records:
-        # Get student and teacher info
-        student = db.query(Student).filter(Student.id == record.student_id).first()
-        teacher = db.query(Teacher).filter(Teacher.id == record.teacher_id).first()
-        admin = db.query(User).filter(User.id == record.approved_by).first() if record.approved_by else None
 
-        result.append({
-            "id": record.id,
-            "student_id": student.id if student else None,
-            "student_name": student.full_name if student else "Unknown",
-            "student_unique_id": student.unique_id if student else "N/A",
-            "class_name": student.class_name if student else "N/A",
-            "section": student.section if student else "",
-            "date": record.date.isoformat(),
-            "status": record.status.value if hasattr(record.status, 'value') else record.status,
-            "marked_by": teacher.full_name if teacher else "Unknown",
-            "approved_by": admin.full_name if (admin and record.admin_approved) else None,
-            "remarks": record.remarks or "",
-            "is_approved": record.admin_approved or False
-        })
-
-    return result
+def _stream_history(query):
+    """Serialize history rows one at a time; uses its own session since the request's is closed by then"""
+    stream_db = SessionLocal()
+    try:
+        yield "["
+        for index, row in enumerate(query.with_session(stream_db).yield_per(HISTORY_YIELD_PER)):
+            record = {
+                "id": row.id,
+                "student_id": row.student_id,
+                "student_name": row.student_name,
+                "student_unique_id": row.student_unique_id,
+                "class_name": row.class_name,
+                "section": row.section or "",
+                "date": row.date.isoformat(),
+                "status": row.status.value if hasattr(row.status, 'value') else row.status,
+                "marked_by": row.marked_by or "Unknown",
+                "approved_by": row.approved_by if row.admin_approved else None,
+                "remarks": row.remarks or "",
+                "is_approved": row.admin_approved or False
+            }
+            yield ("," if index else "") + json.dumps(record)
+        yield "]"
+    finally:
+        stream_db.close()
 
 @router.delete("/clear-all")
 async def clear_all_attendance(
@@ -668,5 +597,6 @@ async def clear_all_attendance(
     """Clear all attendance data (admin only) - USE WITH CAUTION"""
     count = db.query(Attendance).count()
     db.query(Attendance).delete()
+    AttendanceRollupService.clear(db)
     db.commit()
     return {"message": f"Cleared all {count} attendance records from database", "deleted_count": count}
\ No newline at end of file
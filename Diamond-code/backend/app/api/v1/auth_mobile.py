@@ -13,6 +13,7 @@ from app.models.teacher import Teacher
 from app.models.student import Student
 from app.schemas.parent import SendOTPRequest, VerifyOTPRequest
 from app.services.otp_service import OTPService
+from app.utils.phone import normalize_phone
 
 router = APIRouter()
 
@@ -28,28 +29,19 @@ async def send_otp_mobile(
     """
     try:
         phone = request.phone_number
-        # Normalize phone number - remove +91 for comparison
-        phone_without_prefix = phone.replace('+91', '') if phone.startswith('+91') else phone
-        phone_with_prefix = f"+91{phone_without_prefix}" if not phone.startswith('+91') else phone
+        # Canonical E.164 form, matched against the indexed *_normalized columns
+        phone_normalized = normalize_phone(phone)
 
         user_type = None
 
-        # Check if teacher (check both phone and phone_number for compatibility)
-        teacher = db.query(Teacher).filter(
-            (Teacher.phone == phone) | (Teacher.phone_number == phone) |
-            (Teacher.phone == phone_with_prefix) | (Teacher.phone_number == phone_with_prefix) |
-            (Teacher.phone == phone_without_prefix) | (Teacher.phone_number == phone_without_prefix)
-        ).first()
+        # Check if teacher (matches either phone or phone_number)
+        teacher = db.query(Teacher).filter(Teacher.phone_matches(phone_normalized)).first()
         if teacher:
             user_type = "teacher"
 
         # Check if parent
         if not user_type:
-            student = db.query(Student).filter(
-                (Student.parent_phone == phone) |
-                (Student.parent_phone == phone_with_prefix) |
-                (Student.parent_phone == phone_without_prefix)
-            ).first()
+            student = db.query(Student).filter(Student.parent_phone_normalized == phone_normalized).first()
             if student:
                 user_type = "parent"
 
@@ -92,19 +84,14 @@ async def verify_otp_mobile(
             raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
         phone = request.phone_number
-        # Normalize phone number - remove +91 for comparison
-        phone_without_prefix = phone.replace('+91', '') if phone.startswith('+91') else phone
-        phone_with_prefix = f"+91{phone_without_prefix}" if not phone.startswith('+91') else phone
+        # Canonical E.164 form, matched against the indexed *_normalized columns
+        phone_normalized = normalize_phone(phone)
 
         user_type = None
         user_data = None
 
-        # Check if teacher (check both phone and phone_number for compatibility)
-        teacher = db.query(Teacher).filter(
-            (Teacher.phone == phone) | (Teacher.phone_number == phone) |
-            (Teacher.phone == phone_with_prefix) | (Teacher.phone_number == phone_with_prefix) |
-            (Teacher.phone == phone_without_prefix) | (Teacher.phone_number == phone_without_prefix)
-        ).first()
+        # Check if teacher (matches either phone or phone_number)
+        teacher = db.query(Teacher).filter(Teacher.phone_matches(phone_normalized)).first()
         if teacher:
             user_type = "teacher"
 
@@ -128,20 +115,12 @@ async def verify_otp_mobile(
 
         # Check if parent
         if not user_type:
-            student = db.query(Student).filter(
-                (Student.parent_phone == phone) |
-                (Student.parent_phone == phone_with_prefix) |
-                (Student.parent_phone == phone_without_prefix)
-            ).first()
+            student = db.query(Student).filter(Student.parent_phone_normalized == phone_normalized).first()
             if student:
                 user_type = "parent"
 
                 # Get or create parent record
-                parent = db.query(Parent).filter(
-                    (Parent.phone_number == phone) |
-                    (Parent.phone_number == phone_with_prefix) |
-                    (Parent.phone_number == phone_without_prefix)
-                ).first()
+                parent = db.query(Parent).filter(Parent.phone_normalized == phone_normalized).first()
                 if not parent:
                     parent = Parent(
                         phone_number=phone,
@@ -171,13 +150,9 @@ async def verify_otp_mobile(
                     parent.device_type = request.device_type
                 db.commit()
 
-                # Get all children (check all phone variations)
+                # Get all children
                 children = db.query(Student).filter(
-                    (
-                        (Student.parent_phone == phone) |
-                        (Student.parent_phone == phone_with_prefix) |
-                        (Student.parent_phone == phone_without_prefix)
-                    ),
+                    Student.parent_phone_normalized == phone_normalized,
                     Student.is_active == "Active"
                 ).all()
 
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 from pydantic import BaseModel
 from app.core.database import get_db
@@ -7,7 +7,8 @@ from app.core.dependencies import get_current_admin_user, get_current_teacher_us
 from app.models.user import User
 from app.models.communication import Communication
 from app.models.student import Student
-from app.services.whatsapp_service import WhatsAppService
+from app.services.whatsapp_service import whatsapp_service
+from app.utils.pagination import PageParams, ResponseField, paginate
 
 router = APIRouter()
 
@@ -63,7 +64,6 @@ async def send_bulk_message(
             raise HTTPException(status_code=400, detail="No valid phone numbers found for the selected recipients")
 
         # Send WhatsApp messages
-        whatsapp_service = WhatsAppService()
         results = await whatsapp_service.send_mass_communication(
             title=message_request.subject,
             message=message_request.message,
@@ -85,23 +85,36 @@ async def send_bulk_message(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending messages: {str(e)}")
 
+COMMUNICATION_HISTORY_FIELDS = {
+    "id": ResponseField(Communication.id),
+    "subject": ResponseField(Communication.subject),
+    "message": ResponseField(Communication.message),
+    "message_type": ResponseField(Communication.message_type),
+    "sent_at": ResponseField(Communication.sent_at, lambda comm: comm.sent_at.isoformat() if comm.sent_at else None),
+    "delivery_status": ResponseField(Communication.delivery_status),
+    "recipient": ResponseField(
+        [Communication.is_bulk, Communication.bulk_group_name],
+        lambda comm: comm.bulk_group_name if comm.is_bulk else "Individual"
+    ),
+    "sender": ResponseField(Communication.sender_id, lambda comm: comm.sender.full_name if comm.sender else "Unknown")
+}
+
 @router.get("/history", response_model=List[dict])
 async def get_communication_history(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user)
 ):
-    """Get communication history"""
-    communications = db.query(Communication).order_by(Communication.created_at.desc()).all()
-    return [
-        {
-            "id": comm.id,
-            "subject": comm.subject,
-            "message": comm.message,
-            "message_type": comm.message_type,
-            "sent_at": comm.sent_at.isoformat() if comm.sent_at else None,
-            "delivery_status": comm.delivery_status,
-            "recipient": comm.bulk_group_name if comm.is_bulk else "Individual",
-            "sender": comm.sender.full_name if comm.sender else "Unknown"
-        }
-        for comm in communications
-    ]
\ No newline at end of file
+    """Get communication history, newest first"""
+    fields = page.select_fields(COMMUNICATION_HISTORY_FIELDS)
+    query = db.query(Communication).options(
+        page.load_only(COMMUNICATION_HISTORY_FIELDS, fields, Communication.id)
+    )
+    if "sender" in fields:
+        # Sender names come in with the page instead of one lazy load per row
+        query = query.options(joinedload(Communication.sender).load_only(User.full_name))
+
+    # id order is creation order, and keeps the cursor on the primary key
+    communications, _ = paginate(query, page, [(Communication.id, True)], key=lambda comm: (comm.id,), response=response)
+    return [page.render(comm, COMMUNICATION_HISTORY_FIELDS, fields) for comm in communications]
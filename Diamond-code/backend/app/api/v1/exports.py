@@ -0,0 +1,200 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from typing import Optional
+from datetime import date, timedelta
+from app.core.database import get_db, SessionLocal
+from app.core.dependencies import get_current_admin_user
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.communication import Communication, MessageReceipt
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.teacher_attendance import TeacherAttendance
+from app.models.user import User
+from app.utils.export import CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE, stream_csv, stream_xlsx
+
+router = APIRouter()
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_YIELD_PER = 1000
+EXPORT_FORMAT = Query("csv", pattern="^(csv|xlsx)$")
+
+
+@router.get("/attendance")
+async def export_attendance(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    class_name: Optional[str] = None,
+    status: Optional[AttendanceStatus] = None,
+    format: str = EXPORT_FORMAT,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Export student attendance as CSV or XLSX, oldest first (admin only)"""
+    approver = aliased(User)
+    query = db.query(
+        Attendance.id,
+        Attendance.date,
+        Student.unique_id.label("student_unique_id"),
+        Student.full_name.label("student_name"),
+        Student.class_name,
+        Student.section,
+        Attendance.status,
+        Attendance.remarks,
+        Teacher.full_name.label("marked_by"),
+        Attendance.marked_at,
+        Attendance.admin_approved,
+        approver.full_name.label("approved_by"),
+        Attendance.approved_at,
+        Attendance.whatsapp_sent
+    ).join(
+        Student, Attendance.student_id == Student.id
+    ).outerjoin(
+        Teacher, Attendance.teacher_id == Teacher.id
+    ).outerjoin(
+        approver, Attendance.approved_by == approver.id
+    )
+
+    if start_date:
+        query = query.filter(Attendance.date >= start_date)
+    if end_date:
+        query = query.filter(Attendance.date <= end_date)
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+    if status:
+        query = query.filter(Attendance.status == status)
+
+    query = query.order_by(Attendance.date, Attendance.id)
+    return _export_response(query, "attendance", "Attendance", format, start_date, end_date)
+
+
+@router.get("/teacher-attendance")
+async def export_teacher_attendance(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    teacher_id: Optional[int] = None,
+    format: str = EXPORT_FORMAT,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Export teacher attendance as CSV or XLSX, oldest first (admin only)"""
+    marked_by = aliased(User)
+    query = db.query(
+        TeacherAttendance.id,
+        TeacherAttendance.date,
+        Teacher.unique_id.label("teacher_unique_id"),
+        Teacher.full_name.label("teacher_name"),
+        TeacherAttendance.status,
+        TeacherAttendance.check_in_time,
+        TeacherAttendance.check_out_time,
+        TeacherAttendance.remarks,
+        marked_by.full_name.label("marked_by"),
+        TeacherAttendance.marked_at,
+        TeacherAttendance.is_locked
+    ).join(
+        Teacher, TeacherAttendance.teacher_id == Teacher.id
+    ).outerjoin(
+        marked_by, TeacherAttendance.marked_by_admin_id == marked_by.id
+    )
+
+    if start_date:
+        query = query.filter(TeacherAttendance.date >= start_date)
+    if end_date:
+        query = query.filter(TeacherAttendance.date <= end_date)
+    if teacher_id:
+        query = query.filter(TeacherAttendance.teacher_id == teacher_id)
+
+    query = query.order_by(TeacherAttendance.date, TeacherAttendance.id)
+    return _export_response(query, "teacher_attendance", "Teacher Attendance", format, start_date, end_date)
+
+
+@router.get("/communications")
+async def export_communications(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    class_name: Optional[str] = None,
+    message_type: Optional[str] = None,
+    format: str = EXPORT_FORMAT,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Export sent communications as CSV or XLSX, oldest first (admin only)
+
+    Dates filter on when the message was created. class_name matches the
+    student an individual message was about, so it leaves out bulk
+    announcements. In-app messages get one row per recipient, with that
+    recipient's read state from message_receipts (a broadcast is stored once
+    and has no recipient of its own).
+    """
+    sender = aliased(User)
+    query = db.query(
+        Communication.id,
+        Communication.created_at,
+        Communication.message_type,
+        Communication.subject,
+        Communication.message,
+        sender.full_name.label("sender"),
+        func.coalesce(MessageReceipt.recipient_type, Communication.recipient_type).label("recipient_type"),
+        func.coalesce(MessageReceipt.recipient_id, Communication.recipient_id).label("recipient_id"),
+        Communication.recipient_phone_numbers,
+        Student.unique_id.label("student_unique_id"),
+        Student.full_name.label("student_name"),
+        Student.class_name,
+        Communication.is_bulk,
+        Communication.bulk_group_name,
+        Communication.delivery_status,
+        Communication.sent_at,
+        func.coalesce(MessageReceipt.is_read, Communication.is_read).label("is_read"),
+        func.coalesce(MessageReceipt.read_at, Communication.read_at).label("read_at")
+    ).outerjoin(
+        sender, Communication.sender_id == sender.id
+    ).outerjoin(
+        Student, Communication.student_id == Student.id
+    ).outerjoin(
+        MessageReceipt, MessageReceipt.message_id == Communication.id
+    )
+
+    if start_date:
+        query = query.filter(Communication.created_at >= start_date)
+    if end_date:
+        query = query.filter(Communication.created_at < end_date + timedelta(days=1))
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+    if message_type:
+        query = query.filter(Communication.message_type == message_type.upper())
+
+    query = query.order_by(Communication.id, MessageReceipt.recipient_type, MessageReceipt.recipient_id)
+    return _export_response(query, "communications", "Communications", format, start_date, end_date)
+
+
+def _export_response(query, name: str, sheet_name: str, format: str,
+                     start_date: Optional[date], end_date: Optional[date]) -> StreamingResponse:
+    """Stream the query's rows as a download; column labels become the header row"""
+    headers = [column["name"] for column in query.column_descriptions]
+    period = "_".join(day.isoformat() for day in (start_date, end_date) if day) or date.today().isoformat()
+    filename = f"{name}_{period}.{format}"
+
+    if format == "xlsx":
+        body, media_type = stream_xlsx(headers, _stream_rows(query), sheet_name), XLSX_MEDIA_TYPE
+    else:
+        body, media_type = stream_csv(headers, _stream_rows(query)), CSV_MEDIA_TYPE
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+def _stream_rows(query):
+    """
+    Rows from a server-side cursor, EXPORT_YIELD_PER at a time
+
+    Uses its own session since the request's is closed once the response starts.
+    """
+    stream_db = SessionLocal()
+    try:
+        yield from query.with_session(stream_db).yield_per(EXPORT_YIELD_PER)
+    finally:
+        stream_db.close()
@@ -1,20 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import csv
 import io
 import pandas as pd
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import get_current_admin_user
-from app.models.student import Student
+from app.models.import_job import ImportJob, ImportJobStatus
 from app.models.teacher import Teacher
-from app.models.user import User, UserRole
-from app.services.unique_id_generator import UniqueIdGenerator
-from app.services.whatsapp_service import WhatsAppService
-from datetime import datetime
+from app.models.user import User
+from app.services.attendance_import import AttendanceImportService
+from app.services.import_job_worker import import_job_worker
+from app.services.import_jobs import ImportJobService
 
 router = APIRouter()
-whatsapp_service = WhatsAppService()
 
 @router.get("/students/template")
 async def download_students_template(
@@ -82,114 +82,72 @@ async def download_teachers_template(
         headers={'Content-Disposition': 'attachment; filename=teacher_import_template.xlsx'}
     )
 
-@router.post("/students/import")
+IMPORT_MODE = Query(
+    "append",
+    pattern="^(append|sync)$",
+    description="append adds new rows only; sync also updates changed rows and deactivates rows missing from the sheet"
+)
+
+async def queue_import(db: Session, file: UploadFile, kind: str, mode: str, current_user: User):
+    try:
+        job = await ImportJobService.enqueue(db, file, kind, mode=mode, created_by=current_user.id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error importing file: {str(e)}"
+        )
+
+    if settings.IMPORT_WORKER_ENABLED:
+        import_job_worker.notify()
+    return {"job_id": job.id, "status": job.status.value, "message": f"Import of {job.filename} queued"}
+
+@router.post("/students/import", status_code=status.HTTP_202_ACCEPTED)
 async def import_students(
     file: UploadFile = File(...),
+    mode: str = IMPORT_MODE,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Import students from CSV or Excel file (admin only)"""
-    try:
-        contents = await file.read()
-
-        # Read Excel file only
-        if file.filename.endswith('.xlsx') or file.filename.endswith('.xls'):
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid file type. Only Excel files (.xlsx, .xls) are supported."
-            )
-
-        imported_count = 0
-        errors = []
-        imported_students = []  # Track imported students
-
-        for idx, row in df.iterrows():
-            row_num = idx + 2  # Account for 0-based index and header row
-            try:
-                # Validate required fields
-                required_fields = ['first_name', 'last_name', 'class_name', 'parent_phone']
-                missing_fields = [field for field in required_fields if pd.isna(row.get(field))]
-
-                if missing_fields:
-                    errors.append({
-                        'row': row_num,
-                        'error': f"Missing required fields: {', '.join(missing_fields)}"
-                    })
-                    continue
-
-                # Check if student already exists by parent_phone and full_name
-                parent_phone = str(row['parent_phone']).strip()
-                full_name = f"{str(row['first_name']).strip()} {str(row['last_name']).strip()}"
-                existing_student = db.query(Student).filter(
-                    Student.parent_phone == parent_phone,
-                    Student.full_name == full_name
-                ).first()
-
-                if existing_student:
-                    errors.append({
-                        'row': row_num,
-                        'error': f"Student '{full_name}' with parent phone {parent_phone} already exists (ID: {existing_student.unique_id})"
-                    })
-                    continue
-
-                # Generate unique ID for student
-                unique_id = UniqueIdGenerator.generate_student_id(db)
-
-                # Create student record
-                # Note: section is optional and left empty as Diamond Tutorial has only one section per class (7, 8, 9, 10)
-                student = Student(
-                    unique_id=unique_id,
-                    first_name=str(row['first_name']).strip(),
-                    last_name=str(row['last_name']).strip(),
-                    full_name=f"{str(row['first_name']).strip()} {str(row['last_name']).strip()}",
-                    class_name=str(row['class_name']).strip(),
-                    section=None,  # No sections - only one section per class
-                    date_of_birth=pd.to_datetime(row['date_of_birth']).date() if not pd.isna(row.get('date_of_birth')) else None,
-                    gender=str(row.get('gender', '')).strip() if not pd.isna(row.get('gender')) else '',
-                    parent_name=str(row.get('parent_name', '')).strip() if not pd.isna(row.get('parent_name')) else '',
-                    parent_phone=str(row['parent_phone']).strip(),
-                    parent_email=str(row.get('parent_email', '')).strip() if not pd.isna(row.get('parent_email')) else '',
-                    address=str(row.get('address', '')).strip() if not pd.isna(row.get('address')) else '',
-                    emergency_contact=str(row.get('emergency_contact', '')).strip() if not pd.isna(row.get('emergency_contact')) else '',
-                    admission_date=pd.to_datetime(row['admission_date']).date() if not pd.isna(row.get('admission_date')) else datetime.now().date(),
-                )
-
-                db.add(student)
-                db.flush()  # Flush to get the ID without committing transaction
-
-                # Track imported student
-                imported_students.append({
-                    'name': student.full_name,
-                    'phone': student.parent_phone
-                })
-
-                imported_count += 1
+    """Queue an Excel or CSV file of students for import (admin only); poll /import/jobs/{job_id} for progress"""
+    return await queue_import(db, file, "students", mode, current_user)
 
-            except Exception as e:
-                errors.append({
-                    'row': row_num,
-                    'error': str(e)
-                })
-
-        db.commit()
-
-        return {
-            "message": f"Successfully imported {imported_count} students",
-            "imported_count": imported_count,
-            "total_rows": len(df),
-            "imported_students": imported_students,  # Add student list
-            "errors": errors if errors else None
-        }
-
-    except Exception as e:
-        db.rollback()
+@router.get("/jobs/{job_id}")
+async def get_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Rows processed, errors so far and throughput of an import job (admin only)"""
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return ImportJobService.get_status(job)
+
+@router.post("/jobs/{job_id}/resume")
+async def resume_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Re-queue a failed import job; it continues after its last committed chunk (admin only)"""
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    if job.status != ImportJobStatus.FAILED:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error importing file: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only failed jobs can be resumed (job is {job.status.value})"
         )
 
+    ImportJobService.resume(job)
+    db.commit()
+    if settings.IMPORT_WORKER_ENABLED:
+        import_job_worker.notify()
+    return ImportJobService.get_status(job)
+
 @router.get("/students/csv-template")
 async def download_students_csv_template():
     """Download CSV template for students import"""
@@ -202,182 +160,63 @@ Priya,Sharma,7,2011-08-22,Female,Mrs. Sunita Sharma,+91-9876543212,sunita@exampl
         "content": template
     }
 
-async def send_credentials_to_teachers(credentials_list):
-    """Background task to send credentials to teachers via WhatsApp"""
-    for cred in credentials_list:
-        try:
-            await whatsapp_service.send_teacher_credentials(
-                teacher_name=cred['name'],
-                teacher_email=cred['email'],
-                username=cred['username'],
-                password=cred['password'],
-                phone_number=cred['phone_number']
-            )
-        except Exception as e:
-            print(f"Failed to send credentials to {cred['name']}: {str(e)}")
-
-@router.post("/teachers/import")
+@router.post("/teachers/import", status_code=status.HTTP_202_ACCEPTED)
 async def import_teachers(
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None,
+    mode: str = IMPORT_MODE,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Import teachers from CSV or Excel file (admin only)"""
-    try:
-        contents = await file.read()
-
-        # Read Excel file only
-        if file.filename.endswith('.xlsx') or file.filename.endswith('.xls'):
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid file type. Only Excel files (.xlsx, .xls) are supported."
-            )
-
-        imported_count = 0
-        errors = []
-        created_users = []  # Track created user accounts with their credentials
-        imported_teachers = []  # Track imported teachers (name + phone only)
-
-        for idx, row in df.iterrows():
-            row_num = idx + 2  # Account for 0-based index and header row
-            try:
-                required_fields = ['first_name', 'last_name', 'phone_number']
-                missing_fields = [field for field in required_fields if pd.isna(row.get(field))]
-
-                if missing_fields:
-                    errors.append({
-                        'row': row_num,
-                        'error': f"Missing required fields: {', '.join(missing_fields)}"
-                    })
-                    continue
+    """
+    Queue an Excel or CSV file of teachers for import (admin only)
 
-                phone_num = str(row['phone_number']).strip()
+    Login accounts are created with each committed chunk and their credentials
+    sent via WhatsApp; poll /import/jobs/{job_id} for progress.
+    """
+    return await queue_import(db, file, "teachers", mode, current_user)
 
-                # Check if teacher already exists by phone number
-                existing_teacher = db.query(Teacher).filter(Teacher.phone_number == phone_num).first()
-
-                if existing_teacher:
-                    errors.append({
-                        'row': row_num,
-                        'error': f"Teacher with phone number {phone_num} already exists (ID: {existing_teacher.unique_id})"
-                    })
-                    continue
-
-                # Generate unique ID for teacher
-                unique_id = UniqueIdGenerator.generate_teacher_id(db)
-
-                # Auto-generate email from phone number (last 10 digits)
-                phone_digits = ''.join(filter(str.isdigit, phone_num))
-                auto_email = f"teacher_{phone_digits[-10:]}@avm.com"
-
-                # Parse subjects and classes (comma-separated)
-                subjects = [s.strip() for s in str(row.get('subjects', '')).split(',') if s.strip()] if not pd.isna(row.get('subjects')) else []
-                classes_assigned = [c.strip() for c in str(row.get('classes_assigned', '')).split(',') if c.strip()] if not pd.isna(row.get('classes_assigned')) else []
-
-                teacher = Teacher(
-                    unique_id=unique_id,
-                    first_name=str(row['first_name']).strip(),
-                    last_name=str(row['last_name']).strip(),
-                    full_name=f"{str(row['first_name']).strip()} {str(row['last_name']).strip()}",
-                    email=auto_email,  # Auto-generated email
-                    phone_number=phone_num,
-                    phone=phone_num,  # Set phone field for mobile login compatibility
-                    subjects=subjects,
-                    classes_assigned=classes_assigned,
-                    qualification=str(row.get('qualification', '')).strip() if not pd.isna(row.get('qualification')) else '',
-                    experience_years=int(row.get('experience_years', 0)) if not pd.isna(row.get('experience_years')) else 0,
-                    address=str(row.get('address', '')).strip() if not pd.isna(row.get('address')) else '',
-                    emergency_contact=str(row.get('emergency_contact', '')).strip() if not pd.isna(row.get('emergency_contact')) else '',
-                    joining_date=pd.to_datetime(row.get('joining_date')) if (row.get('joining_date') is not None and not pd.isna(row.get('joining_date'))) else datetime.now(),
-                )
-
-                db.add(teacher)
-                db.flush()  # Flush to get the ID without committing transaction
-
-                # Create User account for teacher with default password
-                # Check if user already exists by phone number
-                existing_user = db.query(User).filter(User.phone_number == teacher.phone_number).first()
-                if not existing_user:
-                    from app.core.security import get_password_hash
-
-                    # Generate simple default password from last 4 digits of phone
-                    phone_digits = ''.join(filter(str.isdigit, teacher.phone_number))
-                    default_password = phone_digits[-4:] if len(phone_digits) >= 4 else "1234"
-
-                    # Create username from phone number
-                    username = f"teacher_{phone_digits[-10:]}"
-
-                    user = User(
-                        unique_id=unique_id,  # Same as teacher unique_id
-                        email=teacher.email,
-                        phone_number=teacher.phone_number,
-                        username=username,
-                        full_name=teacher.full_name,
-                        hashed_password=get_password_hash(default_password),  # Properly hash the password
-                        role=UserRole.TEACHER,
-                        is_active=True,
-                        is_verified=True
-                    )
-                    db.add(user)
-                    db.flush()
+@router.get("/teachers/csv-template")
+async def download_teachers_csv_template():
+    """Download CSV template for teachers import"""
+    template = """first_name,last_name,email,phone_number,subjects,classes_assigned,qualification,experience_years,address,emergency_contact,joining_date
+Priya,Patel,priya.new@avm.com,+91-9876543220,"Mathematics,Science","Class 8A,Class 9A",M.Sc. Mathematics,5,"789 School Rd, Delhi",+91-9876543221,2023-06-01
+Amit,Singh,amit.new@avm.com,+91-9876543222,"English,Hindi","Class 7A,Class 7B",M.A. English,3,"321 Teacher St, Mumbai",+91-9876543223,2023-06-01"""
 
-                    # Track created user credentials (including phone for WhatsApp)
-                    created_users.append({
-                        'name': teacher.full_name,
-                        'email': teacher.email,
-                        'username': username,
-                        'password': default_password,
-                        'phone_number': teacher.phone_number
-                    })
+    return {
+        "filename": "teachers_import_template.csv",
+        "content": template
+    }
 
-                # Track imported teacher (simple list for display)
-                imported_teachers.append({
-                    'name': teacher.full_name,
-                    'phone': teacher.phone_number
-                })
+@router.post("/attendance")
+async def import_attendance_register(
+    file: UploadFile = File(...),
+    teacher_id: int = Query(..., description="Teacher the historical records are attributed to"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Backfill attendance from a wide register (admin only)
 
-                imported_count += 1
+    One row per student with a unique_id column, one column per date
+    (2025-06-02 or 02/06/2025) holding P, A, L or LV. Records are stored as
+    approved and parents are not notified; days that already have a record
+    are skipped.
+    """
+    if not db.get(Teacher, teacher_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Teacher not found")
 
-            except Exception as e:
-                errors.append({
-                    'row': row_num,
-                    'error': str(e)
-                })
+    try:
+        parsed = await AttendanceImportService.parse_upload(file)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
+    try:
+        summary = await run_in_threadpool(AttendanceImportService.load, db, parsed, teacher_id, current_user.id)
         db.commit()
-
-        response = {
-            "message": f"Successfully imported {imported_count} teachers",
-            "imported_count": imported_count,
-            "total_rows": len(df),
-            "imported_teachers": imported_teachers,  # Simple list with name + phone only
-            "errors": errors if errors else None
-        }
-
-        # Send credentials via WhatsApp in background (if needed)
-        if created_users and background_tasks:
-            background_tasks.add_task(send_credentials_to_teachers, created_users)
-
-        return response
-
+        return summary
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error importing file: {str(e)}"
+            detail=f"Error importing attendance register: {str(e)}"
         )
-
-@router.get("/teachers/csv-template")
-async def download_teachers_csv_template():
-    """Download CSV template for teachers import"""
-    template = """first_name,last_name,email,phone_number,subjects,classes_assigned,qualification,experience_years,address,emergency_contact,joining_date
-Priya,Patel,priya.new@avm.com,+91-9876543220,"Mathematics,Science","Class 8A,Class 9A",M.Sc. Mathematics,5,"789 School Rd, Delhi",+91-9876543221,2023-06-01
-Amit,Singh,amit.new@avm.com,+91-9876543222,"English,Hindi","Class 7A,Class 7B",M.A. English,3,"321 Teacher St, Mumbai",+91-9876543223,2023-06-01"""
-
-    return {
-        "filename": "teachers_import_template.csv",
-        "content": template
-    }
\ No newline at end of file
@@ -2,86 +2,133 @@
 Mobile In-App Messaging API
 Handles messages between admin and parents/teachers
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+import asyncio
+import hashlib
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, case, func, insert
 from typing import List, Optional
-from pydantic import BaseModel
 from datetime import datetime
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, get_current_mobile_user
 from app.models.user import User
-from app.models.communication import Communication
+from app.models.communication import Communication, MessageReceipt
 from app.models.parent import Parent
 from app.models.teacher import Teacher
 from app.services.fcm_push_notification_service import FCMPushNotificationService
+from app.services.unread_counter import unread_counter
+from app.utils.pagination import PageParams, ResponseField, paginate
 
 router = APIRouter()
 
 
-class SendMessageRequest(BaseModel):
-    recipient_type: str  # "parent" or "teacher"
-    recipient_id: int
-    subject: str
-    message: str
-
-
-class MessageResponse(BaseModel):
-    id: int
-    subject: str
-    message: str
-    sender_name: str
-    is_read: bool
-    created_at: datetime
-    read_at: Optional[datetime] = None
-
-    class Config:
-        from_attributes = True
-
-
-@router.get("/inbox", response_model=List[MessageResponse])
+# Inbox rows are (Communication, MessageReceipt) pairs; read state comes from the receipt
+INBOX_FIELDS = {
+    "id": ResponseField(Communication.id, lambda row: row.Communication.id),
+    "subject": ResponseField(Communication.subject, lambda row: row.Communication.subject or "No Subject"),
+    "message": ResponseField(Communication.message, lambda row: row.Communication.message),
+    "sender_name": ResponseField(
+        Communication.sender_id,
+        lambda row: row.Communication.sender.full_name if row.Communication.sender else "Admin"
+    ),
+    "is_read": ResponseField([], lambda row: row.MessageReceipt.is_read),
+    "created_at": ResponseField(Communication.created_at, lambda row: row.Communication.created_at),
+    "read_at": ResponseField([], lambda row: row.MessageReceipt.read_at)
+}
+
+
+def _recipient_type(current_user) -> Optional[str]:
+    """"parent" or "teacher" for mobile users, None for web admin users (no inbox)"""
+    if isinstance(current_user, Parent):
+        return "parent"
+    if isinstance(current_user, Teacher):
+        return "teacher"
+    return None
+
+
+def _inbox_etag(db: Session, recipient_type: str, recipient_id: int, page: PageParams) -> str:
+    """
+    ETag of one inbox page, from a single aggregate over the recipient's receipts
+
+    The newest message ID and receipt count change when a message arrives
+    or is deleted, and the unread count is the read-state version (receipts
+    only ever go from unread to read). The page parameters are part of it
+    since every page is a different response.
+    """
+    latest, total, unread = db.query(
+        func.max(MessageReceipt.message_id),
+        func.count(MessageReceipt.message_id),
+        func.coalesce(func.sum(case((MessageReceipt.is_read == False, 1), else_=0)), 0)
+    ).filter(
+        MessageReceipt.recipient_type == recipient_type,
+        MessageReceipt.recipient_id == recipient_id
+    ).one()
+    version = f"{recipient_type}:{recipient_id}:{latest}:{total}:{unread}|{page.cursor}:{page.limit}:{page.requested_fields}"
+    return f'W/"{hashlib.sha1(version.encode()).hexdigest()[:24]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" match
+    return "*" in candidates or etag.removeprefix("W/") in (value.removeprefix("W/") for value in candidates)
+
+
+@router.get("/inbox", response_model=List[dict])
 async def get_inbox(
+    response: Response,
+    page: PageParams = Depends(),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_mobile_user)
 ):
-    """Get inbox messages for logged-in user (parent or teacher)"""
+    """
+    Get inbox messages for logged-in user (parent or teacher), newest first
+
+    Each item has id, subject, message, sender_name, is_read, created_at and
+    read_at, or the subset named in `fields`. Responses carry an ETag; send
+    it back in If-None-Match to get a 304 when nothing changed.
+    """
     try:
-        # Determine user type - check if it's a Parent or Teacher model instance
-        if isinstance(current_user, Parent):
-            messages = db.query(Communication).filter(
-                and_(
-                    Communication.recipient_type == "parent",
-                    Communication.recipient_id == current_user.id,
-                    Communication.message_type == "IN_APP"
-                )
-            ).order_by(Communication.created_at.desc()).all()
-
-        elif isinstance(current_user, Teacher):
-            messages = db.query(Communication).filter(
-                and_(
-                    Communication.recipient_type == "teacher",
-                    Communication.recipient_id == current_user.id,
-                    Communication.message_type == "IN_APP"
-                )
-            ).order_by(Communication.created_at.desc()).all()
-        else:
+        recipient_type = _recipient_type(current_user)
+        if not recipient_type:
             # Web admin user - no inbox
             return []
 
-        return [
-            MessageResponse(
-                id=msg.id,
-                subject=msg.subject or "No Subject",
-                message=msg.message,
-                sender_name=msg.sender.full_name if msg.sender else "Admin",
-                is_read=msg.is_read or False,
-                created_at=msg.created_at,
-                read_at=msg.read_at
+        fields = page.select_fields(INBOX_FIELDS)
+        etag = _inbox_etag(db, recipient_type, current_user.id, page)
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
+
+        # Direct messages and broadcasts alike reach the user through their receipt
+        query = db.query(Communication, MessageReceipt).join(
+            MessageReceipt, MessageReceipt.message_id == Communication.id
+        ).options(
+            page.load_only(INBOX_FIELDS, fields, Communication.id)
+        ).filter(
+            and_(
+                MessageReceipt.recipient_type == recipient_type,
+                MessageReceipt.recipient_id == current_user.id,
+                Communication.message_type == "IN_APP"
             )
-            for msg in messages
-        ]
+        )
+        if "sender_name" in fields:
+            query = query.options(joinedload(Communication.sender).load_only(User.full_name))
+
+        # Message id order is creation order, and keeps the cursor on the receipt index
+        rows, _ = paginate(
+            query, page, [(MessageReceipt.message_id, True)],
+            key=lambda row: (row.MessageReceipt.message_id,), response=response
+        )
+        return [page.render(row, INBOX_FIELDS, fields) for row in rows]
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching inbox: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching messages: {str(e)}")
@@ -92,30 +139,10 @@ async def get_unread_count(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_mobile_user)
 ):
-    """Get count of unread messages"""
+    """Get count of unread messages, from the unread counter cache"""
     try:
-        if isinstance(current_user, Parent):
-            count = db.query(Communication).filter(
-                and_(
-                    Communication.recipient_type == "parent",
-                    Communication.recipient_id == current_user.id,
-                    Communication.message_type == "IN_APP",
-                    Communication.is_read == False
-                )
-            ).count()
-
-        elif isinstance(current_user, Teacher):
-            count = db.query(Communication).filter(
-                and_(
-                    Communication.recipient_type == "teacher",
-                    Communication.recipient_id == current_user.id,
-                    Communication.message_type == "IN_APP",
-                    Communication.is_read == False
-                )
-            ).count()
-        else:
-            count = 0
-
+        recipient_type = _recipient_type(current_user)
+        count = unread_counter.get(recipient_type, current_user.id) if recipient_type else 0
         return {"count": count}
 
     except Exception as e:
@@ -123,6 +150,34 @@ async def get_unread_count(
         return {"count": 0}
 
 
+@router.get("/unread-count/wait")
+async def wait_for_unread_count(
+    since: int = Query(..., ge=0, description="The count the client already shows"),
+    timeout: int = Query(25, ge=1, le=settings.UNREAD_LONG_POLL_MAX_SECONDS),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_mobile_user)
+):
+    """
+    Long-poll the unread count
+
+    Answers as soon as the count differs from `since`, or with the current
+    count after `timeout` seconds. `changed` tells the two apart.
+    """
+    recipient_type = _recipient_type(current_user)
+    if not recipient_type:
+        return {"count": 0, "changed": since != 0}
+    recipient_id = current_user.id
+    # Hand the connection back to the pool while we wait
+    db.close()
+
+    try:
+        count = await unread_counter.wait_for_change(recipient_type, recipient_id, since, timeout)
+    except Exception as e:
+        print(f"Error waiting for unread count: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    return {"count": count, "changed": count != since}
+
+
 @router.put("/{message_id}/read")
 async def mark_as_read(
     message_id: int,
@@ -131,25 +186,34 @@ async def mark_as_read(
 ):
     """Mark a message as read"""
     try:
-        message = db.query(Communication).filter(Communication.id == message_id).first()
-
-        if not message:
-            raise HTTPException(status_code=404, detail="Message not found")
-
-        # Verify the message belongs to current user
-        if isinstance(current_user, Parent):
-            if message.recipient_type != "parent" or message.recipient_id != current_user.id:
-                raise HTTPException(status_code=403, detail="Not authorized")
-        elif isinstance(current_user, Teacher):
-            if message.recipient_type != "teacher" or message.recipient_id != current_user.id:
-                raise HTTPException(status_code=403, detail="Not authorized")
-        else:
+        recipient_type = _recipient_type(current_user)
+        # Verify the message was delivered to current user
+        receipt = db.query(MessageReceipt).filter(
+            MessageReceipt.message_id == message_id,
+            MessageReceipt.recipient_type == recipient_type,
+            MessageReceipt.recipient_id == current_user.id
+        ).first() if recipient_type else None
+
+        if not receipt:
+            if not db.query(Communication.id).filter(Communication.id == message_id).first():
+                raise HTTPException(status_code=404, detail="Message not found")
             raise HTTPException(status_code=403, detail="Not authorized")
 
         # Mark as read
-        message.is_read = True
-        message.read_at = datetime.utcnow()
+        was_unread = not receipt.is_read
+        read_at = datetime.utcnow()
+        receipt.is_read = True
+        receipt.read_at = read_at
+        # A direct message's own row keeps its read state too (exports and analytics read it)
+        db.query(Communication).filter(
+            Communication.id == message_id,
+            Communication.recipient_type == recipient_type,
+            Communication.recipient_id == current_user.id
+        ).update({"is_read": True, "read_at": read_at}, synchronize_session=False)
+        recipient_id = current_user.id
         db.commit()
+        if was_unread:
+            unread_counter.add(recipient_type, [recipient_id], -1)
 
         return {"success": True, "message": "Message marked as read"}
 
@@ -166,7 +230,12 @@ async def send_to_parents(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Send in-app message to parents (admin only)"""
+    """
+    Send in-app message to parents (admin only)
+
+    Stored as one broadcast communication plus a message_receipts row per
+    parent, written with a single bulk insert.
+    """
     try:
         subject = message_data.get("subject")
         message = message_data.get("message")
@@ -181,51 +250,65 @@ async def send_to_parents(
         if not parents:
             raise HTTPException(status_code=404, detail="No parents found")
 
-        sent_count = 0
-        notification_sent_count = 0
-        no_token_count = 0
-
         print(f"📨 Sending message to {len(parents)} parents...")
 
-        # Create individual message for each parent
+        # One broadcast row for the text, one receipt per parent
+        broadcast = Communication(
+            sender_id=current_user.id,
+            recipient_type="parent",
+            subject=subject,
+            message=message,
+            message_type="IN_APP",
+            is_bulk=True,
+            bulk_group_name=recipients,
+            is_sent=True,
+            sent_at=datetime.utcnow(),
+            delivery_status="delivered"
+        )
+        db.add(broadcast)
+        db.flush()  # Assign the message ID for the receipts and notification payloads
+        parent_ids = [parent.id for parent in parents]
+        db.execute(insert(MessageReceipt.__table__), [
+            {"message_id": broadcast.id, "recipient_type": "parent", "recipient_id": parent_id, "is_read": False}
+            for parent_id in parent_ids
+        ])
+        sent_count = len(parents)
+
+        # Build one FCM message per parent with a push token and send them in send_each chunks
+        notifications = []
+        targets = []
         for parent in parents:
-            comm = Communication(
-                sender_id=current_user.id,
-                recipient_id=parent.id,
-                recipient_type="parent",
-                subject=subject,
-                message=message,
-                message_type="IN_APP",
-                is_sent=True,
-                sent_at=datetime.utcnow(),
-                delivery_status="delivered"
-            )
-            db.add(comm)
-            sent_count += 1
-
-            # Send FCM push notification if parent has push token
             if parent.push_token:
-                parent_name = parent.name or "Unknown"
-                print(f"📲 Sending FCM notification to {parent_name} (phone: {parent.phone_number})")
-                print(f"   Token: {parent.push_token[:50]}...")
-                result = await FCMPushNotificationService.send_message_notification(
-                    fcm_token=parent.push_token,
-                    sender_name="Diamond Tutorial",
-                    message_preview=message[:100],
-                    message_id=comm.id
-                )
-                if result.get("status") == "success":
-                    notification_sent_count += 1
-                print(f"   Result: {result}")
+                notifications.append({
+                    "fcm_token": parent.push_token,
+                    **FCMPushNotificationService.message_notification_content(
+                        sender_name="Diamond Tutorial",
+                        message_preview=message[:100],
+                        message_id=broadcast.id
+                    )
+                })
+                targets.append(parent)
+        no_token_count = len(parents) - len(targets)
+
+        notification_sent_count = 0
+        if notifications:
+            # firebase_admin is blocking - keep it off the event loop
+            result = await asyncio.to_thread(FCMPushNotificationService.send_bulk_notifications, notifications)
+            if result.get("status") == "success":
+                notification_sent_count = result["sent"]
+                for parent, response in zip(targets, result["responses"]):
+                    if response.get("unregistered"):
+                        # Stale device token - stop sending to it until the parent logs in again
+                        print(f"⚠️  Clearing unregistered push token for parent {parent.name or 'Unknown'} (ID: {parent.id})")
+                        parent.push_token = None
             else:
-                parent_name = parent.name or "Unknown"
-                no_token_count += 1
-                print(f"⚠️  Parent {parent_name} (ID: {parent.id}, phone: {parent.phone_number}) has NO push token")
+                print(f"❌ FCM fan-out failed: {result.get('message')}")
 
         db.commit()
+        unread_counter.add("parent", parent_ids, 1)
 
         print(f"✅ Message delivery complete:")
-        print(f"   - Messages created: {sent_count}")
+        print(f"   - Receipts created: {sent_count}")
         print(f"   - FCM notifications sent: {notification_sent_count}")
         print(f"   - Parents without tokens: {no_token_count}")
 
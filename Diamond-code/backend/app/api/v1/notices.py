@@ -1,31 +1,44 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_admin_user, get_current_teacher_user
 from app.models.notice import Notice
 from app.models.user import User
+from app.utils.pagination import PageParams, ResponseField, paginate
 
 router = APIRouter()
 
+NOTICE_LIST_FIELDS = {
+    "id": ResponseField(Notice.id),
+    "title": ResponseField(Notice.title),
+    "content": ResponseField(Notice.content),
+    "published_at": ResponseField(Notice.published_at),
+    "priority": ResponseField(Notice.priority),
+    "target_audience": ResponseField(Notice.target_audience)
+}
+
 @router.get("/", response_model=List[dict])
 async def get_notices(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user)
 ):
-    """Get all published notices"""
-    notices = db.query(Notice).filter(Notice.is_published == True).order_by(Notice.published_at.desc()).all()
-    return [
-        {
-            "id": notice.id,
-            "title": notice.title,
-            "content": notice.content,
-            "published_at": notice.published_at,
-            "priority": notice.priority,
-            "target_audience": notice.target_audience
-        }
-        for notice in notices
-    ]
+    """Get published notices, latest published first"""
+    fields = page.select_fields(NOTICE_LIST_FIELDS)
+    query = db.query(Notice).options(
+        page.load_only(NOTICE_LIST_FIELDS, fields, Notice.id, Notice.published_at, Notice.created_at)
+    ).filter(Notice.is_published == True)
+
+    # Keyset on (published_at, id); a notice published without a timestamp sorts by its creation time
+    published = func.coalesce(Notice.published_at, Notice.created_at)
+    notices, _ = paginate(
+        query, page, [(published, True), (Notice.id, True)],
+        key=lambda notice: (notice.published_at or notice.created_at, notice.id), response=response
+    )
+    return [page.render(notice, NOTICE_LIST_FIELDS, fields) for notice in notices]
 
 @router.post("/")
 async def create_notice(
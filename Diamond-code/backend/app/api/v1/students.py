@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from typing import List, Union
 from app.core.database import get_db
 from app.core.dependencies import get_current_admin_user, get_current_teacher_user, get_current_mobile_user
 from app.models.student import Student
 from app.models.user import User
+from app.services.attendance_rollup import AttendanceRollupService
+from app.services.unique_id_generator import UniqueIdGenerator
 from app.models.teacher import Teacher
 from app.models.parent import Parent
+from app.utils.pagination import PageParams, ResponseField, paginate
+from app.utils.phone import normalize_phone
 
 router = APIRouter()
 
@@ -30,26 +33,31 @@ async def get_classes(
         if class_name[0]  # Filter out any None values
     ]
 
+STUDENT_LIST_FIELDS = {
+    "id": ResponseField(Student.id),
+    "unique_id": ResponseField(Student.unique_id),
+    "full_name": ResponseField(Student.full_name),
+    "class_name": ResponseField(Student.class_name),
+    "section": ResponseField(Student.section),
+    "parent_phone": ResponseField(Student.parent_phone),
+    "parent_name": ResponseField(Student.parent_name)
+}
+
 @router.get("/", response_model=List[dict])
 async def get_students(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: Union[User, Teacher, Parent] = Depends(get_current_mobile_user)
 ):
-    """Get all students (mobile app: teachers and admins only)"""
-    # Return all students for admins and teachers
-    students = db.query(Student).filter(Student.is_active == "Active").all()
-    return [
-        {
-            "id": student.id,
-            "unique_id": student.unique_id,
-            "full_name": student.full_name,
-            "class_name": student.class_name,
-            "section": student.section,
-            "parent_phone": student.parent_phone,
-            "parent_name": student.parent_name
-        }
-        for student in students
-    ]
+    """Get active students, paginated by id (mobile app: teachers and admins only)"""
+    fields = page.select_fields(STUDENT_LIST_FIELDS)
+    query = db.query(Student).options(
+        page.load_only(STUDENT_LIST_FIELDS, fields, Student.id)
+    ).filter(Student.is_active == "Active")
+
+    students, _ = paginate(query, page, [(Student.id, False)], key=lambda student: (student.id,), response=response)
+    return [page.render(student, STUDENT_LIST_FIELDS, fields) for student in students]
 
 @router.get("/{student_id}")
 async def get_student(
@@ -71,10 +79,7 @@ async def create_student(
 ):
     """Create new student (admin only)"""
     try:
-        # Generate unique_id
-        last_student = db.query(Student).order_by(Student.id.desc()).first()
-        next_id = (last_student.id + 1) if last_student else 1
-        unique_id = f"Diamond-STU-{next_id:03d}"
+        unique_id = UniqueIdGenerator.generate_student_id(db)
 
         # Split full_name into first_name and last_name
         full_name = student_data['full_name']
@@ -138,8 +143,13 @@ async def clear_all_students(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Clear all student data (admin only) - USE WITH CAUTION"""
+    """Clear all student data, with their attendance (admin only) - USE WITH CAUTION"""
+    from app.models.attendance import Attendance
+
     count = db.query(Student).count()
+    # Every attendance row belongs to a student: remove them and the rollup built from them
+    db.query(Attendance).delete(synchronize_session=False)
+    AttendanceRollupService.clear(db)
     db.query(Student).delete()
     db.commit()
     return {"message": f"Cleared all {count} students from database", "deleted_count": count}
@@ -152,7 +162,7 @@ async def delete_multiple_students(
 ):
     """Delete multiple students (admin only)"""
     from app.models.attendance import Attendance
-    from app.models.communication import Communication
+    from app.models.communication import Communication, MessageReceipt
 
     try:
         deleted_count = 0
@@ -165,11 +175,13 @@ async def delete_multiple_students(
             student = db.query(Student).filter(Student.id == student_id).first()
             if student:
                 # Store parent phone for later cleanup check
-                if student.parent_phone:
-                    parent_phones_to_check.add(student.parent_phone)
+                parent_phone = normalize_phone(student.parent_phone)
+                if parent_phone:
+                    parent_phones_to_check.add(parent_phone)
 
                 # Delete related records
                 att_count = db.query(Attendance).filter(Attendance.student_id == student_id).count()
+                AttendanceRollupService.remove_matching(db, db.query(Attendance).filter(Attendance.student_id == student_id))
                 db.query(Attendance).filter(Attendance.student_id == student_id).delete(synchronize_session=False)
                 total_attendance += att_count
 
@@ -184,31 +196,22 @@ async def delete_multiple_students(
 
         # Check and delete orphaned parents
         for parent_phone in parent_phones_to_check:
-            phone_without_prefix = parent_phone.replace('+91', '') if parent_phone.startswith('+91') else parent_phone
-            phone_with_prefix = f"+91{phone_without_prefix}" if not parent_phone.startswith('+91') else parent_phone
-
             # Check if any other active students share this parent's phone
             other_students = db.query(Student).filter(
-                or_(
-                    Student.parent_phone == parent_phone,
-                    Student.parent_phone == phone_with_prefix,
-                    Student.parent_phone == phone_without_prefix
-                ),
+                Student.parent_phone_normalized == parent_phone,
                 Student.is_active == "Active"
             ).count()
 
             # If no other students, delete the parent
             if other_students == 0:
-                parent = db.query(Parent).filter(
-                    or_(
-                        Parent.phone_number == parent_phone,
-                        Parent.phone_number == phone_with_prefix,
-                        Parent.phone_number == phone_without_prefix
-                    )
-                ).first()
+                parent = db.query(Parent).filter(Parent.phone_normalized == parent_phone).first()
 
                 if parent:
-                    # Delete parent's messages
+                    # Delete parent's messages (their broadcast receipts, and direct messages)
+                    db.query(MessageReceipt).filter(
+                        MessageReceipt.recipient_type == "parent",
+                        MessageReceipt.recipient_id == parent.id
+                    ).delete(synchronize_session=False)
                     db.query(Communication).filter(
                         Communication.recipient_type == "parent",
                         Communication.recipient_id == parent.id
@@ -245,7 +248,7 @@ async def delete_student(
 ):
     """Delete student (admin only)"""
     from app.models.attendance import Attendance
-    from app.models.communication import Communication
+    from app.models.communication import Communication, MessageReceipt
     from app.models.parent import Parent
 
     student = db.query(Student).filter(Student.id == student_id).first()
@@ -254,11 +257,12 @@ async def delete_student(
 
     try:
         # Store parent phone for cleanup check
-        parent_phone = student.parent_phone
+        parent_phone = normalize_phone(student.parent_phone)
         parent_deleted = False
 
         # Delete all attendance records for this student
         attendance_count = db.query(Attendance).filter(Attendance.student_id == student_id).count()
+        AttendanceRollupService.remove_matching(db, db.query(Attendance).filter(Attendance.student_id == student_id))
         db.query(Attendance).filter(Attendance.student_id == student_id).delete(synchronize_session=False)
 
         # Delete all communications for this student
@@ -269,30 +273,17 @@ async def delete_student(
         db.delete(student)
         db.flush()  # Flush to ensure student is deleted before checking orphans
 
-        # Check if parent has any other children (normalize phone number)
+        # Check if parent has any other children
         if parent_phone:
-            phone_without_prefix = parent_phone.replace('+91', '') if parent_phone.startswith('+91') else parent_phone
-            phone_with_prefix = f"+91{phone_without_prefix}" if not parent_phone.startswith('+91') else parent_phone
-
             # Check if any other active students share this parent's phone
             other_students = db.query(Student).filter(
-                or_(
-                    Student.parent_phone == parent_phone,
-                    Student.parent_phone == phone_with_prefix,
-                    Student.parent_phone == phone_without_prefix
-                ),
+                Student.parent_phone_normalized == parent_phone,
                 Student.is_active == "Active"
             ).count()
 
             # If no other students, delete the parent from parent table
             if other_students == 0:
-                parent = db.query(Parent).filter(
-                    or_(
-                        Parent.phone_number == parent_phone,
-                        Parent.phone_number == phone_with_prefix,
-                        Parent.phone_number == phone_without_prefix
-                    )
-                ).first()
+                parent = db.query(Parent).filter(Parent.phone_normalized == parent_phone).first()
 
                 if parent:
                     # Also delete parent's messages
@@ -300,6 +291,10 @@ async def delete_student(
                         Communication.recipient_type == "parent",
                         Communication.recipient_id == parent.id
                     ).count()
+                    db.query(MessageReceipt).filter(
+                        MessageReceipt.recipient_type == "parent",
+                        MessageReceipt.recipient_id == parent.id
+                    ).delete(synchronize_session=False)
                     db.query(Communication).filter(
                         Communication.recipient_type == "parent",
                         Communication.recipient_id == parent.id
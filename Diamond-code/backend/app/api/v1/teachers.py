@@ -1,38 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_admin_user
+from app.core.principal_cache import principal_cache
 from app.models.teacher import Teacher
 from app.models.user import User
+from app.services.attendance_rollup import AttendanceRollupService
+from app.services.unique_id_generator import UniqueIdGenerator
+from app.utils.pagination import PageParams, ResponseField, paginate
 
 router = APIRouter()
 
+TEACHER_LIST_FIELDS = {
+    "id": ResponseField(Teacher.id),
+    "unique_id": ResponseField(Teacher.unique_id),
+    "first_name": ResponseField(Teacher.first_name),
+    "last_name": ResponseField(Teacher.last_name),
+    "full_name": ResponseField(Teacher.full_name),
+    "email": ResponseField(Teacher.email),
+    "phone_number": ResponseField(Teacher.phone_number),
+    "subjects": ResponseField(Teacher.subjects),
+    "classes_assigned": ResponseField(Teacher.classes_assigned),
+    "qualification": ResponseField(Teacher.qualification),
+    "experience_years": ResponseField(Teacher.experience_years),
+    "address": ResponseField(Teacher.address),
+    "emergency_contact": ResponseField(Teacher.emergency_contact)
+}
+
 @router.get("/", response_model=List[dict])
 async def get_teachers(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Get all teachers (admin only)"""
-    teachers = db.query(Teacher).filter(Teacher.is_active == "Active").all()
-    return [
-        {
-            "id": teacher.id,
-            "unique_id": teacher.unique_id,
-            "first_name": teacher.first_name,
-            "last_name": teacher.last_name,
-            "full_name": teacher.full_name,
-            "email": teacher.email,
-            "phone_number": teacher.phone_number,
-            "subjects": teacher.subjects,
-            "classes_assigned": teacher.classes_assigned,
-            "qualification": teacher.qualification,
-            "experience_years": teacher.experience_years,
-            "address": teacher.address,
-            "emergency_contact": teacher.emergency_contact
-        }
-        for teacher in teachers
-    ]
+    """Get active teachers, paginated by id (admin only)"""
+    fields = page.select_fields(TEACHER_LIST_FIELDS)
+    query = db.query(Teacher).options(
+        page.load_only(TEACHER_LIST_FIELDS, fields, Teacher.id)
+    ).filter(Teacher.is_active == "Active")
+
+    teachers, _ = paginate(query, page, [(Teacher.id, False)], key=lambda teacher: (teacher.id,), response=response)
+    return [page.render(teacher, TEACHER_LIST_FIELDS, fields) for teacher in teachers]
 
 @router.get("/{teacher_id}")
 async def get_teacher(
@@ -54,10 +64,7 @@ async def create_teacher(
 ):
     """Create a new teacher (admin only)"""
     try:
-        # Generate unique_id
-        last_teacher = db.query(Teacher).order_by(Teacher.id.desc()).first()
-        next_id = (last_teacher.id + 1) if last_teacher else 1
-        unique_id = f"Diamond-TCH-{next_id:03d}"
+        unique_id = UniqueIdGenerator.generate_teacher_id(db)
 
         teacher = Teacher(
             unique_id=unique_id,
@@ -144,6 +151,9 @@ async def clear_all_teachers(
     db.query(Teacher).delete()
 
     db.commit()
+
+    # Bulk deletes bypass the per-row invalidation hooks
+    principal_cache.clear()
     return {
         "message": f"Cleared all {teacher_count} teachers and {user_count} teacher user accounts from database",
         "deleted_teachers": teacher_count,
@@ -171,6 +181,7 @@ async def delete_multiple_teachers(
             if teacher:
                 # Delete attendance records
                 att_count = db.query(Attendance).filter(Attendance.teacher_id == teacher_id).count()
+                AttendanceRollupService.remove_matching(db, db.query(Attendance).filter(Attendance.teacher_id == teacher_id))
                 db.query(Attendance).filter(Attendance.teacher_id == teacher_id).delete(synchronize_session=False)
                 total_attendance += att_count
 
@@ -216,6 +227,7 @@ async def delete_teacher(
     try:
         # Delete all attendance records marked by this teacher
         attendance_count = db.query(Attendance).filter(Attendance.teacher_id == teacher_id).count()
+        AttendanceRollupService.remove_matching(db, db.query(Attendance).filter(Attendance.teacher_id == teacher_id))
         db.query(Attendance).filter(Attendance.teacher_id == teacher_id).delete(synchronize_session=False)
 
         # Delete all communications sent by this teacher
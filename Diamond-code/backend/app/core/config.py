@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,11 +18,56 @@ class Settings(BaseSettings):
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+    # Authenticated principal cache (see app/core/principal_cache.py), TTL 0 disables it
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "2048"))
+    PRINCIPAL_CACHE_USE_REDIS: bool = os.getenv("PRINCIPAL_CACHE_USE_REDIS", "false").lower() == "true"  # Share entries across workers via REDIS_URL
+
     # Twilio Configuration (for WhatsApp and SMS)
     TWILIO_ACCOUNT_SID: Optional[str] = os.getenv("TWILIO_ACCOUNT_SID")
     TWILIO_AUTH_TOKEN: Optional[str] = os.getenv("TWILIO_AUTH_TOKEN")
     TWILIO_WHATSAPP_NUMBER: Optional[str] = os.getenv("TWILIO_WHATSAPP_NUMBER")  # Format: whatsapp:+14155238886
     TWILIO_PHONE_NUMBER: Optional[str] = os.getenv("TWILIO_PHONE_NUMBER")  # For SMS fallback
+    TWILIO_HTTP_POOL_SIZE: int = int(os.getenv("TWILIO_HTTP_POOL_SIZE", "50"))  # Keep-alive connections shared by all Twilio calls
+    TWILIO_HTTP_TIMEOUT_SECONDS: float = float(os.getenv("TWILIO_HTTP_TIMEOUT_SECONDS", "15"))
+    WHATSAPP_SEND_CONCURRENCY: int = int(os.getenv("WHATSAPP_SEND_CONCURRENCY", "50"))  # Twilio calls in flight per mass send (account limit is 100 concurrent requests)
+
+    # Notification outbox worker (delivers push/WhatsApp jobs written by attendance approval)
+    NOTIFICATION_WORKER_ENABLED: bool = os.getenv("NOTIFICATION_WORKER_ENABLED", "true").lower() == "true"  # Run inside the API process
+    NOTIFICATION_WORKER_CONCURRENCY: int = int(os.getenv("NOTIFICATION_WORKER_CONCURRENCY", "10"))  # WhatsApp sends in flight per claimed batch
+    NOTIFICATION_POLL_INTERVAL_SECONDS: float = float(os.getenv("NOTIFICATION_POLL_INTERVAL_SECONDS", "5"))
+    NOTIFICATION_MAX_ATTEMPTS: int = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+    NOTIFICATION_RETRY_BASE_SECONDS: int = int(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "30"))
+
+    # Buffered activity logger
+    ACTIVITY_LOG_BATCH_SIZE: int = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", "200"))  # Flush when this many rows are queued
+    ACTIVITY_LOG_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL_SECONDS", "2"))
+    ACTIVITY_LOG_MAX_BUFFER: int = int(os.getenv("ACTIVITY_LOG_MAX_BUFFER", "10000"))  # Oldest rows dropped beyond this
+    ACTIVITY_ROUTINE_SINK: str = os.getenv("ACTIVITY_ROUTINE_SINK", "log")  # db, log or none - for login/update and other non-dashboard events
+    ACTIVITY_ROUTINE_SAMPLE_RATE: float = float(os.getenv("ACTIVITY_ROUTINE_SAMPLE_RATE", "1.0"))
+
+    # Password hashing (bcrypt) process pool; 0 hashes in a thread instead
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    # Bulk roster import
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))  # Rows validated, de-duplicated and inserted together
+    IMPORT_PARSE_WORKERS: int = int(os.getenv("IMPORT_PARSE_WORKERS", "2"))  # Parser processes; 0 parses in a thread instead
+    IMPORT_SPOOL_DIR: str = os.getenv("IMPORT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "diamond-imports"))  # Uploads waiting for the import worker
+    IMPORT_WORKER_ENABLED: bool = os.getenv("IMPORT_WORKER_ENABLED", "true").lower() == "true"  # Run import jobs inside the API process
+    IMPORT_JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("IMPORT_JOB_POLL_INTERVAL_SECONDS", "5"))
+    IMPORT_JOB_MAX_ATTEMPTS: int = int(os.getenv("IMPORT_JOB_MAX_ATTEMPTS", "3"))  # Failed jobs resume from their last committed chunk until then
+    IMPORT_JOB_RETRY_SECONDS: int = int(os.getenv("IMPORT_JOB_RETRY_SECONDS", "30"))
+    IMPORT_JOB_LEASE_SECONDS: int = int(os.getenv("IMPORT_JOB_LEASE_SECONDS", "600"))  # A running job idle this long belonged to a dead worker
+
+    # Analytics Parquet export (export_parquet.py)
+    PARQUET_EXPORT_DIR: str = os.getenv("PARQUET_EXPORT_DIR", "exports/parquet")  # One month-partitioned dataset per table
+    PARQUET_WATERMARK_OVERLAP_SECONDS: int = int(os.getenv("PARQUET_WATERMARK_OVERLAP_SECONDS", "600"))  # Re-check rows changed this long before the watermark
+
+    # Unread message counters (see app/services/unread_counter.py)
+    UNREAD_COUNTER_USE_REDIS: bool = os.getenv("UNREAD_COUNTER_USE_REDIS", "false").lower() == "true"  # Share counts across worker processes via REDIS_URL
+    UNREAD_COUNTER_RECONCILE_SECONDS: int = int(os.getenv("UNREAD_COUNTER_RECONCILE_SECONDS", "300"))  # Recount from SQL this often (Redis counters expire instead)
+    UNREAD_LONG_POLL_MAX_SECONDS: int = int(os.getenv("UNREAD_LONG_POLL_MAX_SECONDS", "60"))
+    UNREAD_LONG_POLL_CHECK_SECONDS: float = float(os.getenv("UNREAD_LONG_POLL_CHECK_SECONDS", "2"))  # Re-read while waiting, for changes made by other processes
 
     # Email Configuration
     SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
@@ -3,9 +3,11 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import verify_token
+from app.core.principal_cache import principal_cache
 from app.models.user import User, UserRole
 from app.models.teacher import Teacher
 from app.models.parent import Parent
+from app.utils.phone import normalize_phone
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -27,9 +29,12 @@ async def get_current_user(
     if unique_id is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.unique_id == unique_id).first()
+    user = principal_cache.get(db, "user", unique_id)
     if user is None:
-        raise credentials_exception
+        user = db.query(User).filter(User.unique_id == unique_id).first()
+        if user is None:
+            raise credentials_exception
+        principal_cache.put("user", unique_id, user)
 
     return user
 
@@ -82,38 +87,40 @@ async def get_current_mobile_user(
     # Check if this is a web user (has role field instead of type)
     if role is not None:
         # Web user authentication
-        user = db.query(User).filter(User.unique_id == sub).first()
-        if user:
-            return user
-        raise credentials_exception
+        user = principal_cache.get(db, "user", sub)
+        if user is None:
+            user = db.query(User).filter(User.unique_id == sub).first()
+            if user is None:
+                raise credentials_exception
+            principal_cache.put("user", sub, user)
+        return user
 
     # Mobile user authentication
     if user_type is None:
         raise credentials_exception
 
-    # Normalize phone number - check all variations like in auth_mobile.py
-    phone_without_prefix = sub.replace('+91', '') if sub.startswith('+91') else sub
-    phone_with_prefix = f"+91{phone_without_prefix}" if not sub.startswith('+91') else sub
+    # Tokens carry the phone as typed at login; match on the canonical E.164 form
+    phone_normalized = normalize_phone(sub)
+    if phone_normalized is None:
+        raise credentials_exception
 
     # Mobile user - teacher or parent
     if user_type == "teacher":
-        teacher = db.query(Teacher).filter(
-            (Teacher.phone == sub) | (Teacher.phone_number == sub) |
-            (Teacher.phone == phone_with_prefix) | (Teacher.phone_number == phone_with_prefix) |
-            (Teacher.phone == phone_without_prefix) | (Teacher.phone_number == phone_without_prefix)
-        ).first()
+        teacher = principal_cache.get(db, "teacher", phone_normalized)
         if teacher is None:
-            raise credentials_exception
+            teacher = db.query(Teacher).filter(Teacher.phone_matches(phone_normalized)).first()
+            if teacher is None:
+                raise credentials_exception
+            principal_cache.put("teacher", phone_normalized, teacher)
         return teacher
 
     elif user_type == "parent":
-        parent = db.query(Parent).filter(
-            (Parent.phone_number == sub) |
-            (Parent.phone_number == phone_with_prefix) |
-            (Parent.phone_number == phone_without_prefix)
-        ).first()
+        parent = principal_cache.get(db, "parent", phone_normalized)
         if parent is None:
-            raise credentials_exception
+            parent = db.query(Parent).filter(Parent.phone_normalized == phone_normalized).first()
+            if parent is None:
+                raise credentials_exception
+            principal_cache.put("parent", phone_normalized, parent)
         return parent
 
     raise credentials_exception
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""
+Principal Cache
+Caches the user / teacher / parent row behind a token subject so authenticated
+requests skip the lookup query. In-process LRU with a TTL, optionally backed
+by Redis so every worker process shares one warm cache.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Enum, event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.config import settings
+from app.core.database import redis_client
+from app.models.parent import Parent
+from app.models.teacher import Teacher
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# (principal type, subject) -> model; subject is unique_id for users, normalized phone otherwise
+PRINCIPAL_MODELS = {"user": User, "teacher": Teacher, "parent": Parent}
+
+# Never cached - loaded from the database on first access instead
+EXCLUDED_COLUMNS = {"hashed_password"}
+
+REDIS_KEY_PREFIX = "principal:"
+
+
+# Columns a principal can be cached under; a teacher logs in with either phone
+SUBJECT_COLUMNS = {
+    "user": ("unique_id",),
+    "teacher": ("phone_normalized", "phone_number_normalized"),
+    "parent": ("phone_normalized",),
+}
+
+
+class PrincipalCache:
+    """
+    LRU + TTL cache of principal column values
+
+    Entries hold plain column values, never ORM instances, so a cached
+    principal is rebuilt and attached to the caller's session with
+    merge(load=False) - no query, and changes made through it still flush.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, redis=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, db: Session, principal_type: str, subject: str):
+        """Return the cached principal attached to `db`, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        key = (principal_type, subject)
+        now = time.monotonic()
+        values = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                values = entry[1]
+                self.hits += 1
+            elif entry:
+                del self._entries[key]
+
+        if values is None and self.redis is not None:
+            values = self._redis_get(principal_type, subject)
+            if values is not None:
+                self.redis_hits += 1
+                self._store_local(key, values)
+
+        if values is None:
+            self.misses += 1
+            return None
+
+        model = PRINCIPAL_MODELS[principal_type]
+        instance = model(**values)
+        make_transient_to_detached(instance)
+        return db.merge(instance, load=False)
+
+    def put(self, principal_type: str, subject: str, instance):
+        if not self.enabled:
+            return
+        mapper = inspect(type(instance))
+        values = {
+            attr.key: getattr(instance, attr.key)
+            for attr in mapper.column_attrs
+            if attr.key not in EXCLUDED_COLUMNS
+        }
+        self._store_local((principal_type, subject), values)
+        if self.redis is not None:
+            self._redis_set(principal_type, subject, values)
+
+    def invalidate(self, principal_type: str, subject: Optional[str]):
+        if not subject:
+            return
+        with self._lock:
+            self._entries.pop((principal_type, subject), None)
+        self.invalidations += 1
+        if self.redis is not None:
+            try:
+                self.redis.delete(f"{REDIS_KEY_PREFIX}{principal_type}:{subject}")
+            except Exception as e:
+                logger.warning(f"⚠️ Principal cache Redis delete failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.invalidations += 1
+        if self.redis is not None:
+            try:
+                keys = list(self.redis.scan_iter(f"{REDIS_KEY_PREFIX}*"))
+                if keys:
+                    self.redis.delete(*keys)
+            except Exception as e:
+                logger.warning(f"⚠️ Principal cache Redis clear failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "redis": self.redis is not None,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _store_local(self, key: Tuple[str, str], values: Dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, principal_type: str, subject: str) -> Optional[Dict]:
+        try:
+            raw = self.redis.get(f"{REDIS_KEY_PREFIX}{principal_type}:{subject}")
+        except Exception as e:
+            logger.warning(f"⚠️ Principal cache Redis read failed: {str(e)}")
+            return None
+        if raw is None:
+            return None
+        return _decode(PRINCIPAL_MODELS[principal_type], json.loads(raw))
+
+    def _redis_set(self, principal_type: str, subject: str, values: Dict):
+        try:
+            self.redis.set(
+                f"{REDIS_KEY_PREFIX}{principal_type}:{subject}",
+                json.dumps(_encode(PRINCIPAL_MODELS[principal_type], values)),
+                ex=int(self.ttl_seconds)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Principal cache Redis write failed: {str(e)}")
+
+
+def _encode(model, values: Dict) -> Dict:
+    """Column values -> JSON-safe dict (datetimes as ISO strings, enums by name)"""
+    columns = inspect(model).columns
+    encoded = {}
+    for key, value in values.items():
+        if value is not None and isinstance(columns[key].type, Enum):
+            value = value.name
+        elif isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        encoded[key] = value
+    return encoded
+
+
+def _decode(model, values: Dict) -> Dict:
+    columns = inspect(model).columns
+    decoded = {}
+    for key, value in values.items():
+        if key not in columns:
+            continue
+        column_type = columns[key].type
+        if value is not None:
+            if isinstance(column_type, Enum) and column_type.enum_class is not None:
+                value = column_type.enum_class[value]
+            elif isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column_type, Date):
+                value = date.fromisoformat(value)
+        decoded[key] = value
+    return decoded
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    redis=redis_client if settings.PRINCIPAL_CACHE_USE_REDIS else None
+)
+
+
+# Invalidation: drop the old and new subject whenever a principal row changes or is deleted,
+# and again after commit so a request racing the transaction cannot re-cache the old row
+_PENDING_KEY = "principal_cache_invalidate"
+
+
+def _changed_subjects(principal_type: str, target):
+    state = inspect(target)
+    subjects = set()
+    for attr in SUBJECT_COLUMNS[principal_type]:
+        subjects.add(getattr(target, attr))
+        subjects.update(state.attrs[attr].history.deleted or ())
+    return {subject for subject in subjects if subject}
+
+
+def _register_invalidation(principal_type: str):
+    def handler(mapper, connection, target):
+        subjects = _changed_subjects(principal_type, target)
+        for subject in subjects:
+            principal_cache.invalidate(principal_type, subject)
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, set()).update(
+                (principal_type, subject) for subject in subjects
+            )
+    return handler
+
+
+for _principal_type, _model in PRINCIPAL_MODELS.items():
+    event.listen(_model, "after_update", _register_invalidation(_principal_type))
+    event.listen(_model, "after_delete", _register_invalidation(_principal_type))
+
+
+def invalidate_on_commit(session: Session, principal_type: str, subjects: Iterable[Optional[str]]):
+    """
+    Invalidate principals changed with Core UPDATE/DELETE, which skip the ORM hooks above
+
+    Drops them now and again once `session` commits, like the hooks do.
+    """
+    subjects = {subject for subject in subjects if subject}
+    for subject in subjects:
+        principal_cache.invalidate(principal_type, subject)
+    session.info.setdefault(_PENDING_KEY, set()).update((principal_type, subject) for subject in subjects)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.in_nested_transaction():
+        # A released SAVEPOINT; wait for the outer commit
+        return
+    for principal_type, subject in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(principal_type, subject)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_invalidations(session, previous_transaction):
+    if previous_transaction.nested:
+        # Rows changed before the SAVEPOINT are still pending; extra invalidations are harmless
+        return
+    session.info.pop(_PENDING_KEY, None)
@@ -1,11 +1,17 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import List, Optional, Union
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from .config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt costs ~250 ms of CPU per call, so it runs in worker processes instead of on the event loop
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -52,4 +58,56 @@ def verify_token(token: str) -> Optional[dict]:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+def get_hash_pool() -> Optional[ProcessPoolExecutor]:
+    """Lazily started bcrypt processes; None when PASSWORD_HASH_WORKERS is 0"""
+    global _hash_pool
+    if _hash_pool is None and settings.PASSWORD_HASH_WORKERS > 0:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=True, cancel_futures=True)
+        _hash_pool = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in the hashing pool, for request handlers"""
+    pool = get_hash_pool()
+    if pool is None:
+        return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+    return await asyncio.get_running_loop().run_in_executor(pool, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in the hashing pool, for request handlers"""
+    pool = get_hash_pool()
+    if pool is None:
+        return await asyncio.to_thread(get_password_hash, password)
+    return await asyncio.get_running_loop().run_in_executor(pool, get_password_hash, password)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in parallel across the pool's processes (blocking)
+
+    Work is submitted one pool-sized wave at a time, so a login submitted
+    during a large import queues behind at most one wave of hashes.
+    """
+    pool = get_hash_pool()
+    if pool is None:
+        return [get_password_hash(password) for password in passwords]
+
+    wave = settings.PASSWORD_HASH_WORKERS
+    hashed = []
+    for start in range(0, len(passwords), wave):
+        hashed.extend(pool.map(get_password_hash, passwords[start:start + wave]))
+    return hashed
@@ -2,14 +2,14 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from .core.config import settings
-from .core.database import engine, Base
+from .core.database import engine
+from .core.principal_cache import principal_cache
 from .api.v1 import api_router
 
 # Import all models so they are registered with SQLAlchemy Base
-from .models import user, student, teacher, attendance, communication, notice, activity_log
+from .models import user, student, teacher, attendance, communication, notice, activity_log, notification_job, attendance_rollup, id_counter, import_job
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Tables are created and migrated by migrate.py (run before uvicorn), not at import
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -29,10 +29,57 @@ async def startup_event():
     from .services.fcm_push_notification_service import FCMPushNotificationService
     FCMPushNotificationService.initialize()
 
+    # Start draining the notification outbox (disable when running run_notification_worker.py separately)
+    if settings.NOTIFICATION_WORKER_ENABLED:
+        from .services.notification_worker import notification_worker
+        notification_worker.start()
+        print("📬 Notification worker started")
+
+    # Process queued roster imports (disable when running run_import_worker.py separately)
+    if settings.IMPORT_WORKER_ENABLED:
+        from .services.import_job_worker import import_job_worker
+        import_job_worker.start()
+        print("📥 Import job worker started")
+
+    # Flush activity logs in batches instead of one commit per event
+    from .services.activity_logger import activity_logger
+    activity_logger.start()
+
+    # Periodically recount the in-process unread message counters
+    from .services.unread_counter import unread_counter
+    unread_counter.start()
+
     print("=" * 60)
     print("✅ Application startup complete")
     print("=" * 60)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Let in-flight notification jobs and import chunks finish, close the Twilio transport, drain queued activity logs and stop worker pools before the process exits"""
+    if settings.NOTIFICATION_WORKER_ENABLED:
+        from .services.notification_worker import notification_worker
+        await notification_worker.stop()
+
+    if settings.IMPORT_WORKER_ENABLED:
+        from .services.import_job_worker import import_job_worker
+        await import_job_worker.stop()
+
+    # After the workers, which may still be sending
+    from .services.whatsapp_service import whatsapp_service
+    await whatsapp_service.close()
+
+    from .services.activity_logger import activity_logger
+    await activity_logger.stop()
+
+    from .services.unread_counter import unread_counter
+    await unread_counter.stop()
+
+    from .services.roster_import import shutdown_parse_pool
+    shutdown_parse_pool()
+
+    from .core.security import shutdown_hash_pool
+    shutdown_hash_pool()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -40,6 +87,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # Keyset pagination cursor, inbox revalidation
 )
 
 # Include API routes
@@ -57,6 +105,23 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "Diamond Tutorial API"}
 
+@app.get("/health/cache")
+async def cache_stats():
+    """Principal cache hit/miss counters"""
+    return principal_cache.stats()
+
+@app.get("/health/activity-logger")
+async def activity_logger_stats():
+    """Activity log queue depth and flush counters"""
+    from .services.activity_logger import activity_logger
+    return activity_logger.stats()
+
+@app.get("/health/unread-counter")
+async def unread_counter_stats():
+    """Unread message counter hit/miss and reconcile counters"""
+    from .services.unread_counter import unread_counter
+    return unread_counter.stats()
+
 @app.post("/init-admin")
 async def init_admin():
     """Initialize admin user for first-time setup"""
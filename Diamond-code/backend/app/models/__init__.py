@@ -4,10 +4,14 @@ from .teacher import Teacher
 from .attendance import Attendance
 from .teacher_attendance import TeacherAttendance
 from .notice import Notice
-from .communication import Communication
+from .communication import Communication, MessageReceipt
 from .whatsapp_chat import WhatsAppChat
-from .activity_log import ActivityLog
+from .activity_log import ActivityLog, ActivityReadMark, ActivityView
 from .parent import Parent, OTP
+from .notification_job import NotificationJob
+from .attendance_rollup import AttendanceDailyRollup
+from .id_counter import IdCounter
+from .import_job import ImportJob
 
 __all__ = [
     "User",
@@ -17,8 +21,15 @@ __all__ = [
     "TeacherAttendance",
     "Notice",
     "Communication",
+    "MessageReceipt",
     "WhatsAppChat",
     "ActivityLog",
+    "ActivityReadMark",
+    "ActivityView",
     "Parent",
-    "OTP"
+    "OTP",
+    "NotificationJob",
+    "AttendanceDailyRollup",
+    "IdCounter",
+    "ImportJob"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,6 +6,10 @@ from app.core.database import Base
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Dashboard feed: important action types, newest first
+        Index("ix_activity_logs_action_created", "action_type", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Who performed the action
@@ -15,7 +19,6 @@ class ActivityLog(Base):
     entity_type = Column(String(50), nullable=True)  # e.g., 'student', 'teacher', 'attendance', 'notice'
     entity_id = Column(Integer, nullable=True)  # ID of the related entity
     meta_data = Column(Text, nullable=True)  # JSON string for additional data
-    viewed_by_user_ids = Column(Text, default='[]', nullable=False)  # JSON array of user IDs who have viewed this activity
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationship
@@ -23,3 +26,33 @@ class ActivityLog(Base):
 
     def __repr__(self):
         return f"<ActivityLog(id={self.id}, action={self.action_type}, user={self.user_name})>"
+
+
+class ActivityReadMark(Base):
+    """
+    Per-user high-water mark: every activity with id <= last_viewed_activity_id
+    counts as viewed by that user, so "mark all as viewed" is a single upsert
+    """
+    __tablename__ = "activity_read_marks"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_viewed_activity_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ActivityReadMark(user={self.user_id}, through={self.last_viewed_activity_id})>"
+
+
+class ActivityView(Base):
+    """Individual activities viewed above a user's high-water mark"""
+    __tablename__ = "activity_views"
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "activity_id", name="pk_activity_views"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    activity_id = Column(Integer, ForeignKey("activity_logs.id", ondelete="CASCADE"), nullable=False)
+    viewed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ActivityView(user={self.user_id}, activity={self.activity_id})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, Text, Enum
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, Text, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -12,6 +12,12 @@ class AttendanceStatus(enum.Enum):
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # One record per student per day - target of the bulk upsert in /attendance/mark
+        UniqueConstraint("student_id", "date", name="uq_attendance_student_date"),
+        # Pending-approval and history filters
+        Index("ix_attendance_date_approval", "date", "admin_approved", "submitted_for_approval"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
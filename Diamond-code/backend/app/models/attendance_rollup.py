@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Enum, UniqueConstraint
+from sqlalchemy.sql import func
+from ..core.database import Base
+from .attendance import AttendanceStatus
+
+class AttendanceDailyRollup(Base):
+    """
+    Attendance counts per class, day, status and approval state
+
+    Maintained incrementally by AttendanceRollupService whenever attendance is
+    marked, approved, notified or deleted, so statistics over a date range
+    read O(days x classes) rows instead of every attendance record.
+    """
+    __tablename__ = "attendance_daily_rollup"
+    __table_args__ = (
+        # Upsert target for count deltas
+        UniqueConstraint("date", "class_name", "status", "admin_approved", name="uq_attendance_rollup_cell"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, nullable=False)
+    class_name = Column(String(20), nullable=False, default="")  # "" for students without a class
+    status = Column(Enum(AttendanceStatus), nullable=False)
+    admin_approved = Column(Boolean, nullable=False, default=False)
+
+    record_count = Column(Integer, nullable=False, default=0)
+    whatsapp_sent_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<AttendanceDailyRollup(date={self.date}, class={self.class_name}, status={self.status}, approved={self.admin_approved}, count={self.record_count})>"
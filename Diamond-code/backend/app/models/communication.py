@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
@@ -11,7 +11,7 @@ class Communication(Base):
     student_id = Column(Integer, ForeignKey("students.id"))  # For individual student messages
 
     # In-app messaging
-    recipient_id = Column(Integer)  # Parent or Teacher ID for in-app messages
+    recipient_id = Column(Integer)  # Parent or Teacher ID for in-app messages (None for broadcasts)
     recipient_type = Column(String(20))  # "parent", "teacher"
 
     # Message content
@@ -52,4 +52,32 @@ class Communication(Base):
     student = relationship("Student", back_populates="communications")
 
     def __repr__(self):
-        return f"<Communication(sender_id={self.sender_id}, type={self.message_type}, sent={self.is_sent})>"
\ No newline at end of file
+        return f"<Communication(sender_id={self.sender_id}, type={self.message_type}, sent={self.is_sent})>"
+
+
+class MessageReceipt(Base):
+    """
+    One in-app message's delivery to one recipient
+
+    A broadcast is a single communications row plus a receipt per recipient,
+    so the subject and body are stored once. Direct messages get a receipt
+    too, and the inbox and unread count read through this table.
+    """
+    __tablename__ = "message_receipts"
+    __table_args__ = (
+        PrimaryKeyConstraint("message_id", "recipient_type", "recipient_id", name="pk_message_receipts"),
+        # Inbox (newest first) and unread-count lookups
+        Index("ix_message_receipts_inbox", "recipient_type", "recipient_id", "message_id"),
+        Index("ix_message_receipts_unread", "recipient_type", "recipient_id", "is_read"),
+    )
+
+    message_id = Column(Integer, ForeignKey("communications.id", ondelete="CASCADE"), nullable=False)
+    recipient_type = Column(String(20), nullable=False)  # "parent", "teacher"
+    recipient_id = Column(Integer, nullable=False)
+    is_read = Column(Boolean, nullable=False, default=False)
+    read_at = Column(DateTime(timezone=True))
+
+    message = relationship("Communication")
+
+    def __repr__(self):
+        return f"<MessageReceipt(message={self.message_id}, {self.recipient_type}={self.recipient_id}, read={self.is_read})>"
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class IdCounter(Base):
+    """
+    Last allocated number per ID series (student, teacher, admin, parent)
+
+    UniqueIdGenerator bumps last_value with a single UPDATE ... RETURNING, so
+    a block of IDs is reserved atomically even across worker processes.
+    """
+    __tablename__ = "id_counters"
+
+    name = Column(String(20), primary_key=True)
+    last_value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<IdCounter(name={self.name}, last_value={self.last_value})>"
@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum, Index
+from sqlalchemy.sql import func
+import enum
+from ..core.database import Base
+
+class ImportJobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ImportJob(Base):
+    """
+    Roster upload processed in the background by ImportJobWorker
+
+    Each chunk's rows and the progress counters below are committed in the
+    same transaction, so chunks_committed is exactly how far the file got and
+    a retried job picks up from the next chunk.
+    """
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        # Worker claim query: queued jobs that are due, oldest first
+        Index("ix_import_jobs_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False)  # students or teachers
+    mode = Column(String(10), default="append", nullable=False)  # append, or sync (see RosterSyncService)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)  # Spooled upload, removed once the job completes
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Progress, committed with every chunk
+    status = Column(Enum(ImportJobStatus), default=ImportJobStatus.QUEUED, nullable=False)
+    total_rows = Column(Integer)  # Known once the file is parsed
+    total_chunks = Column(Integer)
+    chunks_committed = Column(Integer, default=0, nullable=False)
+    rows_processed = Column(Integer, default=0, nullable=False)
+    imported_count = Column(Integer, default=0, nullable=False)
+    error_count = Column(Integer, default=0, nullable=False)
+    imported = Column(JSON, default=list, nullable=False)  # [{"name", "phone"}]
+    errors = Column(JSON, default=list, nullable=False)  # [{"row", "error"}]
+    sync_summary = Column(JSON)  # mode=sync: inserted/updated/reactivated/deactivated/unchanged counts
+
+    # Attempts
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True))  # Refreshed per chunk while a worker holds the job
+    last_error = Column(Text)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ImportJob(id={self.id}, kind={self.kind}, status={self.status}, chunks_committed={self.chunks_committed})>"
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum, Index
+from sqlalchemy.sql import func
+import enum
+from ..core.database import Base
+
+class NotificationChannel(enum.Enum):
+    PUSH = "push"
+    WHATSAPP = "whatsapp"
+
+class NotificationJobStatus(enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SENT = "sent"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # Nothing to deliver to (e.g. parent has no push token)
+
+class NotificationJob(Base):
+    """Outbox row for a parent notification, written in the same transaction as the approval"""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # Worker claim query: due pending jobs, oldest first
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(String(36), nullable=False, index=True)  # One per approval request, polled by the admin UI
+    channel = Column(Enum(NotificationChannel), nullable=False)
+    attendance_id = Column(Integer, ForeignKey("attendance.id", ondelete="CASCADE"), nullable=True)
+    payload = Column(JSON, nullable=False)  # student_name, parent_phone, status, date, ...
+
+    # Delivery state
+    status = Column(Enum(NotificationJobStatus), default=NotificationJobStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True))  # Set while a worker holds the job
+    last_error = Column(Text)
+    result = Column(String(100))  # e.g. FCM message ID or delivery outcome
+    sent_at = Column(DateTime(timezone=True))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<NotificationJob(id={self.id}, channel={self.channel}, status={self.status}, attempts={self.attempts})>"
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, event
 from sqlalchemy.sql import func
 from ..core.database import Base
+from ..utils.phone import normalize_phone
 
 
 class Parent(Base):
@@ -8,6 +9,7 @@ class Parent(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     phone_number = Column(String(15), unique=True, index=True, nullable=False)  # Primary identifier
+    phone_normalized = Column(String(16), index=True)  # E.164, kept in sync with phone_number
     name = Column(String(100))
     email = Column(String(100))
 
@@ -27,8 +29,18 @@ class Parent(Base):
         return f"<Parent(phone={self.phone_number}, name={self.name})>"
 
 
+@event.listens_for(Parent, "before_insert")
+@event.listens_for(Parent, "before_update")
+def _normalize_parent_phone(mapper, connection, target):
+    target.phone_normalized = normalize_phone(target.phone_number)
+
+
 class OTP(Base):
     __tablename__ = "otps"
+    __table_args__ = (
+        # Latest unexpired OTP for a phone
+        Index("ix_otps_phone_expires", "phone_number", "expires_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     phone_number = Column(String(15), index=True, nullable=False)
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
+from ..utils.phone import normalize_phone
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        # Class rosters of active students
+        Index("ix_students_class_active", "class_name", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     unique_id = Column(String(20), unique=True, index=True)  # Diamond-STU-001, Diamond-STU-002, etc.
@@ -19,6 +24,7 @@ class Student(Base):
     admission_date = Column(Date)
     parent_name = Column(String(100))
     parent_phone = Column(String(15))
+    parent_phone_normalized = Column(String(16), index=True)  # E.164, kept in sync with parent_phone
     parent_email = Column(String(100))
     address = Column(Text)
     emergency_contact = Column(String(15))
@@ -32,4 +38,10 @@ class Student(Base):
     communications = relationship("Communication", back_populates="student")
 
     def __repr__(self):
-        return f"<Student(unique_id={self.unique_id}, full_name={self.full_name}, class={self.class_name})>"
\ No newline at end of file
+        return f"<Student(unique_id={self.unique_id}, full_name={self.full_name}, class={self.class_name})>"
+
+
+@event.listens_for(Student, "before_insert")
+@event.listens_for(Student, "before_update")
+def _normalize_student_phone(mapper, connection, target):
+    target.parent_phone_normalized = normalize_phone(target.parent_phone)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, event, or_
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
+from ..utils.phone import normalize_phone
 
 class Teacher(Base):
     __tablename__ = "teachers"
@@ -14,6 +15,8 @@ class Teacher(Base):
     email = Column(String(100), unique=True)
     phone_number = Column(String(15), unique=True)
     phone = Column(String(15))  # Alias for mobile login compatibility
+    phone_normalized = Column(String(16), index=True)  # E.164 of phone (or phone_number), used for mobile login
+    phone_number_normalized = Column(String(16), index=True)  # E.164 of phone_number, so either column logs in
     subjects = Column(JSON)  # ["Mathematics", "Science"]
     classes_assigned = Column(JSON)  # ["Class 7A", "Class 8B"]
     qualification = Column(String(200))
@@ -35,5 +38,17 @@ class Teacher(Base):
     attendance_marked = relationship("Attendance", back_populates="teacher")
     attendance_records = relationship("TeacherAttendance", back_populates="teacher", cascade="all, delete-orphan")
 
+    @classmethod
+    def phone_matches(cls, phone_normalized: str):
+        """Filter for a normalized login phone against both phone columns"""
+        return or_(cls.phone_normalized == phone_normalized, cls.phone_number_normalized == phone_normalized)
+
     def __repr__(self):
-        return f"<Teacher(unique_id={self.unique_id}, full_name={self.full_name}, subjects={self.subjects})>"
\ No newline at end of file
+        return f"<Teacher(unique_id={self.unique_id}, full_name={self.full_name}, subjects={self.subjects})>"
+
+
+@event.listens_for(Teacher, "before_insert")
+@event.listens_for(Teacher, "before_update")
+def _normalize_teacher_phone(mapper, connection, target):
+    target.phone_normalized = normalize_phone(target.phone or target.phone_number)
+    target.phone_number_normalized = normalize_phone(target.phone_number)
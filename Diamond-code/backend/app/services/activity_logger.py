@@ -0,0 +1,188 @@
+"""
+Activity Logger
+Buffers activity log rows in memory and writes them in multi-row INSERTs,
+so request handlers no longer pay a commit + refresh per logged event
+"""
+import asyncio
+import json
+import logging
+import random
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.activity_log import ActivityLog
+from app.services.activity_service import IMPORTANT_ACTION_TYPES
+from app.utils.db import chunked
+
+logger = logging.getLogger(__name__)
+
+# Routine events (login, password change, ...) go here when ACTIVITY_ROUTINE_SINK=log
+routine_logger = logging.getLogger("app.activity.routine")
+
+# Rows per INSERT statement
+INSERT_CHUNK_SIZE = 500
+
+
+class ActivityLogger:
+    """
+    In-process activity queue flushed by size or time
+
+    Runs as a background task inside the API process (see app/main.py).
+    Important activities (the ones the dashboard shows) always reach the
+    activity_logs table and wake the flusher at once; routine activities are
+    sampled and sent to ACTIVITY_ROUTINE_SINK ("db", "log" or "none").
+    When the flusher is not running (scripts, one-off jobs) log() writes
+    synchronously instead, so nothing is lost.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_buffer: Optional[int] = None,
+        session_factory=SessionLocal
+    ):
+        self.batch_size = batch_size or settings.ACTIVITY_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.ACTIVITY_LOG_FLUSH_INTERVAL_SECONDS
+        self.max_buffer = max_buffer or settings.ACTIVITY_LOG_MAX_BUFFER
+        self.routine_sink = settings.ACTIVITY_ROUTINE_SINK
+        self.routine_sample_rate = settings.ACTIVITY_ROUTINE_SAMPLE_RATE
+        self.session_factory = session_factory
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def log(
+        self,
+        user_id: Optional[int],
+        user_name: str,
+        action_type: str,
+        description: str,
+        entity_type: str = None,
+        entity_id: int = None,
+        metadata: dict = None
+    ):
+        """Queue one activity; never blocks on the database while the flusher runs"""
+        important = action_type in IMPORTANT_ACTION_TYPES
+        if not important:
+            if self.routine_sink == "none" or random.random() >= self.routine_sample_rate:
+                return
+            if self.routine_sink == "log":
+                routine_logger.info(f"{action_type}: {description} (user={user_id})")
+                return
+
+        row = {
+            "user_id": user_id,
+            "user_name": user_name,
+            "action_type": action_type,
+            "description": description,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "meta_data": json.dumps(metadata) if metadata else None,
+            "created_at": datetime.utcnow()
+        }
+
+        if not self.running:
+            self._write([row])
+            return
+
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) > self.max_buffer:
+                self._buffer.popleft()
+                self.dropped += 1
+            full = len(self._buffer) >= self.batch_size
+        if important or full:
+            self._wake()
+
+    def start(self):
+        """Start flushing in the background on the running event loop"""
+        if not self.running:
+            self._stopping = False
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Flush everything still queued and stop"""
+        self._stopping = True
+        self._wake()
+        if self._task:
+            await self._task
+            self._task = None
+        # Anything queued after the last flush
+        await asyncio.to_thread(self.flush)
+
+    async def run(self):
+        logger.info(f"Activity logger started (batch={self.batch_size}, interval={self.flush_interval}s)")
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await asyncio.to_thread(self.flush)
+        logger.info("Activity logger stopped")
+
+    def flush(self) -> int:
+        """Write all queued rows, returns rows written"""
+        with self._lock:
+            rows = list(self._buffer)
+            self._buffer.clear()
+        if not rows:
+            return 0
+        if not self._write(rows):
+            # Keep them for the next flush, oldest first, within the buffer limit
+            with self._lock:
+                self._buffer.extendleft(reversed(rows))
+                while len(self._buffer) > self.max_buffer:
+                    self._buffer.popleft()
+                    self.dropped += 1
+            return 0
+        return len(rows)
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "queued": len(self._buffer),
+            "flushed": self.flushed,
+            "dropped": self.dropped
+        }
+
+    def _write(self, rows: List[Dict]) -> bool:
+        db = self.session_factory()
+        try:
+            for chunk in chunked(rows, INSERT_CHUNK_SIZE):
+                db.execute(ActivityLog.__table__.insert().values(chunk))
+            db.commit()
+            self.flushed += len(rows)
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Failed to write {len(rows)} activity log rows: {str(e)}")
+            return False
+        finally:
+            db.close()
+
+    def _wake(self):
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+
+
+activity_logger = ActivityLogger()
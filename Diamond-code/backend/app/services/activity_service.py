@@ -1,8 +1,23 @@
+from sqlalchemy import and_, case, exists, func, literal, select
 from sqlalchemy.orm import Session
-from app.models.activity_log import ActivityLog
+from app.models.activity_log import ActivityLog, ActivityReadMark, ActivityView
 from app.models.user import User
+from app.utils.db import dialect_insert
 from datetime import datetime
-import json
+
+# Activities shown on the dashboard - routine events like login, view, edit are excluded
+IMPORTANT_ACTION_TYPES = [
+    'attendance_marked',
+    'attendance_approved',
+    'attendance_rejected',
+    'teacher_attendance_marked',
+    'teacher_attendance_locked',
+    'message_sent',
+    'notice_published',
+    'communication_sent',
+    'student_imported',
+    'teacher_imported'
+]
 
 
 class ActivityService:
@@ -22,8 +37,12 @@ class ActivityService:
         """
         Log an activity in the system
 
+        The row is queued on the buffered activity logger and written in a
+        later multi-row INSERT, so this does not touch `db` (kept for callers).
+        Routine action types may be sampled or sent to the log instead.
+
         Args:
-            db: Database session
+            db: Database session (unused)
             user_id: ID of user performing action
             user_name: Name of user (cached for performance)
             action_type: Type of action (attendance_marked, message_sent, etc.)
@@ -32,60 +51,41 @@ class ActivityService:
             entity_id: ID of affected entity
             metadata: Additional data as dict (will be JSON stringified)
         """
-        activity = ActivityLog(
+        from app.services.activity_logger import activity_logger
+
+        activity_logger.log(
             user_id=user_id,
             user_name=user_name,
             action_type=action_type,
             description=description,
             entity_type=entity_type,
             entity_id=entity_id,
-            meta_data=json.dumps(metadata) if metadata else None,
-            created_at=datetime.utcnow()
+            metadata=metadata
         )
-        db.add(activity)
-        db.commit()
-        db.refresh(activity)
-        return activity
 
     @staticmethod
     def get_recent_activities(db: Session, limit: int = 10, user_id: int = None, unread_only: bool = False):
         """Get recent activities ordered by creation time (only important activities)"""
-        # Only show important activities - exclude routine events like login, view, edit
-        important_action_types = [
-            'attendance_marked',
-            'attendance_approved',
-            'attendance_rejected',
-            'teacher_attendance_marked',
-            'teacher_attendance_locked',
-            'message_sent',
-            'notice_published',
-            'communication_sent',
-            'student_imported',
-            'teacher_imported'
-        ]
-
-        query = db.query(ActivityLog).filter(
-            ActivityLog.action_type.in_(important_action_types)
+        if user_id:
+            unviewed = ActivityService._unviewed_by(user_id)
+            is_viewed = case((unviewed, False), else_=True).label("is_viewed")
+        else:
+            is_viewed = literal(False).label("is_viewed")
+
+        query = db.query(ActivityLog, is_viewed).filter(
+            ActivityLog.action_type.in_(IMPORTANT_ACTION_TYPES)
         )
 
         # Filter unread activities if requested
         if unread_only and user_id:
-            # Get activities where user_id is not in viewed_by_user_ids
-            all_activities = query.order_by(ActivityLog.created_at.desc()).all()
-            activities = []
-            for activity in all_activities:
-                viewed_by = json.loads(activity.viewed_by_user_ids or '[]')
-                if user_id not in viewed_by:
-                    activities.append(activity)
-                    if len(activities) >= limit:
-                        break
-        else:
-            activities = query.order_by(ActivityLog.created_at.desc()).limit(limit).all()
+            query = query.filter(unviewed)
+
+        rows = query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit).all()
 
         # Format activities with time ago
         result = []
         now = datetime.utcnow()
-        for activity in activities:
+        for activity, viewed in rows:
             time_diff = now - activity.created_at
 
             # Calculate time ago
@@ -101,10 +101,6 @@ class ActivityService:
                 days = int(time_diff.total_seconds() / 86400)
                 time_ago = f"{days} day{'s' if days > 1 else ''} ago"
 
-            # Check if viewed by current user
-            viewed_by = json.loads(activity.viewed_by_user_ids or '[]')
-            is_viewed = user_id in viewed_by if user_id else False
-
             result.append({
                 "id": activity.id,
                 "user_name": activity.user_name,
@@ -114,44 +110,87 @@ class ActivityService:
                 "entity_id": activity.entity_id,
                 "time_ago": time_ago,
                 "created_at": activity.created_at.isoformat(),
-                "is_viewed": is_viewed
+                "is_viewed": bool(viewed)
             })
 
         return result
 
+    @staticmethod
+    def get_unread_count(db: Session, user_id: int) -> int:
+        """Count important activities the user has not viewed, in one query"""
+        return db.query(func.count(ActivityLog.id)).filter(
+            ActivityLog.action_type.in_(IMPORTANT_ACTION_TYPES),
+            ActivityService._unviewed_by(user_id)
+        ).scalar() or 0
+
     @staticmethod
     def mark_activities_as_viewed(db: Session, user_id: int, activity_ids: list = None):
-        """Mark activities as viewed by a user"""
+        """
+        Mark activities as viewed by a user
+
+        With no ids, everything logged so far is marked by moving the user's
+        high-water mark; specific ids are recorded in activity_views.
+
+        Returns:
+            Number of activities that changed from unread to viewed
+        """
         try:
             if activity_ids:
-                # Mark specific activities
-                activities = db.query(ActivityLog).filter(ActivityLog.id.in_(activity_ids)).all()
+                views = ActivityView.__table__
+                stmt = dialect_insert(db, views).from_select(
+                    [views.c.user_id, views.c.activity_id, views.c.viewed_at],
+                    select(literal(user_id), ActivityLog.id, literal(datetime.utcnow())).where(
+                        ActivityLog.id.in_(activity_ids),
+                        ActivityService._unviewed_by(user_id)
+                    )
+                ).on_conflict_do_nothing()
+                count = db.execute(stmt).rowcount
             else:
-                # Mark all recent important activities
-                important_action_types = [
-                    'attendance_marked',
-                    'attendance_approved',
-                    'attendance_rejected',
-                    'teacher_attendance_marked',
-                    'teacher_attendance_locked',
-                    'message_sent',
-                    'notice_published',
-                    'communication_sent',
-                    'student_imported',
-                    'teacher_imported'
-                ]
-                activities = db.query(ActivityLog).filter(
-                    ActivityLog.action_type.in_(important_action_types)
-                ).order_by(ActivityLog.created_at.desc()).limit(50).all()
-
-            for activity in activities:
-                viewed_by = json.loads(activity.viewed_by_user_ids or '[]')
-                if user_id not in viewed_by:
-                    viewed_by.append(user_id)
-                    activity.viewed_by_user_ids = json.dumps(viewed_by)
+                count = ActivityService.get_unread_count(db, user_id)
+
+                marks = ActivityReadMark.__table__
+                latest_id = select(func.coalesce(func.max(ActivityLog.id), 0)).scalar_subquery()
+                stmt = dialect_insert(db, marks).values(
+                    user_id=user_id,
+                    last_viewed_activity_id=latest_id,
+                    updated_at=datetime.utcnow()
+                )
+                # Never move the mark backwards
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[marks.c.user_id],
+                    set_={
+                        "last_viewed_activity_id": case(
+                            (stmt.excluded.last_viewed_activity_id > marks.c.last_viewed_activity_id,
+                             stmt.excluded.last_viewed_activity_id),
+                            else_=marks.c.last_viewed_activity_id
+                        ),
+                        "updated_at": stmt.excluded.updated_at
+                    }
+                )
+                db.execute(stmt)
+
+                # Individual views at or below the mark are now redundant
+                db.query(ActivityView).filter(
+                    ActivityView.user_id == user_id,
+                    ActivityView.activity_id <= select(ActivityReadMark.last_viewed_activity_id).where(
+                        ActivityReadMark.user_id == user_id
+                    ).scalar_subquery()
+                ).delete(synchronize_session=False)
 
             db.commit()
-            return len(activities)
+            return count
         except Exception as e:
             db.rollback()
             raise e
+
+    @staticmethod
+    def _unviewed_by(user_id: int):
+        """SQL condition: the activity is above the user's mark and has no individual view"""
+        mark = select(ActivityReadMark.last_viewed_activity_id).where(
+            ActivityReadMark.user_id == user_id
+        ).scalar_subquery()
+        viewed = exists().where(
+            ActivityView.user_id == user_id,
+            ActivityView.activity_id == ActivityLog.id
+        )
+        return and_(ActivityLog.id > func.coalesce(mark, 0), ~viewed)
@@ -0,0 +1,194 @@
+"""
+Attendance Import
+Backfills historical attendance from a wide register (students x dates) as
+already-approved records: COPY on PostgreSQL, executemany on SQLite, with the
+daily rollup updated in the same transaction
+"""
+import asyncio
+import io
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+from fastapi import UploadFile
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.student import Student
+from app.services.attendance_rollup import AttendanceRollupService, RollupDelta
+from app.services.roster_import import RosterImportService, get_parse_pool
+from app.utils.db import chunked
+from app.utils.register_parser import parse_register
+
+# Rows per executemany batch on SQLite
+INSERT_CHUNK_SIZE = 5000
+STUDENT_LOOKUP_CHUNK_SIZE = 1000
+IMPORT_REMARKS = "Imported from register"
+
+
+class AttendanceImportService:
+    """Parse and bulk load historical attendance registers"""
+
+    @staticmethod
+    async def parse_upload(file: UploadFile) -> Dict:
+        """Spool the register and melt it in the parser pool, returns parse_register()'s columns"""
+        filename = file.filename or ""
+        RosterImportService.check_filename(filename)
+        path = await asyncio.to_thread(RosterImportService.spool, file)
+        try:
+            pool = get_parse_pool()
+            if pool is None:
+                return await asyncio.to_thread(parse_register, path, filename)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, parse_register, path, filename)
+        finally:
+            os.unlink(path)
+
+    @staticmethod
+    def load(db: Session, parsed: Dict, teacher_id: int, approved_by: Optional[int] = None) -> Dict:
+        """
+        Insert the register's records as approved attendance (does not commit)
+
+        Students are resolved by unique_id in one query per 1,000 IDs. Days a
+        student already has a record for are left untouched and counted as
+        skipped, so a register can be loaded again after fixing errors.
+
+        Returns:
+            Summary with inserted/skipped counts, unknown student IDs and row errors
+        """
+        marks = pd.DataFrame({
+            "unique_id": parsed["unique_ids"],
+            "date": parsed["dates_marked"],
+            "status": parsed["statuses"]
+        })
+        errors = list(parsed["errors"])
+
+        students = AttendanceImportService._students_by_unique_id(
+            db, marks["unique_id"].unique().tolist()
+        )
+        marks = marks.merge(students, on="unique_id", how="left")
+        unknown = sorted(marks.loc[marks["student_id"].isna(), "unique_id"].unique().tolist())
+        marks = marks[marks["student_id"].notna()].astype({"student_id": "int64"})
+
+        now = datetime.utcnow()
+        if marks.empty:
+            inserted = marks
+        elif db.get_bind().dialect.name == "postgresql":
+            inserted = AttendanceImportService._copy_postgresql(db, marks, teacher_id, approved_by, now)
+        else:
+            inserted = AttendanceImportService._executemany(db, marks, teacher_id, approved_by, now)
+
+        # Keep attendance_daily_rollup in step: one count = count + n per (date, class, status) cell
+        delta = RollupDelta()
+        if not inserted.empty:
+            counts = inserted.groupby(["date", "class_name", "status"], dropna=False).size()
+            for (day, class_name, status), count in counts.items():
+                delta.add(day, None if pd.isna(class_name) else class_name, AttendanceStatus(status), True, count=int(count))
+        AttendanceRollupService.apply(db, delta)
+
+        return {
+            "message": f"Imported {len(inserted)} attendance records",
+            "inserted": len(inserted),
+            "skipped_existing": len(marks) - len(inserted),
+            "students": parsed["students"],
+            "dates": parsed["dates"],
+            "unknown_students": unknown,
+            "errors": errors or None
+        }
+
+    @staticmethod
+    def _students_by_unique_id(db: Session, unique_ids: list) -> pd.DataFrame:
+        rows = []
+        for batch in chunked(unique_ids, STUDENT_LOOKUP_CHUNK_SIZE):
+            rows.extend(
+                db.query(Student.unique_id, Student.id, Student.class_name).filter(Student.unique_id.in_(batch)).all()
+            )
+        return pd.DataFrame(rows, columns=["unique_id", "student_id", "class_name"])
+
+    @staticmethod
+    def _executemany(db: Session, marks: pd.DataFrame, teacher_id: int, approved_by: Optional[int], now: datetime) -> pd.DataFrame:
+        """SQLite: drop days that already have a record, then one executemany per batch"""
+        existing = db.query(Attendance.student_id, Attendance.date).filter(
+            Attendance.student_id.in_(marks["student_id"].unique().tolist()),
+            Attendance.date.between(marks["date"].min(), marks["date"].max())
+        ).all()
+        if existing:
+            taken = pd.MultiIndex.from_tuples(existing, names=["student_id", "date"])
+            marks = marks[~pd.MultiIndex.from_frame(marks[["student_id", "date"]]).isin(taken)]
+
+        fixed = AttendanceImportService._approved_columns(teacher_id, approved_by, now)
+        rows = [
+            {"student_id": student_id, "date": day, "status": AttendanceStatus(status), **fixed}
+            for student_id, day, status in zip(marks["student_id"].tolist(), marks["date"].tolist(), marks["status"].tolist())
+        ]
+        for batch in chunked(rows, INSERT_CHUNK_SIZE):
+            db.execute(insert(Attendance.__table__), batch)
+        return marks
+
+    @staticmethod
+    def _copy_postgresql(db: Session, marks: pd.DataFrame, teacher_id: int, approved_by: Optional[int], now: datetime) -> pd.DataFrame:
+        """
+        PostgreSQL: COPY the rows into a temp table, then one INSERT ... SELECT
+
+        ON CONFLICT DO NOTHING skips days that already have a record (even one
+        marked concurrently), and RETURNING tells the rollup exactly which rows
+        went in.
+        """
+        buffer = io.StringIO()
+        marks[["student_id", "date", "status"]].assign(
+            status=marks["status"].map(lambda value: AttendanceStatus(value).name)
+        ).to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        cursor = db.connection().connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE attendance_register_import "
+                "(student_id integer, date date, status text) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                "COPY attendance_register_import (student_id, date, status) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+
+        fixed = AttendanceImportService._approved_columns(teacher_id, approved_by, now)
+        returned = db.execute(text(
+            """
+            INSERT INTO attendance (
+                student_id, teacher_id, date, status, remarks, is_draft, submitted_for_approval,
+                submitted_at, admin_approved, approved_by, approved_at, whatsapp_sent, marked_at
+            )
+            SELECT student_id, :teacher_id, date, CAST(status AS attendancestatus), :remarks, :is_draft,
+                   :submitted_for_approval, :submitted_at, :admin_approved, :approved_by, :approved_at,
+                   :whatsapp_sent, :marked_at
+            FROM attendance_register_import
+            ON CONFLICT (student_id, date) DO NOTHING
+            RETURNING student_id, date, status
+            """
+        ), fixed).all()
+        db.execute(text("DROP TABLE attendance_register_import"))
+
+        inserted = pd.DataFrame(returned, columns=["student_id", "date", "status"])
+        inserted["status"] = inserted["status"].map(lambda name: AttendanceStatus[name].value)
+        class_names = marks.drop_duplicates("student_id").set_index("student_id")["class_name"]
+        inserted["class_name"] = inserted["student_id"].map(class_names)
+        return inserted
+
+    @staticmethod
+    def _approved_columns(teacher_id: int, approved_by: Optional[int], now: datetime) -> Dict:
+        """Workflow columns of a record that was marked, submitted and approved at import time"""
+        return {
+            "teacher_id": teacher_id,
+            "remarks": IMPORT_REMARKS,
+            "is_draft": False,
+            "submitted_for_approval": True,
+            "submitted_at": now,
+            "admin_approved": True,
+            "approved_by": approved_by,
+            "approved_at": now,
+            "whatsapp_sent": False,  # History - parents are not notified
+            "marked_at": now
+        }
@@ -0,0 +1,210 @@
+"""
+Attendance Rollup
+Keeps attendance_daily_rollup in step with the attendance table and answers
+statistics queries from it with one GROUP BY
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.models.student import Student
+from app.utils.db import dialect_insert, chunked
+
+# Rollup rows per multi-row upsert
+ROLLUP_CHUNK_SIZE = 500
+
+
+class RollupDelta:
+    """Accumulates count changes per (date, class, status, approved) cell before one upsert"""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[date, str, AttendanceStatus, bool], List[int]] = defaultdict(lambda: [0, 0])
+
+    def add(self, day: date, class_name: Optional[str], status: AttendanceStatus, approved: bool,
+            count: int = 1, whatsapp_sent: int = 0):
+        cell = self.cells[(day, class_name or "", status, bool(approved))]
+        cell[0] += count
+        cell[1] += whatsapp_sent
+
+    def move(self, day: date, class_name: Optional[str], old: Tuple[AttendanceStatus, bool],
+             new: Tuple[AttendanceStatus, bool], whatsapp_sent: bool = False):
+        """One record changed status and/or approval"""
+        if old == new:
+            return
+        self.add(day, class_name, *old, count=-1, whatsapp_sent=-int(bool(whatsapp_sent)))
+        self.add(day, class_name, *new, count=1, whatsapp_sent=int(bool(whatsapp_sent)))
+
+
+class AttendanceRollupService:
+    """Incremental maintenance and aggregate reads for attendance_daily_rollup"""
+
+    @staticmethod
+    def apply(db: Session, delta: RollupDelta):
+        """
+        Add a delta to the rollup with count = count + n upserts
+
+        Does not commit - call inside the transaction that changes attendance.
+        """
+        rows = [
+            {
+                "date": day,
+                "class_name": class_name,
+                "status": status,
+                "admin_approved": approved,
+                "record_count": count,
+                "whatsapp_sent_count": whatsapp_sent
+            }
+            for (day, class_name, status, approved), (count, whatsapp_sent) in delta.cells.items()
+            if count or whatsapp_sent
+        ]
+        if not rows:
+            return
+
+        table = AttendanceDailyRollup.__table__
+        for chunk in chunked(rows, ROLLUP_CHUNK_SIZE):
+            stmt = dialect_insert(db, table).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.date, table.c.class_name, table.c.status, table.c.admin_approved],
+                set_={
+                    "record_count": table.c.record_count + stmt.excluded.record_count,
+                    "whatsapp_sent_count": table.c.whatsapp_sent_count + stmt.excluded.whatsapp_sent_count,
+                    "updated_at": func.now()
+                }
+            )
+            db.execute(stmt)
+
+    @staticmethod
+    def record_approved(db: Session, records: Iterable[Attendance], class_names: Dict[int, Optional[str]]):
+        """Move newly approved records from the pending to the approved cells"""
+        delta = RollupDelta()
+        for record in records:
+            delta.move(
+                record.date, class_names.get(record.student_id),
+                old=(record.status, False), new=(record.status, True),
+                whatsapp_sent=record.whatsapp_sent
+            )
+        AttendanceRollupService.apply(db, delta)
+
+    @staticmethod
+    def record_whatsapp_sent(db: Session, record: Attendance, class_name: Optional[str]):
+        delta = RollupDelta()
+        delta.add(record.date, class_name, record.status, record.admin_approved, count=0, whatsapp_sent=1)
+        AttendanceRollupService.apply(db, delta)
+
+    @staticmethod
+    def remove_matching(db: Session, attendance_query):
+        """
+        Subtract the records an attendance query matches, before they are bulk deleted
+
+        e.g. remove_matching(db, db.query(Attendance).filter(Attendance.student_id == 5))
+        """
+        ids = attendance_query.with_entities(Attendance.id).subquery()
+        delta = RollupDelta()
+        for row in AttendanceRollupService._aggregate_records(db).filter(Attendance.id.in_(select(ids.c.id))):
+            delta.add(row.date, row.class_name, row.status, row.admin_approved,
+                      count=-row.record_count, whatsapp_sent=-row.whatsapp_sent_count)
+        AttendanceRollupService.apply(db, delta)
+
+    @staticmethod
+    def clear(db: Session):
+        db.query(AttendanceDailyRollup).delete(synchronize_session=False)
+
+    @staticmethod
+    def rebuild(db: Session, start_date: date = None, end_date: date = None) -> int:
+        """
+        Recompute rollup rows from the attendance table, for repair after manual edits
+
+        Returns:
+            Number of rollup cells written
+        """
+        rollup_query = db.query(AttendanceDailyRollup)
+        records_query = AttendanceRollupService._aggregate_records(db)
+        if start_date:
+            rollup_query = rollup_query.filter(AttendanceDailyRollup.date >= start_date)
+            records_query = records_query.filter(Attendance.date >= start_date)
+        if end_date:
+            rollup_query = rollup_query.filter(AttendanceDailyRollup.date <= end_date)
+            records_query = records_query.filter(Attendance.date <= end_date)
+
+        rollup_query.delete(synchronize_session=False)
+        delta = RollupDelta()
+        for row in records_query:
+            delta.add(row.date, row.class_name, row.status, row.admin_approved,
+                      count=row.record_count, whatsapp_sent=row.whatsapp_sent_count)
+        AttendanceRollupService.apply(db, delta)
+        return len(delta.cells)
+
+    @staticmethod
+    def _aggregate_records(db: Session):
+        """GROUP BY over the attendance table itself, shaped like a rollup row"""
+        class_name = func.coalesce(Student.class_name, "")
+        approved = func.coalesce(Attendance.admin_approved, False)
+        return db.query(
+            Attendance.date,
+            class_name.label("class_name"),
+            Attendance.status,
+            approved.label("admin_approved"),
+            func.count(Attendance.id).label("record_count"),
+            func.sum(case((Attendance.whatsapp_sent == True, 1), else_=0)).label("whatsapp_sent_count")
+        ).join(
+            Student, Attendance.student_id == Student.id
+        ).group_by(Attendance.date, class_name, Attendance.status, approved)
+
+    @staticmethod
+    def aggregate(
+        db: Session,
+        start_date: date = None,
+        end_date: date = None,
+        class_name: str = None
+    ) -> List:
+        """
+        Rollup counts grouped by date, status and approval state
+
+        Returns:
+            Rows with date, status, admin_approved, record_count, whatsapp_sent_count
+        """
+        query = db.query(
+            AttendanceDailyRollup.date,
+            AttendanceDailyRollup.status,
+            AttendanceDailyRollup.admin_approved,
+            func.sum(AttendanceDailyRollup.record_count).label("record_count"),
+            func.sum(AttendanceDailyRollup.whatsapp_sent_count).label("whatsapp_sent_count")
+        )
+        if start_date:
+            query = query.filter(AttendanceDailyRollup.date >= start_date)
+        if end_date:
+            query = query.filter(AttendanceDailyRollup.date <= end_date)
+        if class_name:
+            query = query.filter(AttendanceDailyRollup.class_name == class_name)
+
+        return query.group_by(
+            AttendanceDailyRollup.date,
+            AttendanceDailyRollup.status,
+            AttendanceDailyRollup.admin_approved
+        ).order_by(AttendanceDailyRollup.date).all()
+
+    @staticmethod
+    def summarize(rows: List) -> Dict:
+        """Fold aggregate() rows into totals and per-status counts"""
+        summary = {
+            "total_records": 0,
+            "approved_records": 0,
+            "pending_approval": 0,
+            "whatsapp_sent": 0,
+            "status_counts": {status.value: 0 for status in AttendanceStatus},
+            "approved_status_counts": {status.value: 0 for status in AttendanceStatus}
+        }
+        for row in rows:
+            count = int(row.record_count or 0)
+            summary["total_records"] += count
+            summary["whatsapp_sent"] += int(row.whatsapp_sent_count or 0)
+            summary["status_counts"][row.status.value] += count
+            if row.admin_approved:
+                summary["approved_records"] += count
+                summary["approved_status_counts"][row.status.value] += count
+            else:
+                summary["pending_approval"] += count
+        return summary
@@ -1,14 +1,137 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, func
 from datetime import datetime, date
 from app.models.attendance import Attendance
 from app.models.student import Student
 from app.models.user import User
-from app.services.whatsapp_service import WhatsAppService
+from app.services.attendance_rollup import AttendanceRollupService, RollupDelta
+from app.services.whatsapp_service import whatsapp_service
+from app.utils.db import dialect_insert, chunked
+
+# Rows per multi-row INSERT ... ON CONFLICT statement (keeps bind params well under driver limits)
+UPSERT_CHUNK_SIZE = 500
+
+
+class AttendanceMarkingService:
+    """Set-based marking for POST /attendance/mark"""
+
+    @staticmethod
+    def get_students_by_id(db: Session, student_ids: List[int]) -> Dict[int, Tuple[str, str]]:
+        """Validate a batch of student IDs with one IN query, returns {id: (full_name, class_name)}"""
+        if not student_ids:
+            return {}
+        rows = db.query(Student.id, Student.full_name, Student.class_name).filter(Student.id.in_(student_ids)).all()
+        return {row.id: (row.full_name, row.class_name) for row in rows}
+
+    @staticmethod
+    def upsert_batch(
+        db: Session,
+        teacher_id: int,
+        attendance_date: date,
+        records: Dict[int, Dict],
+        is_draft: bool,
+        class_names: Dict[int, str] = None
+    ) -> List[int]:
+        """
+        Insert or update attendance for a whole batch in one transaction
+
+        Uses INSERT ... ON CONFLICT (student_id, date) DO UPDATE, guarded so that
+        records already submitted for approval are left untouched. The caller
+        commits.
+
+        Args:
+            db: Database session
+            teacher_id: Teacher marking the attendance
+            attendance_date: Date being marked
+            records: {student_id: {"status": AttendanceStatus, "remarks": str}}
+            is_draft: Save as draft instead of submitting for approval
+            class_names: {student_id: class_name} for the daily rollup
+
+        Returns:
+            Student IDs whose attendance was written; the rest were skipped
+            because they had already been submitted
+        """
+        now = datetime.now()
+        table = Attendance.__table__
+
+        # Current state of rows this batch may overwrite, to move their rollup counts. On
+        # PostgreSQL the students' rows are locked (in id order, so overlapping batches
+        # cannot deadlock) until commit: a concurrent submit for the same students waits
+        # and then sees this batch's rows, instead of both counting them as new
+        existing = {}
+        if records:
+            query = db.query(
+                Student.id.label("student_id"), Attendance.id,
+                Attendance.status, Attendance.admin_approved, Attendance.whatsapp_sent
+            ).outerjoin(
+                Attendance, and_(Attendance.student_id == Student.id, Attendance.date == attendance_date)
+            ).filter(
+                Student.id.in_(list(records.keys()))
+            ).order_by(Student.id)
+            if db.get_bind().dialect.name == "postgresql":
+                query = query.with_for_update(of=Student)
+            existing = {row.student_id: row for row in query if row.id is not None}
+
+        values = [
+            {
+                "student_id": student_id,
+                "teacher_id": teacher_id,
+                "date": attendance_date,
+                "status": record["status"],
+                "remarks": record.get("remarks", ""),
+                "is_draft": is_draft,
+                "submitted_for_approval": not is_draft,
+                "submitted_at": now if not is_draft else None,
+                "admin_approved": False
+            }
+            for student_id, record in records.items()
+        ]
+
+        written_ids = []
+        for chunk in chunked(values, UPSERT_CHUNK_SIZE):
+            stmt = dialect_insert(db, table).values(chunk)
+            update_set = {
+                "status": stmt.excluded.status,
+                "remarks": stmt.excluded.remarks,
+                "teacher_id": stmt.excluded.teacher_id,
+                "is_draft": stmt.excluded.is_draft,
+                "updated_at": func.now()
+            }
+            if not is_draft:
+                update_set["submitted_for_approval"] = True
+                update_set["submitted_at"] = stmt.excluded.submitted_at
+
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.student_id, table.c.date],
+                set_=update_set,
+                where=table.c.submitted_for_approval.isnot(True)
+            ).returning(table.c.student_id)
+
+            written_ids.extend(row[0] for row in db.execute(stmt))
+
+        class_names = class_names or {}
+        delta = RollupDelta()
+        for student_id in written_ids:
+            new_status = records[student_id]["status"]
+            previous = existing.get(student_id)
+            if previous is None:
+                delta.add(attendance_date, class_names.get(student_id), new_status, False)
+            else:
+                approved = bool(previous.admin_approved)
+                delta.move(
+                    attendance_date, class_names.get(student_id),
+                    old=(previous.status, approved), new=(new_status, approved),
+                    whatsapp_sent=previous.whatsapp_sent
+                )
+        AttendanceRollupService.apply(db, delta)
+
+        return written_ids
+
 
 class AttendanceApprovalService:
     def __init__(self):
-        self.whatsapp_service = WhatsAppService()
+        self.whatsapp_service = whatsapp_service
 
     async def get_pending_attendance_for_approval(
         self,
@@ -58,6 +181,7 @@ class AttendanceApprovalService:
     ) -> Dict[str, int]:
         """Approve multiple attendance records and send WhatsApp messages"""
         results = {"approved": 0, "whatsapp_sent": 0, "whatsapp_failed": 0, "errors": 0}
+        to_notify: List[Tuple[Attendance, Student]] = []
 
         for attendance_id in attendance_ids:
             try:
@@ -68,32 +192,36 @@ class AttendanceApprovalService:
                     continue
 
                 # Approve attendance
+                student = db.query(Student).filter(Student.id == attendance.student_id).first()
+                if not attendance.admin_approved:
+                    AttendanceRollupService.record_approved(
+                        db, [attendance], {attendance.student_id: student.class_name if student else None}
+                    )
                 attendance.admin_approved = True
                 attendance.approved_by = approved_by_user_id
                 attendance.approved_at = datetime.utcnow()
                 results["approved"] += 1
 
-                # Send WhatsApp message if enabled
-                if send_whatsapp:
-                    student = db.query(Student).filter(Student.id == attendance.student_id).first()
-                    if student and student.parent_phone:
-                        whatsapp_sent = await self.whatsapp_service.send_individual_attendance_message(
-                            attendance_record=attendance,
-                            student=student,
-                            db=db
-                        )
-
-                        if whatsapp_sent:
-                            attendance.whatsapp_sent = True
-                            attendance.whatsapp_sent_at = datetime.utcnow()
-                            results["whatsapp_sent"] += 1
-                        else:
-                            results["whatsapp_failed"] += 1
+                if send_whatsapp and student and student.parent_phone:
+                    to_notify.append((attendance, student))
 
             except Exception as e:
                 print(f"Error approving attendance {attendance_id}: {str(e)}")
                 results["errors"] += 1
 
+        # Send WhatsApp messages for the whole batch (chats created in one pass, counters bumped in bulk)
+        if to_notify:
+            sent = await self.whatsapp_service.send_attendance_messages(to_notify, db)
+            for attendance, student in to_notify:
+                if sent[attendance.id]:
+                    if not attendance.whatsapp_sent:
+                        AttendanceRollupService.record_whatsapp_sent(db, attendance, student.class_name)
+                    attendance.whatsapp_sent = True
+                    attendance.whatsapp_sent_at = datetime.utcnow()
+                    results["whatsapp_sent"] += 1
+                else:
+                    results["whatsapp_failed"] += 1
+
         db.commit()
         return results
 
@@ -139,25 +267,21 @@ class AttendanceApprovalService:
         start_date: date = None,
         end_date: date = None
     ) -> Dict:
-        """Get attendance statistics for admin dashboard"""
-        query = db.query(Attendance)
-
-        if start_date:
-            query = query.filter(Attendance.date >= start_date)
-        if end_date:
-            query = query.filter(Attendance.date <= end_date)
-
-        all_records = query.all()
+        """Get attendance statistics for admin dashboard, from the daily rollup"""
+        summary = AttendanceRollupService.summarize(
+            AttendanceRollupService.aggregate(db, start_date=start_date, end_date=end_date)
+        )
+        status_counts = summary["status_counts"]
 
         stats = {
-            "total_records": len(all_records),
-            "approved_records": len([r for r in all_records if r.admin_approved]),
-            "pending_approval": len([r for r in all_records if not r.admin_approved]),
-            "whatsapp_sent": len([r for r in all_records if r.whatsapp_sent]),
-            "present_count": len([r for r in all_records if r.status.value == "present"]),
-            "absent_count": len([r for r in all_records if r.status.value == "absent"]),
-            "late_count": len([r for r in all_records if r.status.value == "late"]),
-            "leave_count": len([r for r in all_records if r.status.value == "leave"])
+            "total_records": summary["total_records"],
+            "approved_records": summary["approved_records"],
+            "pending_approval": summary["pending_approval"],
+            "whatsapp_sent": summary["whatsapp_sent"],
+            "present_count": status_counts["present"],
+            "absent_count": status_counts["absent"],
+            "late_count": status_counts["late"],
+            "leave_count": status_counts["leave"]
         }
 
         # Calculate attendance percentage
@@ -168,4 +292,4 @@ class AttendanceApprovalService:
         else:
             stats["attendance_percentage"] = 0
 
-        return stats
\ No newline at end of file
+        return stats
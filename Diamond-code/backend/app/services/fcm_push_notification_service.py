@@ -7,6 +7,10 @@ from firebase_admin import credentials, messaging
 from typing import List, Dict, Optional
 import os
 import json
+from app.utils.db import chunked
+
+# send_each accepts at most 500 messages per call
+FCM_BATCH_SIZE = 500
 
 
 class FCMPushNotificationService:
@@ -89,37 +93,7 @@ class FCMPushNotificationService:
             return {"status": "error", "message": "No FCM token"}
 
         try:
-            # Build the message
-            message = messaging.Message(
-                notification=messaging.Notification(
-                    title=title,
-                    body=body,
-                ),
-                data=data or {},
-                android=messaging.AndroidConfig(
-                    priority='high',
-                    notification=messaging.AndroidNotification(
-                        channel_id='default',
-                        sound='default',
-                        priority='high',
-                        default_vibrate_timings=True,
-                        default_light_settings=True,
-                    ),
-                ),
-                apns=messaging.APNSConfig(
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            alert=messaging.ApsAlert(
-                                title=title,
-                                body=body,
-                            ),
-                            sound='default',
-                            badge=1,
-                        ),
-                    ),
-                ),
-                token=fcm_token,
-            )
+            message = FCMPushNotificationService.build_message(fcm_token, title, body, data)
 
             # Send the message
             response = messaging.send(message)
@@ -141,12 +115,51 @@ class FCMPushNotificationService:
             print(f"❌ FCM notification error: {str(e)}")
             return {"status": "error", "message": str(e)}
 
+    @staticmethod
+    def build_message(
+        fcm_token: str,
+        title: str,
+        body: str,
+        data: Optional[Dict] = None
+    ) -> messaging.Message:
+        """Build an FCM message with the app's Android and APNs settings"""
+        return messaging.Message(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+            ),
+            data=data or {},
+            android=messaging.AndroidConfig(
+                priority='high',
+                notification=messaging.AndroidNotification(
+                    channel_id='default',
+                    sound='default',
+                    priority='high',
+                    default_vibrate_timings=True,
+                    default_light_settings=True,
+                ),
+            ),
+            apns=messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        alert=messaging.ApsAlert(
+                            title=title,
+                            body=body,
+                        ),
+                        sound='default',
+                        badge=1,
+                    ),
+                ),
+            ),
+            token=fcm_token,
+        )
+
     @staticmethod
     def send_bulk_notifications(
         notifications: List[Dict]
     ) -> Dict:
         """
-        Send multiple push notifications using FCM v1 batch API
+        Send multiple push notifications using FCM v1 send_each, in chunks of FCM_BATCH_SIZE
 
         Args:
             notifications: List of notification dicts with keys:
@@ -156,7 +169,9 @@ class FCMPushNotificationService:
                 - data: Optional data payload
 
         Returns:
-            Summary of sent notifications
+            Summary of sent notifications. "responses" has one entry per input
+            notification, in the same order, so callers can map results back
+            to the parent or record each one was for.
         """
         # Initialize if not already done
         FCMPushNotificationService.initialize()
@@ -167,63 +182,47 @@ class FCMPushNotificationService:
         if not notifications:
             return {"status": "error", "message": "No notifications to send"}
 
-        try:
-            messages = []
-
-            for notif in notifications:
-                fcm_token = notif.get("fcm_token")
-                if not fcm_token:
-                    continue
-
-                message = messaging.Message(
-                    notification=messaging.Notification(
-                        title=notif.get("title"),
-                        body=notif.get("body"),
-                    ),
-                    data=notif.get("data", {}),
-                    android=messaging.AndroidConfig(
-                        priority='high',
-                        notification=messaging.AndroidNotification(
-                            channel_id='default',
-                            sound='default',
-                            priority='high',
-                            default_vibrate_timings=True,
-                            default_light_settings=True,
-                        ),
-                    ),
-                    token=fcm_token,
-                )
-
-                messages.append(message)
-
-            if not messages:
-                return {"status": "error", "message": "No valid FCM tokens"}
-
-            # Send all messages in batch
-            response = messaging.send_each(messages)
-
-            success_count = response.success_count
-            error_count = response.failure_count
-
-            print(f"✅ Sent {success_count} FCM notifications, {error_count} failed")
-
-            return {
-                "status": "success",
-                "sent": success_count,
-                "failed": error_count,
-                "responses": [
-                    {
+        responses: List[Optional[Dict]] = [None] * len(notifications)
+        pending = []
+
+        for index, notif in enumerate(notifications):
+            fcm_token = notif.get("fcm_token")
+            if not fcm_token:
+                responses[index] = {"success": False, "message_id": None, "error": "No FCM token", "unregistered": False}
+                continue
+            pending.append((index, FCMPushNotificationService.build_message(
+                fcm_token, notif.get("title"), notif.get("body"), notif.get("data")
+            )))
+
+        if not pending:
+            return {"status": "error", "message": "No valid FCM tokens"}
+
+        for chunk in chunked(pending, FCM_BATCH_SIZE):
+            try:
+                response = messaging.send_each([message for _, message in chunk])
+                for (index, _), r in zip(chunk, response.responses):
+                    responses[index] = {
                         "success": r.success,
                         "message_id": r.message_id if r.success else None,
-                        "error": str(r.exception) if not r.success else None
+                        "error": str(r.exception) if not r.success else None,
+                        "unregistered": isinstance(r.exception, messaging.UnregisteredError)
                     }
-                    for r in response.responses
-                ]
-            }
+            except Exception as e:
+                print(f"❌ FCM bulk notification error: {str(e)}")
+                for index, _ in chunk:
+                    responses[index] = {"success": False, "message_id": None, "error": str(e), "unregistered": False}
 
-        except Exception as e:
-            print(f"❌ FCM bulk notification error: {str(e)}")
-            return {"status": "error", "message": str(e)}
+        success_count = len([r for r in responses if r["success"]])
+        error_count = len(responses) - success_count
+
+        print(f"✅ Sent {success_count} FCM notifications, {error_count} failed")
+
+        return {
+            "status": "success",
+            "sent": success_count,
+            "failed": error_count,
+            "responses": responses
+        }
 
     @staticmethod
     async def send_message_notification(
@@ -235,14 +234,21 @@ class FCMPushNotificationService:
         """Send notification for a new message"""
         return FCMPushNotificationService.send_notification(
             fcm_token=fcm_token,
-            title=f"New message from {sender_name}",
-            body=message_preview,
-            data={
+            **FCMPushNotificationService.message_notification_content(sender_name, message_preview, message_id)
+        )
+
+    @staticmethod
+    def message_notification_content(sender_name: str, message_preview: str, message_id: int) -> Dict:
+        """Title, body and data payload for a new in-app message"""
+        return {
+            "title": f"New message from {sender_name}",
+            "body": message_preview,
+            "data": {
                 "type": "message",
                 "messageId": str(message_id),
                 "action": "open_messages"
             }
-        )
+        }
 
     @staticmethod
     async def send_attendance_notification(
@@ -252,18 +258,25 @@ class FCMPushNotificationService:
         date: str
     ):
         """Send notification for attendance update"""
-        status_emoji = "✅" if status.lower() == "present" else "❌"
         return FCMPushNotificationService.send_notification(
             fcm_token=fcm_token,
-            title=f"{status_emoji} Attendance Update",
-            body=f"{student_name} marked {status} on {date}",
-            data={
+            **FCMPushNotificationService.attendance_notification_content(student_name, status, date)
+        )
+
+    @staticmethod
+    def attendance_notification_content(student_name: str, status: str, date: str) -> Dict:
+        """Title, body and data payload for an attendance update"""
+        status_emoji = "✅" if status.lower() == "present" else "❌"
+        return {
+            "title": f"{status_emoji} Attendance Update",
+            "body": f"{student_name} marked {status} on {date}",
+            "data": {
                 "type": "attendance",
                 "status": status,
                 "date": date,
                 "action": "open_attendance"
             }
-        )
+        }
 
     @staticmethod
     async def send_announcement_notification(
@@ -0,0 +1,227 @@
+"""
+Import Job Worker
+Runs queued roster imports, committing every chunk together with the job's progress
+"""
+import asyncio
+import logging
+import math
+import os
+from typing import AsyncIterator, Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.import_job import ImportJob
+from app.services.import_jobs import ImportJobService
+from app.services.roster_import import RosterImportService
+from app.services.roster_sync import RosterSyncService
+from app.services.whatsapp_service import WhatsAppService, whatsapp_service
+from app.utils.roster_parser import count_csv_rows, iter_roster_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobWorker:
+    """
+    Polls for queued import jobs and processes them one at a time
+
+    Excel files are parsed in the roster parser pool and CSV files are
+    streamed chunk by chunk; each chunk is inserted and recorded on the job in
+    one transaction in a thread, so the event loop keeps serving requests
+    while a large file is imported. notify() wakes an
+    idle worker as soon as an upload is queued.
+    """
+
+    def __init__(self, poll_interval: Optional[float] = None, session_factory=SessionLocal):
+        self.poll_interval = poll_interval or settings.IMPORT_JOB_POLL_INTERVAL_SECONDS
+        self.session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._credential_tasks: Set[asyncio.Task] = set()
+        self.whatsapp_service: WhatsAppService = whatsapp_service  # Shared keep-alive Twilio transport
+
+    def notify(self):
+        """Signal that a job was queued"""
+        self._wakeup.set()
+
+    def start(self):
+        """Start processing jobs in the background on the running event loop"""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """
+        Stop after the chunk in progress
+
+        The job goes back to the queue with its committed progress, and the
+        next worker to start resumes it from the following chunk.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        if self._credential_tasks:
+            await asyncio.gather(*self._credential_tasks, return_exceptions=True)
+
+    async def run(self):
+        logger.info("Import job worker started")
+        while not self._stopping:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Import job worker error: {str(e)}")
+                processed = False
+
+            if not processed and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        logger.info("Import job worker stopped")
+
+    async def run_once(self) -> bool:
+        """Claim and process one due job, returns whether there was one"""
+        db = self.session_factory()
+        try:
+            job_id = await asyncio.to_thread(ImportJobService.claim_next, db)
+        finally:
+            db.close()
+        if job_id is None:
+            return False
+        await self.process(job_id)
+        return True
+
+    async def process(self, job_id: int):
+        db = self.session_factory()
+        try:
+            job = db.get(ImportJob, job_id)
+            try:
+                await self._import(db, job)
+            except Exception as e:
+                db.rollback()
+                job = db.get(ImportJob, job_id)
+                logger.error(f"❌ Import job {job_id} failed after chunk {job.chunks_committed}: {str(e)}")
+                # A file that cannot be read will not parse on the next attempt either
+                ImportJobService.mark_failed(job, str(e), retry=job.total_rows is not None)
+                db.commit()
+        finally:
+            db.close()
+
+    async def _import(self, db: Session, job: ImportJob):
+        if job.mode == "sync":
+            await self._sync(db, job)
+            return
+
+        if job.filename.lower().endswith(".csv"):
+            # CSV streams straight from the spooled file, one chunk in memory at a time
+            total_rows = await asyncio.to_thread(count_csv_rows, job.file_path)
+            chunks = self._stream_chunks(job)
+        else:
+            parsed = await RosterImportService.parse_file(job.file_path, job.filename, job.kind)
+            total_rows = parsed["total_rows"]
+            chunks = self._list_chunks(parsed["chunks"][job.chunks_committed:])
+        job.total_rows = total_rows
+        job.total_chunks = math.ceil(total_rows / settings.IMPORT_CHUNK_SIZE)
+        db.commit()
+
+        if job.chunks_committed:
+            logger.info(f"Resuming import job {job.id} at chunk {job.chunks_committed + 1}/{job.total_chunks}")
+
+        # Rows of chunks committed on an earlier attempt are in the database now,
+        # so the per-chunk duplicate query catches repeats of them
+        seen: Dict = {}
+        async for chunk in chunks:
+            if self._stopping:
+                ImportJobService.release(job)
+                db.commit()
+                return
+            created_users = await asyncio.to_thread(self._commit_chunk, db, job, chunk, seen)
+            if created_users:
+                self._send_credentials(created_users)
+
+        ImportJobService.mark_completed(job)
+        db.commit()
+        await asyncio.to_thread(self._remove_spool, job.file_path)
+
+    async def _sync(self, db: Session, job: ImportJob):
+        parsed = await RosterImportService.parse_file(job.file_path, job.filename, job.kind)
+        job.total_rows = parsed["total_rows"]
+        job.total_chunks = len(parsed["chunks"])
+        db.commit()
+
+        created_users = await asyncio.to_thread(self._commit_sync, db, job, parsed)
+        if created_users:
+            self._send_credentials(created_users)
+        ImportJobService.mark_completed(job)
+        db.commit()
+        await asyncio.to_thread(self._remove_spool, job.file_path)
+
+    @staticmethod
+    async def _list_chunks(chunks: List[Dict]) -> AsyncIterator[Dict]:
+        for chunk in chunks:
+            yield chunk
+
+    @staticmethod
+    async def _stream_chunks(job: ImportJob) -> AsyncIterator[Dict]:
+        """Parse and validate the next chunk in a thread only when the previous one is committed"""
+        chunks = iter_roster_chunks(
+            job.file_path, job.filename, job.kind, settings.IMPORT_CHUNK_SIZE, skip_chunks=job.chunks_committed
+        )
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    @staticmethod
+    def _commit_chunk(db: Session, job: ImportJob, chunk: Dict, seen: Dict) -> List[Dict]:
+        """Insert a chunk and advance the job in one transaction, returns credentials to send"""
+        imported, created_users, errors = RosterImportService.import_chunk(db, job.kind, chunk, seen)
+        ImportJobService.record_chunk(job, chunk["rows"], imported, errors)
+        db.commit()
+        return created_users
+
+    @staticmethod
+    def _commit_sync(db: Session, job: ImportJob, parsed: Dict) -> List[Dict]:
+        """
+        Apply a whole-sheet sync in one transaction, returns credentials to send
+
+        A sync needs the full sheet to know what to deactivate, so it is not
+        split into chunks; a retried attempt simply diffs again.
+        """
+        summary, errors, created_users = RosterSyncService.sync(db, job.kind, parsed)
+        ImportJobService.record_sync(job, summary, errors)
+        db.commit()
+        return created_users
+
+    def _send_credentials(self, created_users: List[Dict]):
+        """Send a committed chunk's teacher logins via WhatsApp without holding up the next chunk"""
+        task = asyncio.create_task(self._send_credentials_to_teachers(created_users))
+        self._credential_tasks.add(task)
+        task.add_done_callback(self._credential_tasks.discard)
+
+    async def _send_credentials_to_teachers(self, credentials_list: List[Dict]):
+        for cred in credentials_list:
+            try:
+                await self.whatsapp_service.send_teacher_credentials(
+                    teacher_name=cred['name'],
+                    teacher_email=cred['email'],
+                    username=cred['username'],
+                    password=cred['password'],
+                    phone_number=cred['phone_number']
+                )
+            except Exception as e:
+                print(f"Failed to send credentials to {cred['name']}: {str(e)}")
+
+    @staticmethod
+    def _remove_spool(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+import_job_worker = ImportJobWorker()
@@ -0,0 +1,198 @@
+"""
+Import Jobs
+Uploads are spooled and queued here; ImportJobWorker processes them chunk by chunk
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from fastapi import UploadFile
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.services.roster_import import RosterImportService
+
+
+class ImportJobService:
+    """Enqueue, claim, record progress of and report on roster import jobs"""
+
+    @staticmethod
+    async def enqueue(
+        db: Session,
+        file: UploadFile,
+        kind: str,
+        mode: str = "append",
+        created_by: Optional[int] = None
+    ) -> ImportJob:
+        """Spool the upload to IMPORT_SPOOL_DIR and queue a job for it (commits)"""
+        filename = file.filename or ""
+        RosterImportService.check_filename(filename)
+        path = await asyncio.to_thread(RosterImportService.spool, file, settings.IMPORT_SPOOL_DIR)
+
+        job = ImportJob(
+            kind=kind,
+            mode=mode,
+            filename=filename,
+            file_path=path,
+            created_by=created_by,
+            status=ImportJobStatus.QUEUED,
+            imported=[],
+            errors=[],
+            next_attempt_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def claim_next(db: Session) -> Optional[int]:
+        """
+        Take the oldest due job for this worker and return its id
+
+        A RUNNING job whose lease ran out belonged to a worker that died
+        mid-file; it is claimed again and resumes after its last committed chunk.
+        """
+        now = datetime.utcnow()
+        query = db.query(ImportJob).filter(
+            or_(
+                (ImportJob.status == ImportJobStatus.QUEUED) &
+                (ImportJob.next_attempt_at <= now),
+                (ImportJob.status == ImportJobStatus.RUNNING) &
+                (ImportJob.locked_at < now - timedelta(seconds=settings.IMPORT_JOB_LEASE_SECONDS))
+            )
+        ).order_by(ImportJob.next_attempt_at, ImportJob.id).limit(1)
+
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+
+        job = query.first()
+        if job is None:
+            db.commit()
+            return None
+        job.status = ImportJobStatus.RUNNING
+        job.attempts += 1
+        job.locked_at = now
+        job.started_at = job.started_at or now
+        db.commit()
+        return job.id
+
+    @staticmethod
+    def record_chunk(job: ImportJob, rows: int, imported: List[Dict], errors: List[Dict]):
+        """Advance progress past one chunk - commit together with the chunk's rows"""
+        job.chunks_committed += 1
+        job.rows_processed += rows
+        job.imported_count += len(imported)
+        job.error_count += len(errors)
+        # New lists so the JSON columns are flagged as changed
+        job.imported = (job.imported or []) + imported
+        job.errors = (job.errors or []) + errors
+        job.locked_at = datetime.utcnow()
+
+    @staticmethod
+    def record_sync(job: ImportJob, summary: Dict, errors: List[Dict]):
+        """Record a whole-sheet sync - commit together with the delta it applied"""
+        imported = summary.pop("imported")
+        job.chunks_committed = job.total_chunks
+        job.rows_processed = job.total_rows
+        job.imported_count = len(imported)
+        job.error_count = len(errors)
+        job.imported = imported
+        job.errors = errors
+        job.sync_summary = summary
+        job.locked_at = datetime.utcnow()
+
+    @staticmethod
+    def mark_completed(job: ImportJob):
+        job.status = ImportJobStatus.COMPLETED
+        job.last_error = None
+        job.locked_at = None
+        job.finished_at = datetime.utcnow()
+
+    @staticmethod
+    def mark_failed(job: ImportJob, error: str, retry: bool = True):
+        """Record a failed attempt; re-queues the job to resume after a delay until IMPORT_JOB_MAX_ATTEMPTS"""
+        job.last_error = error
+        job.locked_at = None
+        if retry and job.attempts < settings.IMPORT_JOB_MAX_ATTEMPTS:
+            job.status = ImportJobStatus.QUEUED
+            job.next_attempt_at = datetime.utcnow() + timedelta(seconds=settings.IMPORT_JOB_RETRY_SECONDS)
+        else:
+            job.status = ImportJobStatus.FAILED
+            job.finished_at = datetime.utcnow()
+
+    @staticmethod
+    def release(job: ImportJob):
+        """Hand an interrupted job back to the queue (worker shutdown) without using up an attempt"""
+        job.status = ImportJobStatus.QUEUED
+        job.attempts -= 1
+        job.locked_at = None
+        job.next_attempt_at = datetime.utcnow()
+
+    @staticmethod
+    def resume(job: ImportJob):
+        """Queue a failed job again; it continues after its last committed chunk"""
+        job.status = ImportJobStatus.QUEUED
+        job.attempts = 0
+        job.next_attempt_at = datetime.utcnow()
+        job.finished_at = None
+
+    @staticmethod
+    def get_status(job: ImportJob) -> Dict:
+        """Progress and throughput for the admin UI; the import summary is included once finished"""
+        started_at = ImportJobService._utc(job.started_at)
+        finished_at = ImportJobService._utc(job.finished_at)
+        elapsed = None
+        if started_at:
+            elapsed = ((finished_at or datetime.now(timezone.utc)) - started_at).total_seconds()
+        rows_per_second = round(job.rows_processed / elapsed, 1) if elapsed else None
+
+        eta_seconds = None
+        if rows_per_second and job.total_rows is not None and job.status == ImportJobStatus.RUNNING:
+            eta_seconds = round((job.total_rows - job.rows_processed) / rows_per_second)
+
+        noun = "students" if job.kind == "students" else "teachers"
+        response = {
+            "job_id": job.id,
+            "kind": job.kind,
+            "mode": job.mode,
+            "filename": job.filename,
+            "status": job.status.value,
+            "total_rows": job.total_rows,
+            "rows_processed": job.rows_processed,
+            "chunks_committed": job.chunks_committed,
+            "total_chunks": job.total_chunks,
+            "imported_count": job.imported_count,
+            "error_count": job.error_count,
+            "errors": sorted(job.errors or [], key=lambda error: error["row"]) or None,
+            "sync_summary": job.sync_summary,
+            "rows_per_second": rows_per_second,
+            "eta_seconds": eta_seconds,
+            "attempts": job.attempts,
+            "last_error": job.last_error,
+            "started_at": started_at.isoformat() if started_at else None,
+            "finished_at": finished_at.isoformat() if finished_at else None
+        }
+        if job.status == ImportJobStatus.COMPLETED and job.sync_summary:
+            summary = job.sync_summary
+            response["message"] = (
+                f"Synced {noun}: {summary['inserted']} added, {summary['updated']} updated, "
+                f"{summary['reactivated']} reactivated, {summary['deactivated']} deactivated, "
+                f"{summary['unchanged']} unchanged"
+            )
+            if summary["deactivation_skipped"]:
+                response["message"] += " (deactivation skipped because some rows failed validation)"
+            response[f"imported_{noun}"] = job.imported or []
+        elif job.status == ImportJobStatus.COMPLETED:
+            response["message"] = f"Successfully imported {job.imported_count} {noun}"
+            response[f"imported_{noun}"] = job.imported or []
+        elif job.status == ImportJobStatus.FAILED:
+            response["message"] = f"Import failed after {job.rows_processed} rows: {job.last_error}"
+        return response
+
+    @staticmethod
+    def _utc(value: Optional[datetime]) -> Optional[datetime]:
+        """SQLite hands timestamps back naive; they are stored as UTC"""
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
@@ -0,0 +1,171 @@
+"""
+Notification Outbox
+Approval writes notification jobs in its own transaction; NotificationWorker delivers them
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.attendance import Attendance
+from app.models.notification_job import NotificationJob, NotificationChannel, NotificationJobStatus
+from app.models.student import Student
+
+# A job stuck in PROCESSING longer than this is assumed to belong to a dead worker
+PROCESSING_LEASE = timedelta(minutes=5)
+
+
+class NotificationOutboxService:
+    """Enqueue, claim and report on outbox jobs"""
+
+    @staticmethod
+    def new_batch_id() -> str:
+        return str(uuid.uuid4())
+
+    @staticmethod
+    def enqueue_attendance_notifications(
+        db: Session,
+        batch_id: str,
+        records: List[Attendance],
+        students: Dict[int, Student]
+    ) -> int:
+        """
+        Add push and WhatsApp jobs for approved attendance records
+
+        Does not commit - the jobs become visible to the worker together with
+        the approval itself.
+
+        Returns:
+            Number of jobs added
+        """
+        now = datetime.now(timezone.utc)
+        jobs = []
+        for record in records:
+            student = students.get(record.student_id)
+            if not student or not student.parent_phone:
+                continue
+
+            payload = {
+                "student_id": student.id,
+                "student_name": student.full_name,
+                "student_unique_id": student.unique_id,
+                "parent_phone": student.parent_phone,
+                "parent_name": student.parent_name,
+                "attendance_status": record.status.value,
+                "date": record.date.strftime("%Y-%m-%d"),
+                "remarks": record.remarks
+            }
+            for channel in (NotificationChannel.PUSH, NotificationChannel.WHATSAPP):
+                jobs.append(NotificationJob(
+                    batch_id=batch_id,
+                    channel=channel,
+                    attendance_id=record.id,
+                    payload=payload,
+                    status=NotificationJobStatus.PENDING,
+                    max_attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+                    next_attempt_at=now
+                ))
+
+        db.add_all(jobs)
+        return len(jobs)
+
+    @staticmethod
+    def claim_due_jobs(db: Session, limit: int) -> List[Tuple[int, NotificationChannel]]:
+        """
+        Lock up to `limit` due jobs for this worker and return their (id, channel)
+
+        On PostgreSQL, FOR UPDATE SKIP LOCKED lets several workers drain the
+        outbox without handing out the same job twice.
+        """
+        now = datetime.now(timezone.utc)
+        query = db.query(NotificationJob).filter(
+            or_(
+                (NotificationJob.status == NotificationJobStatus.PENDING) &
+                (NotificationJob.next_attempt_at <= now),
+                (NotificationJob.status == NotificationJobStatus.PROCESSING) &
+                (NotificationJob.locked_at < now - PROCESSING_LEASE)
+            )
+        ).order_by(NotificationJob.next_attempt_at, NotificationJob.id).limit(limit)
+
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+
+        jobs = query.all()
+        claimed = []
+        for job in jobs:
+            job.status = NotificationJobStatus.PROCESSING
+            job.locked_at = now
+            claimed.append((job.id, job.channel))
+        db.commit()
+        return claimed
+
+    @staticmethod
+    def mark_sent(job: NotificationJob, result: str = None):
+        job.status = NotificationJobStatus.SENT
+        job.attempts += 1
+        job.result = result
+        job.last_error = None
+        job.sent_at = datetime.now(timezone.utc)
+        job.locked_at = None
+
+    @staticmethod
+    def mark_skipped(job: NotificationJob, reason: str):
+        job.status = NotificationJobStatus.SKIPPED
+        job.result = reason
+        job.locked_at = None
+
+    @staticmethod
+    def mark_failed(job: NotificationJob, error: str, retry: bool = True):
+        """Record a failed attempt; schedules a retry with exponential backoff until max_attempts"""
+        job.attempts += 1
+        job.last_error = error
+        job.locked_at = None
+        if retry and job.attempts < job.max_attempts:
+            backoff = settings.NOTIFICATION_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1))
+            job.status = NotificationJobStatus.PENDING
+            job.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=backoff)
+        else:
+            job.status = NotificationJobStatus.FAILED
+
+    @staticmethod
+    def get_batch_status(db: Session, batch_id: str) -> Dict:
+        """Per-channel status counts plus per-job detail for one approval batch"""
+        jobs = db.query(NotificationJob).filter(
+            NotificationJob.batch_id == batch_id
+        ).order_by(NotificationJob.id).all()
+
+        summary = {
+            channel.value: {job_status.value: 0 for job_status in NotificationJobStatus}
+            for channel in NotificationChannel
+        }
+        for job in jobs:
+            summary[job.channel.value][job.status.value] += 1
+
+        total = len(jobs)
+        finished = len([job for job in jobs if job.status in (
+            NotificationJobStatus.SENT, NotificationJobStatus.FAILED, NotificationJobStatus.SKIPPED
+        )])
+
+        return {
+            "batch_id": batch_id,
+            "total": total,
+            "finished": finished,
+            "is_complete": total > 0 and finished == total,
+            "summary": summary,
+            "jobs": [
+                {
+                    "id": job.id,
+                    "channel": job.channel.value,
+                    "attendance_id": job.attendance_id,
+                    "student_name": (job.payload or {}).get("student_name"),
+                    "parent_phone": (job.payload or {}).get("parent_phone"),
+                    "status": job.status.value,
+                    "attempts": job.attempts,
+                    "result": job.result,
+                    "last_error": job.last_error,
+                    "sent_at": job.sent_at.isoformat() if job.sent_at else None
+                }
+                for job in jobs
+            ]
+        }
@@ -0,0 +1,264 @@
+"""
+Notification Worker
+Drains the notification outbox concurrently, retrying failed deliveries
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.attendance import Attendance
+from app.models.notification_job import NotificationJob, NotificationChannel, NotificationJobStatus
+from app.models.parent import Parent
+from app.models.student import Student
+from app.services.attendance_rollup import AttendanceRollupService, RollupDelta
+from app.services.fcm_push_notification_service import FCMPushNotificationService, FCM_BATCH_SIZE
+from app.services.notification_outbox import NotificationOutboxService
+from app.services.whatsapp_service import WhatsAppService, whatsapp_service
+from app.utils.phone import normalize_phone
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# FCM errors that will not go away by retrying
+PERMANENT_PUSH_ERRORS = {"No FCM token", "Invalid or unregistered token", "Sender ID mismatch"}
+
+
+class NotificationWorker:
+    """
+    Polls the outbox and delivers due jobs with bounded concurrency
+
+    Runs as a background task inside the API process (see app/main.py) or on
+    its own with run_notification_worker.py. notify() wakes an idle worker as
+    soon as new jobs are committed instead of waiting for the next poll.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        session_factory=SessionLocal
+    ):
+        self.concurrency = concurrency or settings.NOTIFICATION_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or settings.NOTIFICATION_POLL_INTERVAL_SECONDS
+        self.session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self.whatsapp_service: WhatsAppService = whatsapp_service  # Shared keep-alive Twilio transport
+
+    def notify(self):
+        """Signal that new jobs were committed"""
+        self._wakeup.set()
+
+    def start(self):
+        """Start draining in the background on the running event loop"""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Finish in-flight jobs and stop polling"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def run(self):
+        logger.info(f"Notification worker started (concurrency={self.concurrency})")
+        while not self._stopping:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Notification worker error: {str(e)}")
+                processed = 0
+
+            if processed == 0 and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        logger.info("Notification worker stopped")
+
+    async def run_once(self) -> int:
+        """Claim one batch of due jobs and deliver each channel as one batch, returns jobs processed"""
+        db = self.session_factory()
+        try:
+            claimed = NotificationOutboxService.claim_due_jobs(db, limit=FCM_BATCH_SIZE)
+        finally:
+            db.close()
+
+        push_ids = [job_id for job_id, channel in claimed if channel == NotificationChannel.PUSH]
+        whatsapp_ids = [job_id for job_id, channel in claimed if channel == NotificationChannel.WHATSAPP]
+
+        tasks = []
+        if whatsapp_ids:
+            tasks.append(self._deliver_whatsapp_batch(whatsapp_ids))
+        if push_ids:
+            tasks.append(self._deliver_push_batch(push_ids))
+        if tasks:
+            await asyncio.gather(*tasks)
+        return len(claimed)
+
+    @staticmethod
+    def _parents_by_phone(db, phones: List[str]) -> Dict[str, Parent]:
+        """Load the parents for a set of phone numbers in one query, keyed by normalized phone"""
+        normalized = {normalize_phone(phone) for phone in phones} - {None}
+        parents = db.query(Parent).filter(Parent.phone_normalized.in_(normalized)).all() if normalized else []
+        return {parent.phone_normalized: parent for parent in parents}
+
+    async def _deliver_push_batch(self, job_ids: List[int]):
+        """Send all claimed push jobs through send_each in chunks and map each result back to its job"""
+        db = self.session_factory()
+        try:
+            jobs = db.query(NotificationJob).filter(NotificationJob.id.in_(job_ids)).all()
+
+            # Look tokens up at delivery time so a parent who logs in later still gets retried jobs
+            parents = self._parents_by_phone(db, [job.payload["parent_phone"] for job in jobs])
+
+            notifications = []
+            targets = []
+            for job in jobs:
+                parent = parents.get(normalize_phone(job.payload["parent_phone"]))
+                if not parent or not parent.push_token:
+                    NotificationOutboxService.mark_skipped(job, "no_push_token")
+                    continue
+
+                content = FCMPushNotificationService.attendance_notification_content(
+                    student_name=job.payload["student_name"],
+                    status=job.payload["attendance_status"],
+                    date=job.payload["date"]
+                )
+                notifications.append({"fcm_token": parent.push_token, **content})
+                targets.append((job, parent))
+
+            if notifications:
+                # firebase_admin is blocking - keep it off the event loop
+                result = await asyncio.to_thread(FCMPushNotificationService.send_bulk_notifications, notifications)
+
+                if result.get("status") != "success":
+                    error = result.get("message", "unknown error")
+                    for job, _ in targets:
+                        NotificationOutboxService.mark_failed(job, error, retry=error not in PERMANENT_PUSH_ERRORS)
+                else:
+                    for (job, parent), response in zip(targets, result["responses"]):
+                        if response["success"]:
+                            NotificationOutboxService.mark_sent(job, response["message_id"])
+                        else:
+                            if response.get("unregistered"):
+                                # Stale device token - stop sending to it until the parent logs in again
+                                parent.push_token = None
+                            NotificationOutboxService.mark_failed(
+                                job, response["error"], retry=not response.get("unregistered")
+                            )
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Push notification batch failed: {str(e)}")
+            for job_id in job_ids:
+                job = db.get(NotificationJob, job_id)
+                if job:
+                    NotificationOutboxService.mark_failed(job, str(e))
+            db.commit()
+        finally:
+            db.close()
+
+    async def _deliver_whatsapp_batch(self, job_ids: List[int]):
+        """
+        Send all claimed WhatsApp jobs through one send_attendance_messages call and map each result back to its job
+
+        send_attendance_messages commits its chat rows before sending, so no
+        write transaction is held across the Twilio calls. The results (the
+        communication rows, the attendance flags, the rollup and the job
+        states) are recorded afterwards in one short transaction. If that
+        fails, the jobs whose messages went out are still marked sent so a
+        retry does not message the parent twice.
+        """
+        db = self.session_factory()
+        targets = {}
+        sent = None
+        try:
+            jobs = db.query(NotificationJob).filter(NotificationJob.id.in_(job_ids)).all()
+            if not self.whatsapp_service.client:
+                for job in jobs:
+                    NotificationOutboxService.mark_skipped(job, "whatsapp_not_configured")
+                db.commit()
+                return
+
+            attendance_ids = {job.attendance_id for job in jobs if job.attendance_id}
+            student_ids = {job.payload["student_id"] for job in jobs}
+            attendance_records = {
+                record.id: record
+                for record in db.query(Attendance).filter(Attendance.id.in_(attendance_ids)).all()
+            } if attendance_ids else {}
+            students = {
+                student.id: student
+                for student in db.query(Student).filter(Student.id.in_(student_ids)).all()
+            } if student_ids else {}
+
+            records = {}
+            rollup_keys = {}
+            for job in jobs:
+                attendance_record = attendance_records.get(job.attendance_id)
+                student = students.get(job.payload["student_id"])
+                if not attendance_record or not student:
+                    NotificationOutboxService.mark_skipped(job, "record_deleted")
+                    continue
+                # One message per record even if it has several due jobs
+                records[attendance_record.id] = (attendance_record, student)
+                targets[job.id] = attendance_record.id
+                if not attendance_record.whatsapp_sent:
+                    rollup_keys[attendance_record.id] = (attendance_record.date, student.class_name,
+                                                         attendance_record.status, attendance_record.admin_approved)
+            if len(records) < len(jobs):
+                db.commit()  # The skipped jobs stay skipped even if creating the chats fails
+            if not records:
+                return
+
+            sent = await self.whatsapp_service.send_attendance_messages(
+                list(records.values()), db, concurrency=self.concurrency, commit=False
+            )
+
+            sent_ids = [attendance_id for attendance_id, ok in sent.items() if ok]
+            if sent_ids:
+                db.query(Attendance).filter(Attendance.id.in_(sent_ids)).update(
+                    {Attendance.whatsapp_sent: True, Attendance.whatsapp_sent_at: datetime.utcnow()},
+                    synchronize_session=False
+                )
+            delta = RollupDelta()
+            for attendance_id in sent_ids:
+                if attendance_id in rollup_keys:
+                    delta.add(*rollup_keys[attendance_id], count=0, whatsapp_sent=1)
+            AttendanceRollupService.apply(db, delta)
+            self._record_whatsapp_results(db, targets, sent)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ WhatsApp notification batch failed: {str(e)}")
+            if sent is not None:
+                self._record_whatsapp_results(db, targets, sent, error=str(e))
+            else:
+                for job in db.query(NotificationJob).filter(
+                    NotificationJob.id.in_(job_ids),
+                    NotificationJob.status == NotificationJobStatus.PROCESSING
+                ).all():
+                    NotificationOutboxService.mark_failed(job, str(e))
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _record_whatsapp_results(db, targets: Dict[int, int], sent: Dict[int, bool],
+                                 error: str = "WhatsApp send failed"):
+        """Mark each attempted job ({job_id: attendance_id}) sent or failed, without committing"""
+        for job in db.query(NotificationJob).filter(NotificationJob.id.in_(list(targets))).all():
+            if sent.get(targets[job.id]):
+                NotificationOutboxService.mark_sent(job, "sent")
+            else:
+                NotificationOutboxService.mark_failed(job, error)
+
+
+notification_worker = NotificationWorker()
@@ -8,7 +8,7 @@ import os
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.models.parent import OTP
-from twilio.rest import Client
+from app.services.whatsapp_service import whatsapp_service
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -39,14 +39,16 @@ class OTPService:
             if not phone_number.startswith("+"):
                 phone_number = f"+91{phone_number}"
 
-            # Initialize Twilio client
-            client = Client(account_sid, auth_token)
+            # Shared keep-alive Twilio client (same account as WhatsApp)
+            if not whatsapp_service.client:
+                logger.warning("Twilio client not configured, skipping SMS")
+                return False
 
             # SMS message
             message_body = f"Your OTP for Sparky login is {otp_code}. Valid for 10 minutes. - Diamond Tutorials"
 
             # Send SMS
-            message = client.messages.create(
+            message = await whatsapp_service.client.messages.create_async(
                 body=message_body,
                 from_=twilio_number,
                 to=phone_number
@@ -0,0 +1,324 @@
+"""
+Parquet Export
+Writes attendance, teacher attendance, communications, message receipts and
+activity logs as month-partitioned Parquet datasets for analytics. Each run only rewrites the
+months that have rows changed since the table's watermark.
+"""
+import enum
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import DateTime, extract, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.activity_log import ActivityLog
+from app.models.attendance import Attendance
+from app.models.communication import Communication, MessageReceipt
+from app.models.teacher_attendance import TeacherAttendance
+
+# Rows fetched per round trip, and rows per Parquet row group
+EXPORT_YIELD_PER = 5000
+ROW_GROUP_ROWS = 50_000
+WATERMARK_FILE = "_watermark.json"  # Files starting with _ are skipped by Parquet dataset readers
+
+# Low-cardinality columns (enums, types, statuses) are stored dictionary-encoded
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+UTC_TIMESTAMP = pa.timestamp("us", tz="UTC")  # DateTime(timezone=True) columns
+LOCAL_TIMESTAMP = pa.timestamp("us")  # Naive DateTime columns, exported as stored
+
+
+class ParquetTable:
+    """
+    How one table is exported
+
+    partition_column decides a row's month; changed_column is the timestamp
+    the watermark follows (updated_at, or created_at for append-only tables).
+    A table without its own timestamps takes them from a joined parent
+    (join), and then lists its columns and row order explicitly.
+    """
+
+    def __init__(self, name: str, model, schema: pa.Schema, partition_column, changed_column,
+                 columns=None, join=None, order_by=None):
+        self.name = name
+        self.model = model
+        self.schema = schema
+        self.columns = columns or [getattr(model, field.name) for field in schema]
+        self.partition_column = partition_column
+        self.changed_column = changed_column
+        self.join = join
+        self.order_by = order_by or [model.id]
+
+    def query(self, db: Session, *entities):
+        query = db.query(*entities).select_from(self.model)
+        return query.join(*self.join) if self.join else query
+
+
+PARQUET_TABLES = {
+    "attendance": ParquetTable(
+        "attendance",
+        Attendance,
+        pa.schema([
+            ("id", pa.int64()),
+            ("student_id", pa.int64()),
+            ("teacher_id", pa.int64()),
+            ("date", pa.date32()),
+            ("status", CATEGORY),
+            ("remarks", pa.string()),
+            ("is_draft", pa.bool_()),
+            ("submitted_for_approval", pa.bool_()),
+            ("submitted_at", UTC_TIMESTAMP),
+            ("admin_approved", pa.bool_()),
+            ("approved_by", pa.int64()),
+            ("approved_at", UTC_TIMESTAMP),
+            ("whatsapp_sent", pa.bool_()),
+            ("whatsapp_sent_at", UTC_TIMESTAMP),
+            ("marked_at", UTC_TIMESTAMP),
+            ("created_at", UTC_TIMESTAMP),
+            ("updated_at", UTC_TIMESTAMP),
+        ]),
+        Attendance.date,
+        Attendance.updated_at
+    ),
+    "teacher_attendance": ParquetTable(
+        "teacher_attendance",
+        TeacherAttendance,
+        pa.schema([
+            ("id", pa.int64()),
+            ("teacher_id", pa.int64()),
+            ("date", pa.date32()),
+            ("status", CATEGORY),
+            ("check_in_time", LOCAL_TIMESTAMP),
+            ("check_out_time", LOCAL_TIMESTAMP),
+            ("remarks", pa.string()),
+            ("marked_by_admin_id", pa.int64()),
+            ("marked_at", LOCAL_TIMESTAMP),
+            ("updated_at", LOCAL_TIMESTAMP),
+            ("is_locked", pa.bool_()),
+            ("locked_at", LOCAL_TIMESTAMP),
+            ("locked_by_admin_id", pa.int64()),
+        ]),
+        TeacherAttendance.date,
+        TeacherAttendance.updated_at
+    ),
+    "communications": ParquetTable(
+        "communications",
+        Communication,
+        pa.schema([
+            ("id", pa.int64()),
+            ("sender_id", pa.int64()),
+            ("student_id", pa.int64()),
+            ("recipient_id", pa.int64()),
+            ("recipient_type", CATEGORY),
+            ("subject", pa.string()),
+            ("message", pa.string()),
+            ("message_type", CATEGORY),
+            ("recipient_phone_numbers", pa.string()),  # JSON columns are exported as JSON text
+            ("target_groups", pa.string()),
+            ("whatsapp_chat_id", pa.string()),
+            ("whatsapp_chat_type", CATEGORY),
+            ("is_sent", pa.bool_()),
+            ("sent_at", UTC_TIMESTAMP),
+            ("delivery_status", CATEGORY),
+            ("is_bulk", pa.bool_()),
+            ("bulk_group_name", CATEGORY),
+            ("is_read", pa.bool_()),
+            ("read_at", UTC_TIMESTAMP),
+            ("created_at", UTC_TIMESTAMP),
+            ("updated_at", UTC_TIMESTAMP),
+        ]),
+        Communication.created_at,
+        Communication.updated_at
+    ),
+    # Receipts are written with their message and only change when read, so
+    # they follow the message's month and the later of created_at and read_at
+    "message_receipts": ParquetTable(
+        "message_receipts",
+        MessageReceipt,
+        pa.schema([
+            ("message_id", pa.int64()),
+            ("recipient_type", CATEGORY),
+            ("recipient_id", pa.int64()),
+            ("is_read", pa.bool_()),
+            ("read_at", UTC_TIMESTAMP),
+            ("message_created_at", UTC_TIMESTAMP),
+        ]),
+        Communication.created_at,
+        func.coalesce(MessageReceipt.read_at, Communication.created_at),
+        columns=[
+            MessageReceipt.message_id,
+            MessageReceipt.recipient_type,
+            MessageReceipt.recipient_id,
+            MessageReceipt.is_read,
+            MessageReceipt.read_at,
+            Communication.created_at,
+        ],
+        join=(Communication, MessageReceipt.message_id == Communication.id),
+        order_by=[MessageReceipt.message_id, MessageReceipt.recipient_type, MessageReceipt.recipient_id]
+    ),
+    "activity_logs": ParquetTable(
+        "activity_logs",
+        ActivityLog,
+        pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("user_name", pa.string()),
+            ("action_type", CATEGORY),
+            ("description", pa.string()),
+            ("entity_type", CATEGORY),
+            ("entity_id", pa.int64()),
+            ("meta_data", pa.string()),
+            ("created_at", LOCAL_TIMESTAMP),
+        ]),
+        ActivityLog.created_at,
+        ActivityLog.created_at  # Append-only
+    ),
+}
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+class ParquetExportService:
+    """Incremental, month-partitioned Parquet export of the analytics tables"""
+
+    @staticmethod
+    def export_table(db: Session, table: ParquetTable, directory: str, full: bool = False) -> Dict:
+        """
+        Bring one table's dataset up to date
+
+        Layout is <directory>/<table>/month=YYYY-MM/part-0.parquet. Every
+        month with a row changed since the watermark is re-read and its file
+        replaced, so edits to older rows (late approvals, read receipts) land
+        in the right partition and partitions never hold duplicates. The
+        watermark is moved back by PARQUET_WATERMARK_OVERLAP_SECONDS so rows
+        committed late with an earlier timestamp are still picked up.
+        Deletions are not tracked - run with full=True after bulk deletes.
+
+        Returns:
+            {"table", "months", "rows", "watermark"}
+        """
+        table_dir = os.path.join(directory, table.name)
+        watermark = None if full else ParquetExportService._load_watermark(table_dir)
+
+        changed = []
+        if watermark is not None:
+            since = watermark - timedelta(seconds=settings.PARQUET_WATERMARK_OVERLAP_SECONDS)
+            changed.append(table.changed_column > since)
+        new_watermark = table.query(db, func.max(table.changed_column)).filter(*changed).scalar()
+        months = sorted(
+            date(int(year), int(month), 1)
+            for year, month in table.query(
+                db, extract("year", table.partition_column), extract("month", table.partition_column)
+            ).filter(table.partition_column.isnot(None), *changed).distinct()
+        )
+
+        if full and os.path.isdir(table_dir):
+            # Months that no longer have rows are dropped on a full export
+            keep = {f"month={month:%Y-%m}" for month in months}
+            for entry in os.listdir(table_dir):
+                if entry.startswith("month=") and entry not in keep:
+                    ParquetExportService._remove_partition(os.path.join(table_dir, entry))
+
+        rows = 0
+        for month in months:
+            rows += ParquetExportService._write_month(db, table, table_dir, month)
+
+        current = max(new_watermark, watermark) if new_watermark and watermark else new_watermark or watermark
+        if current is not None:
+            ParquetExportService._save_watermark(table_dir, current)
+        return {
+            "table": table.name,
+            "months": [f"{month:%Y-%m}" for month in months],
+            "rows": rows,
+            "watermark": current.isoformat() if current else None
+        }
+
+    @staticmethod
+    def _write_month(db: Session, table: ParquetTable, table_dir: str, month: date) -> int:
+        """Rewrite one month's partition from the database, returns its row count"""
+        partition_dir = os.path.join(table_dir, f"month={month:%Y-%m}")
+        start, end = month, _next_month(month)
+        if isinstance(table.partition_column.type, DateTime):
+            start, end = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+        query = table.query(db, *table.columns).filter(
+            table.partition_column >= start, table.partition_column < end
+        ).order_by(*table.order_by)
+
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, "part-0.parquet")
+        temp_path = path + ".tmp"
+        rows = 0
+        batch: List[Tuple] = []
+        writer = pq.ParquetWriter(temp_path, table.schema)
+        try:
+            for row in query.yield_per(EXPORT_YIELD_PER):
+                batch.append(row)
+                if len(batch) == ROW_GROUP_ROWS:
+                    writer.write_table(ParquetExportService._to_arrow(table.schema, batch))
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                writer.write_table(ParquetExportService._to_arrow(table.schema, batch))
+                rows += len(batch)
+        except Exception:
+            writer.close()
+            os.unlink(temp_path)
+            raise
+        writer.close()
+
+        if rows:
+            os.replace(temp_path, path)
+        else:
+            # Every row of the month was deleted or moved to another month
+            os.unlink(temp_path)
+            ParquetExportService._remove_partition(partition_dir)
+        return rows
+
+    @staticmethod
+    def _to_arrow(schema: pa.Schema, rows: List[Tuple]) -> pa.Table:
+        """Column-wise conversion of a batch of rows to the table's schema"""
+        arrays = []
+        for index, field in enumerate(schema):
+            values = [_plain(row[index]) for row in rows]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    @staticmethod
+    def _load_watermark(table_dir: str) -> Optional[datetime]:
+        try:
+            with open(os.path.join(table_dir, WATERMARK_FILE)) as source:
+                value = json.load(source).get("changed_through")
+        except FileNotFoundError:
+            return None
+        return datetime.fromisoformat(value) if value else None
+
+    @staticmethod
+    def _save_watermark(table_dir: str, changed_through: datetime):
+        os.makedirs(table_dir, exist_ok=True)
+        path = os.path.join(table_dir, WATERMARK_FILE)
+        with open(path + ".tmp", "w") as target:
+            json.dump({"changed_through": changed_through.isoformat(), "exported_at": datetime.utcnow().isoformat()}, target)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _remove_partition(partition_dir: str):
+        for entry in os.listdir(partition_dir):
+            os.unlink(os.path.join(partition_dir, entry))
+        os.rmdir(partition_dir)
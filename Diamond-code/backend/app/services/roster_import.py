@@ -0,0 +1,353 @@
+"""
+Roster Import
+Bulk student/teacher import: the upload is spooled to disk, parsed and
+validated in a worker process, then de-duplicated and inserted chunk by chunk
+(see ImportJobWorker for the background job that commits each chunk)
+"""
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import insert, or_, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import hash_passwords
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.user import User, UserRole
+from app.services.unique_id_generator import UniqueIdGenerator
+from app.utils.roster_parser import parse_roster
+
+ALLOWED_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Lazily started parser processes (spawned, so they never inherit DB connections)"""
+    global _parse_pool
+    if _parse_pool is None and settings.IMPORT_PARSE_WORKERS > 0:
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=settings.IMPORT_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=True, cancel_futures=True)
+        _parse_pool = None
+
+
+class RosterImportService:
+    """Parse, validate, de-duplicate and bulk insert roster uploads"""
+
+    @staticmethod
+    def check_filename(filename: str):
+        if not filename.lower().endswith(ALLOWED_EXTENSIONS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid file type. Only Excel (.xlsx, .xls) and CSV (.csv) files are supported."
+            )
+
+    @staticmethod
+    def spool(file: UploadFile, directory: Optional[str] = None) -> str:
+        """Copy the upload to a named file the parser process (or a later import job) can open"""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file.file.seek(0)
+        suffix = os.path.splitext(file.filename or "")[1]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as spool:
+            shutil.copyfileobj(file.file, spool, length=1024 * 1024)
+            return spool.name
+
+    @staticmethod
+    async def parse_file(path: str, filename: str, kind: str) -> Dict:
+        """
+        Parse a spooled roster off the event loop
+
+        Returns:
+            parse_roster() result: total_rows plus validated records and errors per chunk
+        """
+        pool = get_parse_pool()
+        if pool is None:
+            return await asyncio.to_thread(parse_roster, path, filename, kind, settings.IMPORT_CHUNK_SIZE)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, parse_roster, path, filename, kind, settings.IMPORT_CHUNK_SIZE)
+
+    @staticmethod
+    def import_chunk(db: Session, kind: str, chunk: Dict, seen: Dict) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """
+        Insert one parsed chunk (does not commit)
+
+        Returns:
+            (imported [{"name", "phone"}], created login credentials, row errors including validation errors)
+        """
+        if kind == "students":
+            imported, errors = RosterImportService._insert_student_chunk(db, chunk["records"], seen)
+            created_users = []
+        else:
+            imported, created_users, errors = RosterImportService._insert_teacher_chunk(db, chunk["records"], seen)
+        return imported, created_users, chunk["errors"] + errors
+
+    @staticmethod
+    def import_students(db: Session, parsed: Dict) -> Dict:
+        """Insert parsed student chunks, returns the import summary (commits)"""
+        imported_students = []
+        errors = []
+        seen: Dict[Tuple[str, str], str] = {}  # student_key -> unique_id, across chunks
+
+        for chunk in parsed["chunks"]:
+            imported, _, chunk_errors = RosterImportService.import_chunk(db, "students", chunk, seen)
+            imported_students.extend(imported)
+            errors.extend(chunk_errors)
+
+        db.commit()
+        return {
+            "message": f"Successfully imported {len(imported_students)} students",
+            "imported_count": len(imported_students),
+            "total_rows": parsed["total_rows"],
+            "imported_students": imported_students,
+            "errors": sorted(errors, key=lambda error: error["row"]) or None
+        }
+
+    @staticmethod
+    def _insert_student_chunk(db: Session, records: List[Dict], seen: Dict) -> Tuple[List[Dict], List[Dict]]:
+        if not records:
+            return [], []
+
+        # One query for every (parent phone, full_name) pair in the chunk, however the phone was typed
+        keys = list({RosterImportService.student_key(record) for record in records})
+        existing = {
+            (phone, name): unique_id
+            for phone, name, unique_id in db.query(
+                Student.parent_phone_normalized, Student.full_name, Student.unique_id
+            ).filter(tuple_(Student.parent_phone_normalized, Student.full_name).in_(keys))
+        }
+
+        errors = []
+        accepted = []
+        repeats = []  # Rows repeating an earlier row of this chunk, reported once it has an ID
+        chunk_keys = set()
+        for record in records:
+            key = RosterImportService.student_key(record)
+            duplicate_of = existing.get(key) or seen.get(key)
+            if duplicate_of:
+                errors.append(RosterImportService._student_exists(record, duplicate_of))
+            elif key in chunk_keys:
+                repeats.append(record)
+            else:
+                chunk_keys.add(key)
+                accepted.append(record)
+
+        if not accepted:
+            return [], errors
+
+        today = datetime.now().date()
+        unique_ids = UniqueIdGenerator.reserve_student_ids(db, len(accepted))
+        rows = []
+        for record, unique_id in zip(accepted, unique_ids):
+            row = {name: value for name, value in record.items() if name != "row"}
+            row["unique_id"] = unique_id
+            # No sections - only one section per class (7, 8, 9, 10)
+            row["section"] = None
+            row["admission_date"] = row["admission_date"] or today
+            rows.append(row)
+
+        try:
+            with db.begin_nested():
+                db.execute(insert(Student), rows)
+        except Exception as e:
+            errors.extend({"row": record["row"], "error": str(e)} for record in accepted + repeats)
+            return [], errors
+
+        for row in rows:
+            seen[RosterImportService.student_key(row)] = row["unique_id"]
+        errors.extend(
+            RosterImportService._student_exists(record, seen[RosterImportService.student_key(record)])
+            for record in repeats
+        )
+        return [{"name": row["full_name"], "phone": row["parent_phone"]} for row in rows], errors
+
+    @staticmethod
+    def student_key(record: Dict) -> Tuple[str, str]:
+        """Duplicate key for a parsed student: (normalized parent phone, full_name)"""
+        return record["parent_phone_normalized"] or record["parent_phone"], record["full_name"]
+
+    @staticmethod
+    def teacher_key(record: Dict) -> str:
+        """Duplicate key for a parsed teacher: the normalized phone number"""
+        return record["phone_normalized"] or record["phone_number"]
+
+    @staticmethod
+    def _student_exists(record: Dict, unique_id: str) -> Dict:
+        return {
+            "row": record["row"],
+            "error": f"Student '{record['full_name']}' with parent phone {record['parent_phone']} already exists (ID: {unique_id})"
+        }
+
+    @staticmethod
+    def import_teachers(db: Session, parsed: Dict) -> Dict:
+        """
+        Insert parsed teacher chunks with their login accounts (commits)
+
+        Returns:
+            Import summary, plus "created_users" credentials for the WhatsApp task
+        """
+        imported_teachers = []
+        created_users = []
+        errors = []
+        seen: Dict[str, str] = {}  # teacher_key / email -> unique_id, across chunks
+
+        for chunk in parsed["chunks"]:
+            imported, users, chunk_errors = RosterImportService.import_chunk(db, "teachers", chunk, seen)
+            imported_teachers.extend(imported)
+            created_users.extend(users)
+            errors.extend(chunk_errors)
+
+        db.commit()
+        return {
+            "message": f"Successfully imported {len(imported_teachers)} teachers",
+            "imported_count": len(imported_teachers),
+            "total_rows": parsed["total_rows"],
+            "imported_teachers": imported_teachers,
+            "errors": sorted(errors, key=lambda error: error["row"]) or None,
+            "created_users": created_users
+        }
+
+    @staticmethod
+    def _insert_teacher_chunk(db: Session, records: List[Dict], seen: Dict) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        if not records:
+            return [], [], []
+
+        phones = list({RosterImportService.teacher_key(record) for record in records})
+        emails = list({record["email"] for record in records})
+        usernames = list({record["username"] for record in records})
+
+        # One query each for clashing teachers and for existing login accounts
+        existing_teachers = {}
+        for phone, email, unique_id in db.query(Teacher.phone_number_normalized, Teacher.email, Teacher.unique_id).filter(
+            or_(Teacher.phone_number_normalized.in_(phones), Teacher.email.in_(emails))
+        ):
+            existing_teachers[phone] = unique_id
+            existing_teachers[email] = unique_id
+
+        existing_logins = set()
+        login_phones = list({record["phone_number"] for record in records})
+        for phone, email, username in db.query(User.phone_number, User.email, User.username).filter(
+            or_(User.phone_number.in_(login_phones), User.email.in_(emails), User.username.in_(usernames))
+        ):
+            existing_logins.update((phone, email, username))
+
+        errors = []
+        accepted = []
+        repeats = []  # Rows repeating an earlier row of this chunk, reported once it has an ID
+        chunk_keys = set()
+        for record in records:
+            error = RosterImportService._teacher_exists(record, existing_teachers, seen)
+            if error:
+                errors.append(error)
+            elif RosterImportService.teacher_key(record) in chunk_keys or record["email"] in chunk_keys:
+                repeats.append(record)
+            else:
+                chunk_keys.update((RosterImportService.teacher_key(record), record["email"]))
+                accepted.append(record)
+
+        if not accepted:
+            return [], [], errors
+
+        now = datetime.now()
+        unique_ids = UniqueIdGenerator.reserve_teacher_ids(db, len(accepted))
+        teacher_rows = []
+        new_logins = []
+        created_users = []
+        for record, unique_id in zip(accepted, unique_ids):
+            teacher_rows.append({
+                "unique_id": unique_id,
+                "first_name": record["first_name"],
+                "last_name": record["last_name"],
+                "full_name": record["full_name"],
+                "email": record["email"],
+                "phone_number": record["phone_number"],
+                "phone": record["phone_number"],  # Mobile login compatibility
+                "phone_normalized": record["phone_normalized"],
+                "phone_number_normalized": record["phone_normalized"],
+                "subjects": record["subjects"],
+                "classes_assigned": record["classes_assigned"],
+                "qualification": record["qualification"],
+                "experience_years": record["experience_years"],
+                "address": record["address"],
+                "emergency_contact": record["emergency_contact"],
+                "joining_date": record["joining_date"] or now
+            })
+
+            if existing_logins.intersection((record["phone_number"], record["email"], record["username"])):
+                continue
+            new_logins.append((record, unique_id))
+            created_users.append({
+                "name": record["full_name"],
+                "email": record["email"],
+                "username": record["username"],
+                "password": record["default_password"],
+                "phone_number": record["phone_number"]
+            })
+
+        # Hash in parallel first, so no row ever carries a plaintext password
+        hashed = hash_passwords([record["default_password"] for record, _ in new_logins])
+        user_rows = [
+            {
+                "unique_id": unique_id,  # Same as teacher unique_id
+                "email": record["email"],
+                "phone_number": record["phone_number"],
+                "username": record["username"],
+                "full_name": record["full_name"],
+                "hashed_password": hashed_password,
+                "role": UserRole.TEACHER,
+                "is_active": True,
+                "is_verified": True
+            }
+            for (record, unique_id), hashed_password in zip(new_logins, hashed)
+        ]
+
+        try:
+            with db.begin_nested():
+                db.execute(insert(Teacher), teacher_rows)
+                if user_rows:
+                    db.execute(insert(User), user_rows)
+        except Exception as e:
+            errors.extend({"row": record["row"], "error": str(e)} for record in accepted + repeats)
+            return [], [], errors
+
+        for record, row in zip(accepted, teacher_rows):
+            seen[RosterImportService.teacher_key(record)] = seen[row["email"]] = row["unique_id"]
+        errors.extend(RosterImportService._teacher_exists(record, {}, seen) for record in repeats)
+
+        imported = [{"name": row["full_name"], "phone": row["phone_number"]} for row in teacher_rows]
+        return imported, created_users, errors
+
+    @staticmethod
+    def _teacher_exists(record: Dict, existing: Dict, seen: Dict) -> Optional[Dict]:
+        """Error for a teacher whose phone or auto-generated email is already taken"""
+        key = RosterImportService.teacher_key(record)
+        duplicate_of = existing.get(key) or seen.get(key)
+        if duplicate_of:
+            return {
+                "row": record["row"],
+                "error": f"Teacher with phone number {record['phone_number']} already exists (ID: {duplicate_of})"
+            }
+        duplicate_of = existing.get(record["email"]) or seen.get(record["email"])
+        if duplicate_of:
+            return {
+                "row": record["row"],
+                "error": f"Teacher with email {record['email']} already exists (ID: {duplicate_of})"
+            }
+        return None
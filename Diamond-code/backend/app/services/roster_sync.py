@@ -0,0 +1,185 @@
+"""
+Roster Sync
+mode=sync imports: diff a full roster sheet against the database and apply
+only the inserts, updates and deactivations, instead of clear-all + re-import
+"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.principal_cache import invalidate_on_commit
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.user import User
+from app.services.roster_import import RosterImportService
+from app.utils.db import chunked
+
+# Columns the sheet owns; anything else (section, roll number, push tokens, ...) is left alone
+STUDENT_SYNC_FIELDS = [
+    "first_name", "last_name", "class_name", "date_of_birth", "gender",
+    "parent_name", "parent_email", "address", "emergency_contact"
+]
+TEACHER_SYNC_FIELDS = [
+    "first_name", "last_name", "full_name", "subjects", "classes_assigned",
+    "qualification", "experience_years", "address", "emergency_contact"
+]
+# Only overwritten when the sheet has a value (a blank cell means "keep")
+STUDENT_OPTIONAL_FIELDS = ["admission_date"]
+TEACHER_OPTIONAL_FIELDS = ["joining_date"]
+
+UPDATE_BATCH_SIZE = 1000
+
+
+class RosterSyncService:
+    """Make the students or teachers table match an uploaded roster"""
+
+    @staticmethod
+    def sync(db: Session, kind: str, parsed: Dict) -> Tuple[Dict, List[Dict], List[Dict]]:
+        """
+        Diff the sheet against the current roster and apply the delta (does not commit)
+
+        Students are matched on (normalized parent phone, full_name) and
+        teachers on their normalized phone number - the same keys the append
+        import de-duplicates on - so a number retyped with a country code or
+        spaces still matches its row.
+        Active rows missing from the sheet are deactivated, never deleted, so
+        their attendance history stays. If any row failed validation the sheet
+        is incomplete, so deactivation is skipped rather than guessing.
+
+        Returns:
+            (counts, row errors, created teacher login credentials)
+        """
+        errors = [error for chunk in parsed["chunks"] for error in chunk["errors"]]
+        incomplete = bool(errors)
+        records = [record for chunk in parsed["chunks"] for record in chunk["records"]]
+
+        if kind == "students":
+            model, key_of = Student, RosterImportService.student_key
+            current_key = key_of
+            fields, optional = STUDENT_SYNC_FIELDS, STUDENT_OPTIONAL_FIELDS
+        else:
+            model, key_of = Teacher, RosterImportService.teacher_key
+            current_key = lambda row: row["phone_number_normalized"] or row["phone_number"]
+            fields, optional = TEACHER_SYNC_FIELDS, TEACHER_OPTIONAL_FIELDS
+
+        current = RosterSyncService._load_current(db, model, fields + optional, current_key)
+
+        inserts = []
+        updates = []
+        updated_rows = []
+        reactivate = []
+        unchanged = 0
+        sheet_keys = set()
+        for record in records:
+            key = key_of(record)
+            if key in sheet_keys:
+                errors.append({"row": record["row"], "error": f"Duplicate of an earlier row in the sheet ({RosterSyncService._describe(kind, record)})"})
+                continue
+            sheet_keys.add(key)
+
+            existing = current.get(key)
+            if existing is None:
+                inserts.append(record)
+                continue
+
+            changes = {field: record[field] for field in fields if record[field] != existing[field]}
+            changes.update({
+                field: record[field] for field in optional
+                if record[field] is not None and RosterSyncService._differs(record[field], existing[field])
+            })
+            if existing["is_active"] == "Inactive":
+                reactivate.append(existing)
+            if changes:
+                updates.append({"id": existing["id"], **changes})
+                updated_rows.append(existing)
+            elif existing["is_active"] != "Inactive":
+                unchanged += 1
+
+        deactivate = [
+            row for key, row in current.items()
+            if key not in sheet_keys and row["is_active"] == "Active"
+        ]
+        deactivation_skipped = bool(deactivate) and (incomplete or not records)
+        if deactivation_skipped:
+            deactivate = []
+
+        RosterSyncService._apply_updates(db, model, updates)
+        RosterSyncService._set_active(db, kind, reactivate, True)
+        RosterSyncService._set_active(db, kind, deactivate, False)
+        if kind == "teachers":
+            RosterSyncService._invalidate_principals(db, updated_rows + reactivate + deactivate)
+
+        created_users = []
+        inserted = []
+        seen: Dict = {}
+        for batch in chunked(inserts, UPDATE_BATCH_SIZE):
+            if kind == "students":
+                imported, insert_errors = RosterImportService._insert_student_chunk(db, batch, seen)
+            else:
+                imported, users, insert_errors = RosterImportService._insert_teacher_chunk(db, batch, seen)
+                created_users.extend(users)
+            inserted.extend(imported)
+            errors.extend(insert_errors)
+
+        counts = {
+            "inserted": len(inserted),
+            "updated": len(updates),
+            "reactivated": len(reactivate),
+            "deactivated": len(deactivate),
+            "unchanged": unchanged,
+            "deactivation_skipped": deactivation_skipped
+        }
+        return {**counts, "imported": inserted}, errors, created_users
+
+    @staticmethod
+    def _load_current(db: Session, model, fields: List[str], key_of) -> Dict:
+        """The whole roster in one query, keyed like the sheet (first row wins for duplicates)"""
+        keys = ["parent_phone", "parent_phone_normalized"] if model is Student else ["phone_number", "phone_normalized", "phone_number_normalized"]
+        columns = ["id", "unique_id", "is_active", "full_name", *keys, *fields]
+        current = {}
+        for row in db.query(*(getattr(model, name) for name in dict.fromkeys(columns))):
+            row = row._asdict()
+            current.setdefault(key_of(row), row)
+        return current
+
+    @staticmethod
+    def _differs(sheet_value, stored_value) -> bool:
+        # Timezone-aware DateTime columns come back aware on PostgreSQL; the sheet's are naive
+        if isinstance(stored_value, datetime) and stored_value.tzinfo is not None:
+            stored_value = stored_value.replace(tzinfo=None)
+        return sheet_value != stored_value
+
+    @staticmethod
+    def _apply_updates(db: Session, model, updates: List[Dict]):
+        """Bulk UPDATE by primary key, one executemany per batch"""
+        for batch in chunked(updates, UPDATE_BATCH_SIZE):
+            db.execute(update(model), batch)
+
+    @staticmethod
+    def _set_active(db: Session, kind: str, rows: List[Dict], active: bool):
+        """Flip is_active for whole batches of rows; teachers' login accounts follow"""
+        model = Student if kind == "students" else Teacher
+        for batch in chunked(rows, UPDATE_BATCH_SIZE):
+            db.execute(
+                update(model).where(model.id.in_([row["id"] for row in batch])).values(
+                    is_active="Active" if active else "Inactive"
+                )
+            )
+            if kind == "teachers":
+                db.execute(
+                    update(User).where(User.unique_id.in_([row["unique_id"] for row in batch])).values(is_active=active)
+                )
+
+    @staticmethod
+    def _invalidate_principals(db: Session, rows: List[Dict]):
+        """Core UPDATEs skip the principal cache hooks: drop the cached teachers and their login accounts"""
+        invalidate_on_commit(db, "teacher", [
+            subject for row in rows for subject in (row["phone_normalized"], row["phone_number_normalized"])
+        ])
+        invalidate_on_commit(db, "user", [row["unique_id"] for row in rows])
+
+    @staticmethod
+    def _describe(kind: str, record: Dict) -> str:
+        if kind == "students":
+            return f"student '{record['full_name']}' with parent phone {record['parent_phone']}"
+        return f"teacher with phone number {record['phone_number']}"
@@ -1,45 +1,97 @@
+from typing import List
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.models.id_counter import IdCounter
 from app.models.user import User, UserRole
 from app.models.student import Student
 from app.models.teacher import Teacher
+from app.utils.db import dialect_insert
+
+# Counter name -> (ID prefix, table whose unique_ids seed the counter)
+ID_SERIES = {
+    "student": ("Diamond-STU", Student.__table__),
+    "teacher": ("Diamond-TCH", Teacher.__table__),
+    "admin": ("Diamond-ADM", User.__table__),
+    "parent": ("Diamond-PAR", User.__table__),
+}
+
 
 class UniqueIdGenerator:
     @staticmethod
-    def generate_student_id(db: Session) -> str:
-        """Generate unique ID for student: Diamond-STU-001, Diamond-STU-002, etc."""
-        last_student = db.query(Student).order_by(Student.id.desc()).first()
-        if last_student and last_student.unique_id:
-            # Extract number from last ID (Diamond-STU-001 -> 001)
-            last_number = int(last_student.unique_id.split('-')[-1])
-            new_number = last_number + 1
+    def reserve(db: Session, series: str, count: int = 1) -> List[str]:
+        """
+        Reserve `count` consecutive IDs of a series with one counter UPDATE
+
+        On PostgreSQL the counter is bumped on its own short transaction, so
+        the row lock is released at once and concurrent imports never wait on
+        each other's transactions; IDs of a rolled-back import are skipped,
+        never reused. SQLite serializes writers anyway, so there the bump joins
+        the session's transaction.
+        """
+        if count <= 0:
+            return []
+        prefix = ID_SERIES[series][0]
+
+        if db.get_bind().dialect.name == "postgresql":
+            with db.get_bind().begin() as connection:
+                last_value = UniqueIdGenerator._bump(db, connection, series, count)
         else:
-            new_number = 1
+            last_value = UniqueIdGenerator._bump(db, db.connection(), series, count)
 
-        return f"Diamond-STU-{new_number:03d}"
+        return [f"{prefix}-{number:03d}" for number in range(last_value - count + 1, last_value + 1)]
+
+    @staticmethod
+    def _bump(db: Session, connection, series: str, count: int) -> int:
+        counters = IdCounter.__table__
+        bump = counters.update().where(counters.c.name == series).values(
+            last_value=counters.c.last_value + count
+        ).returning(counters.c.last_value)
+
+        last_value = connection.execute(bump).scalar()
+        if last_value is None:
+            # First use of this series: start after the highest ID already issued
+            seed = dialect_insert(db, counters).values(
+                name=series,
+                last_value=UniqueIdGenerator._highest_issued(connection, series)
+            ).on_conflict_do_nothing(index_elements=[counters.c.name])
+            connection.execute(seed)
+            last_value = connection.execute(bump).scalar()
+        return last_value
+
+    @staticmethod
+    def _highest_issued(connection, series: str) -> int:
+        prefix, table = ID_SERIES[series]
+        highest = 0
+        for (unique_id,) in connection.execute(select(table.c.unique_id).where(table.c.unique_id.like(f"{prefix}-%"))):
+            suffix = unique_id.rsplit('-', 1)[-1]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        return highest
+
+    @staticmethod
+    def generate_student_id(db: Session) -> str:
+        """Generate unique ID for student: Diamond-STU-001, Diamond-STU-002, etc."""
+        return UniqueIdGenerator.reserve(db, "student")[0]
 
     @staticmethod
     def generate_teacher_id(db: Session) -> str:
         """Generate unique ID for teacher: Diamond-TCH-001, Diamond-TCH-002, etc."""
-        last_teacher = db.query(Teacher).order_by(Teacher.id.desc()).first()
-        if last_teacher and last_teacher.unique_id:
-            last_number = int(last_teacher.unique_id.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
+        return UniqueIdGenerator.reserve(db, "teacher")[0]
 
-        return f"Diamond-TCH-{new_number:03d}"
+    @staticmethod
+    def reserve_student_ids(db: Session, count: int) -> List[str]:
+        """Next `count` student IDs in one statement, for bulk imports"""
+        return UniqueIdGenerator.reserve(db, "student", count)
+
+    @staticmethod
+    def reserve_teacher_ids(db: Session, count: int) -> List[str]:
+        """Next `count` teacher IDs in one statement, for bulk imports"""
+        return UniqueIdGenerator.reserve(db, "teacher", count)
 
     @staticmethod
     def generate_admin_id(db: Session) -> str:
         """Generate unique ID for admin: Diamond-ADM-001, Diamond-ADM-002, etc."""
-        last_admin = db.query(User).filter(User.role == UserRole.ADMIN).order_by(User.id.desc()).first()
-        if last_admin and last_admin.unique_id:
-            last_number = int(last_admin.unique_id.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-
-        return f"Diamond-ADM-{new_number:03d}"
+        return UniqueIdGenerator.reserve(db, "admin")[0]
 
     @staticmethod
     def generate_user_id(role: UserRole, db: Session) -> str:
@@ -51,7 +103,6 @@ class UniqueIdGenerator:
         elif role == UserRole.STUDENT:
             return UniqueIdGenerator.generate_student_id(db)
         elif role == UserRole.PARENT:
-            # Parent IDs are based on student ID they're associated with
-            return f"Diamond-PAR-{db.query(User).filter(User.role == UserRole.PARENT).count() + 1:03d}"
+            return UniqueIdGenerator.reserve(db, "parent")[0]
         else:
-            raise ValueError(f"Invalid role: {role}")
\ No newline at end of file
+            raise ValueError(f"Invalid role: {role}")
@@ -0,0 +1,273 @@
+"""
+Unread Counter
+Per-recipient unread in-app message counts kept out of the database, so
+/messages/unread-count polls (and long-polls) do not run a COUNT per request.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.database import SessionLocal, redis_client
+from app.models.communication import Communication, MessageReceipt
+from app.utils.db import chunked
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "unread:"
+
+# Recipient IDs per grouped COUNT query / keys per Redis script call
+RECOUNT_CHUNK_SIZE = 500
+
+# Adds to the counters that exist and leaves the rest alone: a missing counter
+# is counted from SQL on its next read, so it must not start from zero here
+REDIS_ADD_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        if tonumber(redis.call('INCRBY', key, ARGV[1])) < 0 then
+            redis.call('SET', key, 0, 'KEEPTTL')
+        end
+    end
+end
+return 0
+"""
+
+Key = Tuple[str, int]  # (recipient_type, recipient_id)
+
+
+class UnreadCounter:
+    """
+    Unread counts per (recipient_type, recipient_id)
+
+    Sends add to the counters and mark-as-read subtracts, after the commit.
+    A counter is counted from message_receipts the first time it is read.
+    Counts live in Redis when UNREAD_COUNTER_USE_REDIS is on, so every worker
+    process shares them; otherwise they are kept in process, which is only
+    exact for a single worker. Either way they are reconciled from SQL every
+    UNREAD_COUNTER_RECONCILE_SECONDS: the in-process reconciler recounts
+    every cached counter, and Redis counters expire after that long, so they
+    are recounted on their next read. An update lost to a crash or another
+    process is therefore corrected within one interval.
+    """
+
+    def __init__(self, reconcile_interval: float, redis=None, session_factory=SessionLocal):
+        self.reconcile_interval = reconcile_interval
+        self.redis = redis
+        self.session_factory = session_factory
+        self._counts: Dict[Key, int] = {}
+        # Bumped on every change, so a recount that raced an update is discarded
+        self._versions: Dict[Key, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._waiters: Dict[Key, Set[asyncio.Future]] = defaultdict(set)
+        self._add_script = redis.register_script(REDIS_ADD_SCRIPT) if redis is not None else None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.hits = 0
+        self.misses = 0
+        self.reconciled = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def get(self, recipient_type: str, recipient_id: int) -> int:
+        """Current unread count, counted from SQL and cached on a miss"""
+        key = (recipient_type, recipient_id)
+        if self.redis is not None:
+            count = self._redis_get(key)
+            if count is not None:
+                self.hits += 1
+                return count
+            self.misses += 1
+            count = self._count_from_db(recipient_type, [recipient_id])[recipient_id]
+            self._redis_set(key, count)
+            return count
+
+        with self._lock:
+            count = self._counts.get(key)
+            version = self._versions[key]
+        if count is not None:
+            self.hits += 1
+            return count
+
+        self.misses += 1
+        count = self._count_from_db(recipient_type, [recipient_id])[recipient_id]
+        with self._lock:
+            if self._versions[key] == version:
+                self._counts[key] = count
+        return count
+
+    def add(self, recipient_type: str, recipient_ids: Iterable[int], delta: int):
+        """Add `delta` to each recipient's counter (call after the commit)"""
+        keys = [(recipient_type, recipient_id) for recipient_id in recipient_ids]
+        if not keys:
+            return
+        if self.redis is not None:
+            try:
+                for batch in chunked(keys, RECOUNT_CHUNK_SIZE):
+                    self._add_script(keys=[self._redis_key(key) for key in batch], args=[delta])
+            except Exception as e:
+                logger.warning(f"⚠️ Unread counter Redis update failed: {str(e)}")
+        else:
+            with self._lock:
+                for key in keys:
+                    self._versions[key] += 1
+                    if key in self._counts:
+                        self._counts[key] = max(0, self._counts[key] + delta)
+        self._notify(keys)
+
+    async def wait_for_change(self, recipient_type: str, recipient_id: int, since: int, timeout: float) -> int:
+        """
+        Long-poll: return the count once it differs from `since`, or after `timeout` seconds
+
+        Changes made in this process wake the waiter at once; the counter is
+        also re-read every UNREAD_LONG_POLL_CHECK_SECONDS for changes made by
+        other processes through Redis.
+        """
+        key = (recipient_type, recipient_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # Registered before reading, so a change in between still wakes us
+            future = loop.create_future()
+            self._waiters[key].add(future)
+            try:
+                count = self.get(recipient_type, recipient_id)
+                remaining = deadline - loop.time()
+                if count != since or remaining <= 0:
+                    return count
+                try:
+                    await asyncio.wait_for(future, min(remaining, settings.UNREAD_LONG_POLL_CHECK_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                self._waiters[key].discard(future)
+                if not self._waiters[key]:
+                    self._waiters.pop(key, None)
+
+    def reconcile(self) -> int:
+        """Recount every in-process counter from SQL, returns how many were corrected"""
+        with self._lock:
+            snapshot = {key: (count, self._versions[key]) for key, count in self._counts.items()}
+        by_type: Dict[str, List[int]] = defaultdict(list)
+        for recipient_type, recipient_id in snapshot:
+            by_type[recipient_type].append(recipient_id)
+
+        corrected = []
+        for recipient_type, recipient_ids in by_type.items():
+            for batch in chunked(recipient_ids, RECOUNT_CHUNK_SIZE):
+                counts = self._count_from_db(recipient_type, batch)
+                with self._lock:
+                    for recipient_id, count in counts.items():
+                        key = (recipient_type, recipient_id)
+                        cached, version = snapshot[key]
+                        # Skip counters updated while we were counting; the next pass checks them
+                        if cached != count and self._versions[key] == version and key in self._counts:
+                            self._counts[key] = count
+                            self._versions[key] += 1
+                            corrected.append(key)
+        if corrected:
+            self.reconciled += len(corrected)
+            logger.info(f"Unread counter reconciled {len(corrected)} counters")
+            self._notify(corrected)
+        return len(corrected)
+
+    def start(self):
+        """Start the periodic reconciler on the running event loop (not needed with Redis)"""
+        if self.redis is None and self.reconcile_interval > 0 and not self.running:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    async def run(self):
+        logger.info(f"Unread counter reconciler started (interval={self.reconcile_interval}s)")
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.reconcile_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping.is_set():
+                break
+            try:
+                await asyncio.to_thread(self.reconcile)
+            except Exception as e:
+                logger.error(f"❌ Unread counter reconcile failed: {str(e)}")
+        logger.info("Unread counter reconciler stopped")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "redis": self.redis is not None,
+            "counters": len(self._counts),
+            "waiters": sum(len(waiters) for waiters in self._waiters.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reconciled": self.reconciled,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _count_from_db(self, recipient_type: str, recipient_ids: List[int]) -> Dict[int, int]:
+        """Unread receipts per recipient, one grouped query"""
+        db = self.session_factory()
+        try:
+            rows = db.query(MessageReceipt.recipient_id, func.count(MessageReceipt.message_id)).join(
+                Communication, MessageReceipt.message_id == Communication.id
+            ).filter(
+                MessageReceipt.recipient_type == recipient_type,
+                MessageReceipt.recipient_id.in_(recipient_ids),
+                MessageReceipt.is_read == False,
+                Communication.message_type == "IN_APP"
+            ).group_by(MessageReceipt.recipient_id).all()
+        finally:
+            db.close()
+        counts = {recipient_id: 0 for recipient_id in recipient_ids}
+        counts.update({recipient_id: count for recipient_id, count in rows})
+        return counts
+
+    def _notify(self, keys: Iterable[Key]):
+        for key in keys:
+            for future in list(self._waiters.get(key, ())):
+                try:
+                    future.get_loop().call_soon_threadsafe(_wake, future)
+                except RuntimeError:
+                    # Event loop already closed
+                    pass
+
+    @staticmethod
+    def _redis_key(key: Key) -> str:
+        return f"{REDIS_KEY_PREFIX}{key[0]}:{key[1]}"
+
+    def _redis_get(self, key: Key) -> Optional[int]:
+        try:
+            raw = self.redis.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"⚠️ Unread counter Redis read failed: {str(e)}")
+            return None
+        return int(raw) if raw is not None else None
+
+    def _redis_set(self, key: Key, count: int):
+        try:
+            # nx: a counter another process created meanwhile has seen more updates than our count
+            self.redis.set(self._redis_key(key), count, ex=max(1, int(self.reconcile_interval)), nx=True)
+        except Exception as e:
+            logger.warning(f"⚠️ Unread counter Redis write failed: {str(e)}")
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+unread_counter = UnreadCounter(
+    reconcile_interval=settings.UNREAD_COUNTER_RECONCILE_SECONDS,
+    redis=redis_client if settings.UNREAD_COUNTER_USE_REDIS else None
+)
@@ -2,33 +2,98 @@
 WhatsApp Service using Twilio
 Simplified messaging for schools - just need to configure school WhatsApp number
 """
-from typing import List, Dict
+import asyncio
+from collections import Counter, defaultdict
+from typing import List, Dict, Optional, Tuple
+from aiohttp import ClientSession, TCPConnector
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from twilio.http.async_http_client import AsyncTwilioHttpClient
 from twilio.rest import Client
 from app.core.config import settings
 from app.models.whatsapp_chat import WhatsAppChat, ChatType
 from app.models.student import Student
 from app.models.communication import Communication
 from app.models.attendance import Attendance
+from app.utils.db import dialect_insert, chunked
 from datetime import datetime
 
+# Chat IDs per IN list / rows per multi-row INSERT (keeps bind params well under driver limits)
+CHAT_BATCH_SIZE = 500
+
+
+class SharedTwilioHttpClient(AsyncTwilioHttpClient):
+    """
+    Keep-alive HTTP transport shared by every Twilio API call in the process
+
+    One aiohttp session holds up to TWILIO_HTTP_POOL_SIZE open connections to
+    api.twilio.com, so sends skip the TCP/TLS handshake. aiohttp sessions
+    belong to an event loop, so the session is opened on first use inside the
+    running loop (and reopened if another loop uses the client).
+    """
+
+    def __init__(self, pool_size: int, timeout: float):
+        super().__init__(pool_connections=False, timeout=timeout)
+        self.pool_size = pool_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def request(self, method: str, url: str, *args, timeout: Optional[float] = None, **kwargs):
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self._loop is not loop:
+            self.session = ClientSession(connector=TCPConnector(limit=self.pool_size))
+            self._loop = loop
+        return await super().request(method, url, *args, timeout=timeout or self.timeout, **kwargs)
+
+    async def close(self):
+        if self.session and not self.session.closed and self._loop is asyncio.get_running_loop():
+            await self.session.close()
+        self.session = None
+
 
 class WhatsAppService:
-    def __init__(self):
+    """
+    Twilio WhatsApp messaging
+
+    Use the shared `whatsapp_service` instance: its Twilio client sends with
+    create_async over one keep-alive transport, so sends never block the
+    event loop and connections are reused across requests and workers.
+    """
+
+    def __init__(self, http_client: Optional[AsyncTwilioHttpClient] = None):
         """Initialize Twilio WhatsApp client"""
+        self.http_client = None
         if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
             print("⚠️  WARNING: Twilio credentials not configured. WhatsApp messaging disabled.")
             self.client = None
             return
 
+        self.http_client = http_client or SharedTwilioHttpClient(
+            pool_size=settings.TWILIO_HTTP_POOL_SIZE,
+            timeout=settings.TWILIO_HTTP_TIMEOUT_SECONDS
+        )
         self.client = Client(
             settings.TWILIO_ACCOUNT_SID,
-            settings.TWILIO_AUTH_TOKEN
+            settings.TWILIO_AUTH_TOKEN,
+            http_client=self.http_client
         )
         self.from_number = settings.TWILIO_WHATSAPP_NUMBER or "whatsapp:+14155238886"
         self.school_name = settings.SCHOOL_NAME or "Diamond Tutorials"
         self.school_contact = settings.SCHOOL_WHATSAPP_NUMBER or "+919380668711"
 
+    async def close(self):
+        """Close the keep-alive transport (on shutdown)"""
+        if self.http_client:
+            await self.http_client.close()
+
+    async def _send(self, to_number: str, body: str) -> Optional[str]:
+        """One Twilio API call over the shared transport, returns the message SID"""
+        message = await self.client.messages.create_async(
+            body=body,
+            from_=self.from_number,
+            to=to_number
+        )
+        return message.sid
+
     def _format_phone_number(self, phone: str) -> str:
         """Format phone number for WhatsApp (add whatsapp: prefix if needed)"""
         if not phone:
@@ -44,53 +109,89 @@ class WhatsAppService:
         # Add whatsapp: prefix
         return f"whatsapp:{phone}"
 
-    def _get_or_create_individual_chat(
-        self, phone_number: str, student_name: str, student_unique_id: str, db: Session
-    ) -> WhatsAppChat:
-        """Get or create individual chat session for daily attendance updates"""
-        chat = db.query(WhatsAppChat).filter(
-            WhatsAppChat.phone_number == phone_number,
-            WhatsAppChat.chat_type == ChatType.INDIVIDUAL,
-            WhatsAppChat.student_unique_id == student_unique_id
-        ).first()
-
-        if not chat:
-            chat = WhatsAppChat(
-                phone_number=phone_number,
-                chat_type=ChatType.INDIVIDUAL,
-                chat_id=f"individual_{phone_number}_{student_unique_id}",
-                student_name=student_name,
-                student_unique_id=student_unique_id,
-                is_active=True
-            )
-            db.add(chat)
-            db.commit()
-            db.refresh(chat)
-
-        return chat
-
-    def _get_or_create_announcement_chat(
-        self, phone_number: str, parent_name: str, db: Session
-    ) -> WhatsAppChat:
-        """Get or create announcement chat session for mass communications"""
-        chat = db.query(WhatsAppChat).filter(
-            WhatsAppChat.phone_number == phone_number,
-            WhatsAppChat.chat_type == ChatType.ANNOUNCEMENT
-        ).first()
-
-        if not chat:
-            chat = WhatsAppChat(
-                phone_number=phone_number,
-                chat_type=ChatType.ANNOUNCEMENT,
-                chat_id=f"announcement_{phone_number}",
-                parent_name=parent_name,
-                is_active=True
+    @staticmethod
+    def _individual_chat(phone_number: str, student_name: str, student_unique_id: str) -> Dict:
+        """Row for the individual chat used for a student's daily attendance updates"""
+        return {
+            "phone_number": phone_number,
+            "chat_type": ChatType.INDIVIDUAL,
+            "chat_id": f"individual_{phone_number}_{student_unique_id}",
+            "student_name": student_name,
+            "student_unique_id": student_unique_id
+        }
+
+    @staticmethod
+    def _announcement_chat(phone_number: str, parent_name: str) -> Dict:
+        """Row for the announcement chat used for mass communications"""
+        return {
+            "phone_number": phone_number,
+            "chat_type": ChatType.ANNOUNCEMENT,
+            "chat_id": f"announcement_{phone_number}",
+            "parent_name": parent_name
+        }
+
+    @staticmethod
+    def _ensure_chats(db: Session, chats: List[Dict]):
+        """
+        Create the chat rows that do not exist yet, without committing
+
+        One IN query finds the chat_ids already there; the rest go in with a
+        multi-row INSERT ... ON CONFLICT (chat_id) DO NOTHING, so a chat
+        created by a concurrent send in the meantime is not an error.
+        """
+        chats = list({chat["chat_id"]: chat for chat in chats}.values())
+        table = WhatsAppChat.__table__
+        existing = set()
+        for batch in chunked([chat["chat_id"] for chat in chats], CHAT_BATCH_SIZE):
+            existing.update(db.execute(select(table.c.chat_id).where(table.c.chat_id.in_(batch))).scalars())
+
+        missing = [
+            {**chat, "is_active": True, "messages_sent_count": 0}
+            for chat in chats if chat["chat_id"] not in existing
+        ]
+        for batch in chunked(missing, CHAT_BATCH_SIZE):
+            db.execute(
+                dialect_insert(db, table).values(batch).on_conflict_do_nothing(index_elements=[table.c.chat_id])
             )
-            db.add(chat)
-            db.commit()
-            db.refresh(chat)
 
-        return chat
+    @staticmethod
+    def _record_sent(db: Session, chat_ids: List[str], sent_at: datetime):
+        """
+        Count the messages sent on each chat, without committing
+
+        messages_sent_count is bumped in the database (SET count = count + n)
+        rather than read and written back, so concurrent senders do not lose
+        counts. Chats are grouped by n, one UPDATE per group and batch.
+        """
+        table = WhatsAppChat.__table__
+        by_count = defaultdict(list)
+        for chat_id, count in Counter(chat_ids).items():
+            by_count[count].append(chat_id)
+
+        for count, ids in by_count.items():
+            for batch in chunked(ids, CHAT_BATCH_SIZE):
+                db.execute(
+                    table.update().where(table.c.chat_id.in_(batch)).values(
+                        messages_sent_count=func.coalesce(table.c.messages_sent_count, 0) + count,
+                        last_message_sent=sent_at
+                    )
+                )
+
+    def _attendance_message(self, attendance_record: Attendance, student: Student) -> str:
+        """Daily attendance update text with school branding"""
+        status_emoji = "✅" if attendance_record.status.value == "present" else "❌"
+        message_text = f"""📚 {self.school_name} - Daily Update
+🏫 Contact: {self.school_contact}
+
+🎓 Student: {student.full_name} ({student.unique_id})
+📅 Date: {attendance_record.date.strftime('%d %b %Y')}
+{status_emoji} Attendance: {attendance_record.status.value.title()}"""
+
+        if attendance_record.remarks:
+            message_text += f"\n📝 Remarks: {attendance_record.remarks}"
+
+        message_text += f"\n\n💬 For queries, contact school at {self.school_contact}"
+        return message_text
 
     async def send_individual_attendance_message(
         self,
@@ -103,71 +204,97 @@ class WhatsAppService:
             print("❌ Twilio client not configured. Cannot send WhatsApp message.")
             return False
 
-        try:
-            # Get or create individual chat session
-            chat = self._get_or_create_individual_chat(
-                phone_number=student.parent_phone,
-                student_name=student.full_name,
-                student_unique_id=student.unique_id,
-                db=db
-            )
-
-            # Format attendance message with school branding
-            status_emoji = "✅" if attendance_record.status.value == "present" else "❌"
-            message_text = f"""📚 {self.school_name} - Daily Update
-🏫 Contact: {self.school_contact}
-
-🎓 Student: {student.full_name} ({student.unique_id})
-📅 Date: {attendance_record.date.strftime('%d %b %Y')}
-{status_emoji} Attendance: {attendance_record.status.value.title()}"""
-
-            if attendance_record.remarks:
-                message_text += f"\n📝 Remarks: {attendance_record.remarks}"
-
-            message_text += f"\n\n💬 For queries, contact school at {self.school_contact}"
+        attendance_id = attendance_record.id
+        results = await self.send_attendance_messages([(attendance_record, student)], db)
+        return results[attendance_id]
 
-            # Send message via Twilio WhatsApp
-            to_number = self._format_phone_number(student.parent_phone)
-
-            print(f"📤 Sending WhatsApp to {student.parent_phone} ({student.full_name})...")
-
-            message = self.client.messages.create(
-                body=message_text,
-                from_=self.from_number,
-                to=to_number
-            )
-
-            if message.sid:
-                # Update chat and communication records
-                chat.last_message_sent = datetime.utcnow()
-                chat.messages_sent_count += 1
-
-                # Create communication record
-                communication = Communication(
-                    sender_id=1,  # System/Admin user
-                    student_id=student.id,
-                    message=message_text,
-                    message_type="WHATSAPP",
-                    whatsapp_chat_id=chat.chat_id,
-                    whatsapp_chat_type="individual",
-                    recipient_phone_numbers=[student.parent_phone],
-                    is_sent=True,
-                    sent_at=datetime.utcnow(),
-                    delivery_status="sent"
-                )
-
-                db.add(communication)
-                db.commit()
-
-                print(f"✅ WhatsApp sent successfully! SID: {message.sid}")
-                return True
-            else:
-                print(f"❌ Failed to send WhatsApp message")
-                return False
+    async def send_attendance_messages(
+        self,
+        records: List[Tuple[Attendance, Student]],
+        db: Session,
+        concurrency: Optional[int] = None,
+        commit: bool = True
+    ) -> Dict[int, bool]:
+        """
+        Send attendance updates for a batch of approved records
+
+        The parents' individual chats are created and committed up front, so
+        no transaction is open while the messages go out concurrently (at
+        most `concurrency`, by default WHATSAPP_SEND_CONCURRENCY, in flight).
+        The chat counters and communication rows for the ones that were sent
+        are written afterwards in one short transaction, committed here or,
+        with commit=False, by the caller along with its own results.
+
+        The records are expired by the chat commit; everything the sends and
+        the bookkeeping need is read from them beforehand.
+
+        Returns:
+            {attendance_id: sent}
+        """
+        if not self.client:
+            print("❌ Twilio client not configured. Cannot send WhatsApp messages.")
+            return {attendance_record.id: False for attendance_record, _ in records}
+
+        targets = []
+        for attendance_record, student in records:
+            targets.append({
+                "attendance_id": attendance_record.id,
+                "student_id": student.id,
+                "parent_phone": student.parent_phone,
+                "student_name": student.full_name,
+                "chat": self._individual_chat(student.parent_phone, student.full_name, student.unique_id),
+                "message": self._attendance_message(attendance_record, student)
+            })
 
+        try:
+            self._ensure_chats(db, [target["chat"] for target in targets])
+            db.commit()
         except Exception as e:
-            print(f"❌ Error sending WhatsApp message: {str(e)}")
-            return False
+            db.rollback()
+            print(f"❌ Error creating WhatsApp chats: {str(e)}")
+            return {target["attendance_id"]: False for target in targets}
+
+        semaphore = asyncio.Semaphore(concurrency or settings.WHATSAPP_SEND_CONCURRENCY)
+
+        async def send(target: Dict) -> Optional[str]:
+            async with semaphore:
+                try:
+                    print(f"📤 Sending WhatsApp to {target['parent_phone']} ({target['student_name']})...")
+                    return await self._send(self._format_phone_number(target["parent_phone"]), target["message"])
+                except Exception as e:
+                    print(f"❌ Error sending WhatsApp message to {target['parent_phone']}: {str(e)}")
+                    return None
+
+        sids = await asyncio.gather(*(send(target) for target in targets))
+
+        results = {}
+        sent_chat_ids = []
+        sent_at = datetime.utcnow()
+        for target, sid in zip(targets, sids):
+            results[target["attendance_id"]] = bool(sid)
+            if not sid:
+                continue
+
+            sent_chat_ids.append(target["chat"]["chat_id"])
+            db.add(Communication(
+                sender_id=1,  # System/Admin user
+                student_id=target["student_id"],
+                message=target["message"],
+                message_type="WHATSAPP",
+                whatsapp_chat_id=target["chat"]["chat_id"],
+                whatsapp_chat_type="individual",
+                recipient_phone_numbers=[target["parent_phone"]],
+                is_sent=True,
+                sent_at=sent_at,
+                delivery_status="sent"
+            ))
+            print(f"✅ WhatsApp sent successfully! SID: {sid}")
+
+        if sent_chat_ids:
+            self._record_sent(db, sent_chat_ids, sent_at)
+        if commit:
+            db.commit()
+        return results
 
     async def send_mass_communication(
         self,
@@ -177,26 +304,19 @@ class WhatsAppService:
         parent_names: List[str],
         db: Session
     ) -> Dict[str, int]:
-        """Send mass communication via WhatsApp using Twilio"""
+        """
+        Send mass communication via WhatsApp using Twilio
+
+        Messages go out concurrently, at most WHATSAPP_SEND_CONCURRENCY Twilio
+        calls in flight, and the chat counters and communication rows for the
+        ones that were sent are written afterwards in one commit.
+        """
         if not self.client:
             print("❌ Twilio client not configured. Cannot send WhatsApp messages.")
             return {"sent": 0, "failed": len(phone_numbers)}
 
-        results = {"sent": 0, "failed": 0}
-
-        for i, phone_number in enumerate(phone_numbers):
-            try:
-                parent_name = parent_names[i] if i < len(parent_names) else "Parent"
-
-                # Get or create announcement chat session
-                chat = self._get_or_create_announcement_chat(
-                    phone_number=phone_number,
-                    parent_name=parent_name,
-                    db=db
-                )
-
-                # Format announcement message with school branding
-                message_text = f"""📢 {self.school_name} - Announcement
+        # Format announcement message with school branding
+        message_text = f"""📢 {self.school_name} - Announcement
 🏫 Contact: {self.school_contact}
 
 📋 {title}
@@ -205,49 +325,57 @@ class WhatsAppService:
 
 💬 For queries, contact us at {self.school_contact}"""
 
-                # Send message via Twilio WhatsApp
-                to_number = self._format_phone_number(phone_number)
-
-                print(f"📤 Sending announcement to {phone_number}...")
+        # Create the missing announcement chats in one pass (the session is not shared with the sends below)
+        chats = [
+            self._announcement_chat(phone_number, parent_names[i] if i < len(parent_names) else "Parent")
+            for i, phone_number in enumerate(phone_numbers)
+        ]
+        self._ensure_chats(db, chats)
+        db.commit()
 
-                twilio_message = self.client.messages.create(
-                    body=message_text,
-                    from_=self.from_number,
-                    to=to_number
-                )
+        semaphore = asyncio.Semaphore(settings.WHATSAPP_SEND_CONCURRENCY)
 
-                if twilio_message.sid:
-                    # Update chat record
-                    chat.last_message_sent = datetime.utcnow()
-                    chat.messages_sent_count += 1
-
-                    # Create communication record
-                    communication = Communication(
-                        sender_id=1,  # System/Admin user
-                        subject=title,
-                        message=message_text,
-                        message_type="WHATSAPP",
-                        whatsapp_chat_id=chat.chat_id,
-                        whatsapp_chat_type="announcement",
-                        recipient_phone_numbers=[phone_number],
-                        is_bulk=True,
-                        is_sent=True,
-                        sent_at=datetime.utcnow(),
-                        delivery_status="sent"
-                    )
+        async def send(phone_number: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    return await self._send(self._format_phone_number(phone_number), message_text)
+                except Exception as e:
+                    print(f"❌ Error sending WhatsApp message to {phone_number}: {str(e)}")
+                    return None
 
-                    db.add(communication)
-                    results["sent"] += 1
-                    print(f"✅ Sent to {phone_number}")
-                else:
-                    results["failed"] += 1
-                    print(f"❌ Failed to send to {phone_number}")
+        print(f"📤 Sending announcement to {len(phone_numbers)} numbers...")
+        sids = await asyncio.gather(*(send(phone_number) for phone_number in phone_numbers))
 
-            except Exception as e:
-                print(f"❌ Error sending WhatsApp message to {phone_number}: {str(e)}")
+        results = {"sent": 0, "failed": 0}
+        sent_chat_ids = []
+        sent_at = datetime.utcnow()
+        for phone_number, chat, sid in zip(phone_numbers, chats, sids):
+            if not sid:
                 results["failed"] += 1
+                continue
+
+            sent_chat_ids.append(chat["chat_id"])
+            # Create communication record
+            communication = Communication(
+                sender_id=1,  # System/Admin user
+                subject=title,
+                message=message_text,
+                message_type="WHATSAPP",
+                whatsapp_chat_id=chat["chat_id"],
+                whatsapp_chat_type="announcement",
+                recipient_phone_numbers=[phone_number],
+                is_bulk=True,
+                is_sent=True,
+                sent_at=sent_at,
+                delivery_status="sent"
+            )
+            db.add(communication)
+            results["sent"] += 1
 
+        if sent_chat_ids:
+            self._record_sent(db, sent_chat_ids, sent_at)
         db.commit()
+        print(f"✅ Announcement sent to {results['sent']} numbers, {results['failed']} failed")
         return results
 
     async def send_teacher_credentials(
@@ -284,13 +412,9 @@ class WhatsAppService:
 
             print(f"📤 Sending credentials to {teacher_name} at {phone_number}...")
 
-            message = self.client.messages.create(
-                body=message_text,
-                from_=self.from_number,
-                to=to_number
-            )
+            sid = await self._send(to_number, message_text)
 
-            if message.sid:
+            if sid:
                 print(f"✅ Credentials sent to {teacher_name} at {phone_number}")
                 return True
             else:
@@ -300,3 +424,6 @@ class WhatsAppService:
         except Exception as e:
             print(f"❌ Error sending teacher credentials: {str(e)}")
             return False
+
+
+whatsapp_service = WhatsAppService()
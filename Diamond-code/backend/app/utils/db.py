@@ -0,0 +1,24 @@
+"""
+Database helpers shared by the bulk write paths
+"""
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table):
+    """
+    Build an INSERT for the session's dialect that supports ON CONFLICT
+
+    PostgreSQL is used in production and SQLite for local development; both
+    dialects expose on_conflict_do_update / on_conflict_do_nothing.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def chunked(items: list, size: int):
+    """Yield successive slices of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
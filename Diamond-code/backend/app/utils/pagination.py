@@ -0,0 +1,172 @@
+"""
+Keyset pagination helpers
+Cursors are opaque to clients: a URL-safe base64 of the last row's sort key.
+Paging is opt-in: without `cursor` or `limit` a list endpoint returns every
+row as before. Once a client sends either, it gets pages of `limit` rows
+(DEFAULT_PAGE_SIZE when only a cursor is sent), still as a plain JSON list,
+with the next page's cursor in the X-Next-Cursor header.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row on a page"""
+    raw = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List:
+    """Decode a cursor from encode_cursor; raises ValueError if it was tampered with"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+class ResponseField:
+    """A response field: the model columns it needs and how to render it from a row"""
+
+    def __init__(self, columns, render: Optional[Callable] = None):
+        self.columns = list(columns) if isinstance(columns, (list, tuple)) else [columns]
+        if render is None:
+            key = self.columns[0].key
+            render = lambda obj: getattr(obj, key)
+        self.render = render
+
+
+class PageParams:
+    """
+    Query parameters shared by every paginated list endpoint
+
+    Use as `page: PageParams = Depends()`. `fields` is a comma-separated
+    subset of the endpoint's response fields; only the columns those fields
+    need are loaded. `limit` is None when the client asked for no paging.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit with cursor for all rows"),
+        fields: Optional[str] = Query(None, description="Comma-separated list of fields to return")
+    ):
+        self.cursor = cursor
+        if limit is None and cursor:
+            limit = DEFAULT_PAGE_SIZE
+        self.limit = limit
+        self.requested_fields = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+    def select_fields(self, spec: Dict[str, ResponseField]) -> List[str]:
+        """Requested field names (all of them by default); 400 on unknown names"""
+        if not self.requested_fields:
+            return list(spec)
+        unknown = [name for name in self.requested_fields if name not in spec]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(spec)}"
+            )
+        return self.requested_fields
+
+    @staticmethod
+    def load_only(spec: Dict[str, ResponseField], fields: List[str], *always):
+        """load_only() option for the columns behind `fields` plus any sort columns in `always`"""
+        columns = {}
+        for name in fields:
+            for column in spec[name].columns:
+                columns[column.key] = column
+        for column in always:
+            columns[column.key] = column
+        return load_only(*columns.values())
+
+    @staticmethod
+    def render(obj, spec: Dict[str, ResponseField], fields: List[str]) -> Dict:
+        return {name: spec[name].render(obj) for name in fields}
+
+
+def paginate(
+    query,
+    page: PageParams,
+    order_by: Sequence[Tuple[object, bool]],
+    key: Callable[[object], tuple],
+    response: Optional[Response] = None
+) -> Tuple[list, Optional[str]]:
+    """
+    Apply keyset pagination to `query`
+
+    Args:
+        order_by: (expression, descending) pairs, the last one must be unique (usually the id)
+        key: Returns the sort key values of a row, in order_by order
+        response: If given, the next cursor is set on its X-Next-Cursor header
+
+    Returns:
+        (rows on this page, cursor for the next page or None)
+    """
+    if page.cursor:
+        try:
+            values = decode_cursor(page.cursor)
+            if len(values) != len(order_by):
+                raise ValueError("Invalid cursor")
+            values = [_coerce(expression, value) for (expression, _), value in zip(order_by, values)]
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(_after(order_by, values))
+
+    query = query.order_by(*[
+        expression.desc() if descending else expression.asc()
+        for expression, descending in order_by
+    ])
+
+    if page.limit is None:
+        # Unpaged request: every row, in the same order
+        return query.all(), None
+
+    # One extra row tells us whether there is a next page
+    rows = query.limit(page.limit + 1).all()
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(*key(rows[-1]))
+
+    if response is not None and next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows, next_cursor
+
+
+def _after(order_by: Sequence[Tuple[object, bool]], values: list):
+    """Rows strictly after the cursor in (a, b, ...) lexicographic order"""
+    clauses = []
+    for index, (expression, descending) in enumerate(order_by):
+        equal_prefix = [order_by[i][0] == values[i] for i in range(index)]
+        beyond = expression < values[index] if descending else expression > values[index]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def _coerce(expression, value):
+    """Turn a JSON cursor value back into the expression's Python type"""
+    if value is None:
+        raise ValueError("Invalid cursor")
+    try:
+        python_type = expression.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
@@ -0,0 +1,37 @@
+"""
+Phone number normalization
+Every phone lookup goes through normalize_phone so one equality probe on an
+indexed *_normalized column matches however the number was typed
+"""
+import re
+from typing import Optional
+
+DEFAULT_COUNTRY_CODE = "91"  # India
+
+
+def normalize_phone(phone: Optional[str], default_country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    Convert a phone number to E.164 (+919876543210)
+
+    Accepts the formats seen in our data: "9876543210", "+919876543210",
+    "+91-98765 43210", "919876543210", "09876543210" and "whatsapp:+91...".
+    Returns None when there are no digits to work with.
+    """
+    if phone is None:
+        return None
+
+    phone = str(phone).strip().replace("whatsapp:", "")
+    has_plus = phone.startswith("+")
+    digits = re.sub(r"\D", "", phone)
+    if not digits:
+        return None
+
+    if has_plus:
+        return f"+{digits}"
+    if len(digits) == 10:
+        return f"+{default_country_code}{digits}"
+    if len(digits) == 11 and digits.startswith("0"):
+        return f"+{default_country_code}{digits[1:]}"
+    if len(digits) == 10 + len(default_country_code) and digits.startswith(default_country_code):
+        return f"+{digits}"
+    return f"+{digits}"
@@ -0,0 +1,111 @@
+"""
+Attendance register parsing for historical backfills
+A wide register has one row per student (unique_id) and one column per date.
+Runs in the roster parser pool like roster_parser, so it only depends on
+pandas/openpyxl and must not import the database layer.
+"""
+import re
+from typing import Dict, Optional
+from datetime import date
+
+import pandas as pd
+
+from app.utils.roster_parser import iter_frames
+
+# Register marks -> AttendanceStatus values
+STATUS_CODES = {
+    "p": "present", "present": "present",
+    "a": "absent", "ab": "absent", "absent": "absent",
+    "l": "late", "late": "late",
+    "lv": "leave", "leave": "leave",
+}
+
+# Headers that are dates: ISO (xlsx date headers arrive as "2025-06-02 00:00:00") or day-first d/m/y
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+DAY_FIRST_DATE = re.compile(r"^\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}$")
+
+READ_CHUNK_ROWS = 5000
+
+
+def _clean(series: pd.Series) -> pd.Series:
+    """Stripped strings with None for blank cells"""
+    text = series.astype("string").str.strip()
+    return text.mask(text == "")
+
+
+def register_date(header: str) -> Optional[date]:
+    """The date a register column stands for, or None for other columns (name, class, ...)"""
+    header = header.strip()
+    if ISO_DATE.match(header):
+        parsed = pd.to_datetime(header[:10], format="%Y-%m-%d", errors="coerce")
+    elif DAY_FIRST_DATE.match(header):
+        parsed = pd.to_datetime(header, dayfirst=True, errors="coerce")
+    else:
+        return None
+    return None if pd.isna(parsed) else parsed.date()
+
+
+def parse_register(path: str, filename: str) -> Dict:
+    """
+    Melt a wide register into one (unique_id, date, status) row per marked cell
+
+    Blank cells are days without a record. Unknown marks and rows without a
+    unique_id are reported per cell; a student listed twice keeps the first
+    row's marks. Two headers for the same date are rejected as a header error.
+
+    Returns:
+        {"students", "dates", "unique_ids", "dates_marked", "statuses", "errors"} - columns as lists
+    """
+    frames = list(iter_frames(path, filename, READ_CHUNK_ROWS))
+    if not frames:
+        raise ValueError("The register is empty")
+    wide = pd.concat(frames)
+    if "unique_id" not in wide.columns:
+        raise ValueError("The register needs a unique_id column")
+
+    date_columns = {column: register_date(str(column)) for column in wide.columns if column != "unique_id"}
+    date_columns = {column: day for column, day in date_columns.items() if day is not None}
+    if not date_columns:
+        raise ValueError("No date columns found - use headers like 2025-06-02 or 02/06/2025")
+    columns_by_date: Dict[date, list] = {}
+    for column, day in date_columns.items():
+        columns_by_date.setdefault(day, []).append(str(column))
+    repeated_dates = [" and ".join(columns) for columns in columns_by_date.values() if len(columns) > 1]
+    if repeated_dates:
+        raise ValueError(f"Several columns are the same date: {'; '.join(repeated_dates)}")
+
+    wide = wide[["unique_id", *date_columns]].copy()
+    wide["unique_id"] = _clean(wide["unique_id"])
+    long = wide.rename_axis("row").reset_index().melt(
+        id_vars=["row", "unique_id"], var_name="column", value_name="mark"
+    )
+    long["mark"] = _clean(long["mark"]).str.lower()
+    long = long[long["mark"].notna()]
+    long["status"] = long["mark"].map(STATUS_CODES)
+    long["date"] = long["column"].map(date_columns)
+
+    errors = []
+    no_id = long["unique_id"].isna()
+    errors.extend({"row": int(row), "error": "Missing unique_id"} for row in long.loc[no_id, "row"].unique())
+    unknown = long["status"].isna() & ~no_id
+    errors.extend(
+        {"row": int(row), "error": f"Unknown mark '{mark}' for {column} (use P, A, L or LV)"}
+        for row, column, mark in long.loc[unknown, ["row", "column", "mark"]].itertuples(index=False)
+    )
+
+    marked = long[~no_id & ~unknown]
+    repeated = marked.duplicated(subset=["unique_id", "date"])
+    errors.extend(
+        {"row": int(row), "error": f"{unique_id} is listed more than once; this row was skipped"}
+        for row, unique_id in marked.loc[repeated, ["row", "unique_id"]].drop_duplicates().itertuples(index=False)
+    )
+    marked = marked[~repeated]
+
+    return {
+        "students": int(wide["unique_id"].nunique()),
+        "dates": len(date_columns),
+        "unique_ids": marked["unique_id"].tolist(),
+        "dates_marked": marked["date"].tolist(),
+        "statuses": marked["status"].tolist(),
+        "errors": sorted(errors, key=lambda error: error["row"])
+    }
@@ -0,0 +1,273 @@
+"""
+Roster file parsing and validation for bulk imports
+Runs in a worker process (see app/services/roster_import.py), so it only
+depends on pandas/openpyxl and must not import the database layer.
+"""
+import csv
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from app.utils.phone import normalize_phone
+
+STUDENT_COLUMNS = {
+    "required": ["first_name", "last_name", "class_name", "parent_phone"],
+    "text": ["first_name", "last_name", "class_name", "gender", "parent_name", "parent_email", "address"],
+    "phones": ["parent_phone", "emergency_contact"],
+    "dates": ["date_of_birth", "admission_date"],
+    "integers": []
+}
+
+TEACHER_COLUMNS = {
+    "required": ["first_name", "last_name", "phone_number"],
+    "text": ["first_name", "last_name", "subjects", "classes_assigned", "qualification", "address"],
+    "phones": ["phone_number", "emergency_contact"],
+    "dates": ["joining_date"],
+    "integers": ["experience_years"]
+}
+
+ROSTER_COLUMNS = {"students": STUDENT_COLUMNS, "teachers": TEACHER_COLUMNS}
+
+
+def iter_xlsx_frames(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream the first sheet of an .xlsx file as DataFrames of `chunk_size` rows
+
+    openpyxl's read-only mode parses the sheet XML lazily, so memory stays
+    proportional to one chunk rather than the whole workbook. The index of
+    each frame is the spreadsheet row number, for error messages.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name).strip() if name is not None else f"column_{i}" for i, name in enumerate(header)]
+
+        records, row_numbers = [], []
+        for row_number, values in enumerate(rows, start=2):
+            # Formatted but empty rows are common at the end of a sheet
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in values):
+                continue
+            records.append(values)
+            row_numbers.append(row_number)
+            if len(records) >= chunk_size:
+                yield pd.DataFrame.from_records(records, columns=columns, index=row_numbers)
+                records, row_numbers = [], []
+        if records:
+            yield pd.DataFrame.from_records(records, columns=columns, index=row_numbers)
+    finally:
+        workbook.close()
+
+
+def iter_csv_frames(path: str, chunk_size: int, skip_chunks: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Stream a .csv file as DataFrames of `chunk_size` rows
+
+    Rows are read one at a time with the csv module, so memory stays
+    proportional to one chunk whatever the file size. The first `skip_chunks`
+    chunks are read past without building frames (resuming an import). The
+    index is the row number a spreadsheet shows for the line, header = 1.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        rows = csv.reader(source)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [name.strip() or f"column_{i}" for i, name in enumerate(header)]
+        width = len(columns)
+
+        records, row_numbers = [], []
+        chunk_index = 0
+        for row_number, values in enumerate(rows, start=2):
+            if not any(value.strip() for value in values):
+                continue
+            if chunk_index >= skip_chunks:
+                # Ragged lines: pad missing trailing cells, drop extra ones
+                records.append(values[:width] + [None] * (width - len(values)))
+            row_numbers.append(row_number)
+            if len(row_numbers) >= chunk_size:
+                if chunk_index >= skip_chunks:
+                    yield pd.DataFrame.from_records(records, columns=columns, index=row_numbers)
+                records, row_numbers = [], []
+                chunk_index += 1
+        if records:
+            yield pd.DataFrame.from_records(records, columns=columns, index=row_numbers)
+
+
+def count_csv_rows(path: str) -> int:
+    """Non-blank data rows of a .csv file, for progress reporting before it is imported"""
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        rows = csv.reader(source)
+        next(rows, None)
+        return sum(1 for values in rows if any(value.strip() for value in values))
+
+
+def iter_excel_frames(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Legacy .xls files: no streaming reader, so load once and slice"""
+    df = pd.read_excel(path)
+    df.index = df.index + 2
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _text(series: pd.Series) -> pd.Series:
+    """Stripped strings with None for blanks; integral floats lose their ".0" (phones typed as numbers)"""
+    text = series.astype("string").str.strip()
+    text = text.str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+    return text.mask(text == "")
+
+
+def _nullable(series: pd.Series) -> list:
+    """pandas NA -> None, for pickling and the database driver"""
+    return [None if pd.isna(value) else value for value in series.tolist()]
+
+
+def validate_frame(df: pd.DataFrame, kind: str) -> Tuple[pd.DataFrame, List[Dict]]:
+    """
+    Vectorized required-field and type checks for one chunk
+
+    Returns:
+        (cleaned frame of valid rows, [{"row", "error"}] for rejected rows)
+    """
+    spec = ROSTER_COLUMNS[kind]
+    df = df.copy()
+    for column in set(spec["required"]) | set(spec["text"]) | set(spec["phones"]) | set(spec["dates"]) | set(spec["integers"]):
+        if column not in df.columns:
+            df[column] = None
+
+    clean = pd.DataFrame(index=df.index)
+    for column in set(spec["text"]) | set(spec["phones"]):
+        clean[column] = _text(df[column])
+
+    errors = pd.Series("", index=df.index, dtype="object")
+
+    missing = pd.DataFrame({column: clean[column].isna() for column in spec["required"]})
+    has_missing = missing.any(axis=1)
+    if has_missing.any():
+        missing_names = missing.apply(lambda row: ", ".join(row.index[row]), axis=1)
+        errors[has_missing] = "Missing required fields: " + missing_names[has_missing]
+
+    for column in spec["dates"]:
+        raw = df[column].where(df[column].notna() & (df[column].astype("string").str.strip() != ""))
+        parsed = pd.to_datetime(raw, errors="coerce", format="mixed")
+        invalid = raw.notna() & parsed.isna() & (errors == "")
+        errors[invalid] = f"Invalid {column}: " + raw[invalid].astype(str)
+        clean[column] = parsed
+
+    for column in spec["integers"]:
+        raw = df[column].where(df[column].notna() & (df[column].astype("string").str.strip() != ""))
+        parsed = pd.to_numeric(raw, errors="coerce")
+        invalid = raw.notna() & (parsed.isna() | (parsed % 1 != 0)) & (errors == "")
+        errors[invalid] = f"Invalid {column}: " + raw[invalid].astype(str)
+        clean[column] = parsed
+
+    rejected = errors != ""
+    error_list = [{"row": int(row), "error": message} for row, message in errors[rejected].items()]
+    return clean[~rejected], error_list
+
+
+def student_records(clean: pd.DataFrame) -> List[Dict]:
+    """Validated student rows -> column dicts (unique_id and defaults are added by the importer)"""
+    full_name = clean["first_name"] + " " + clean["last_name"]
+    columns = {
+        "row": clean.index.tolist(),
+        "first_name": _nullable(clean["first_name"]),
+        "last_name": _nullable(clean["last_name"]),
+        "full_name": _nullable(full_name),
+        "class_name": _nullable(clean["class_name"]),
+        "date_of_birth": _dates(clean["date_of_birth"]),
+        "gender": _nullable(clean["gender"].fillna("")),
+        "parent_name": _nullable(clean["parent_name"].fillna("")),
+        "parent_phone": _nullable(clean["parent_phone"]),
+        "parent_phone_normalized": [normalize_phone(phone) for phone in clean["parent_phone"].tolist()],
+        "parent_email": _nullable(clean["parent_email"].fillna("")),
+        "address": _nullable(clean["address"].fillna("")),
+        "emergency_contact": _nullable(clean["emergency_contact"].fillna("")),
+        "admission_date": _dates(clean["admission_date"])
+    }
+    return _rows(columns, len(clean))
+
+
+def teacher_records(clean: pd.DataFrame) -> List[Dict]:
+    """Validated teacher rows -> column dicts, including the derived login fields"""
+    digits = clean["phone_number"].str.replace(r"\D", "", regex=True)
+    last_ten = digits.str[-10:]
+    columns = {
+        "row": clean.index.tolist(),
+        "first_name": _nullable(clean["first_name"]),
+        "last_name": _nullable(clean["last_name"]),
+        "full_name": _nullable(clean["first_name"] + " " + clean["last_name"]),
+        "phone_number": _nullable(clean["phone_number"]),
+        "phone_normalized": [normalize_phone(phone) for phone in clean["phone_number"].tolist()],
+        # Auto-generated email and username from the last 10 digits of the phone
+        "email": _nullable("teacher_" + last_ten + "@avm.com"),
+        "username": _nullable("teacher_" + last_ten),
+        # Default password is the last 4 digits of the phone
+        "default_password": _nullable(digits.str[-4:].where(digits.str.len() >= 4, "1234")),
+        "subjects": _split_list(clean["subjects"]),
+        "classes_assigned": _split_list(clean["classes_assigned"]),
+        "qualification": _nullable(clean["qualification"].fillna("")),
+        "experience_years": [0 if pd.isna(value) else int(value) for value in clean["experience_years"].tolist()],
+        "address": _nullable(clean["address"].fillna("")),
+        "emergency_contact": _nullable(clean["emergency_contact"].fillna("")),
+        "joining_date": [None if pd.isna(value) else value.to_pydatetime() for value in clean["joining_date"].tolist()]
+    }
+    return _rows(columns, len(clean))
+
+
+def _dates(series: pd.Series) -> List[Optional[date]]:
+    return [None if pd.isna(value) else value.date() for value in series.tolist()]
+
+
+def _split_list(series: pd.Series) -> List[List[str]]:
+    """Comma-separated cell -> list of stripped, non-empty items"""
+    parts = series.fillna("").str.split(",")
+    return [[item.strip() for item in items if item.strip()] for items in parts.tolist()]
+
+
+def _rows(columns: Dict[str, list], count: int) -> List[Dict]:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))] if count else []
+
+
+def iter_frames(path: str, filename: str, chunk_size: int, skip_chunks: int = 0) -> Iterator[pd.DataFrame]:
+    """Frames of `chunk_size` rows from a .csv, .xlsx or .xls file, after the first `skip_chunks`"""
+    name = filename.lower()
+    if name.endswith(".csv"):
+        yield from iter_csv_frames(path, chunk_size, skip_chunks)
+        return
+    frames = iter_xlsx_frames(path, chunk_size) if name.endswith(".xlsx") else iter_excel_frames(path, chunk_size)
+    for index, frame in enumerate(frames):
+        if index >= skip_chunks:
+            yield frame
+
+
+def iter_roster_chunks(path: str, filename: str, kind: str, chunk_size: int, skip_chunks: int = 0) -> Iterator[Dict]:
+    """
+    Validated chunks of a roster file, one at a time
+
+    Yields:
+        {"rows": int, "records": [...], "errors": [...]} per chunk, after the first `skip_chunks`
+    """
+    to_records = student_records if kind == "students" else teacher_records
+    for frame in iter_frames(path, filename, chunk_size, skip_chunks):
+        clean, errors = validate_frame(frame, kind)
+        yield {"rows": len(frame), "records": to_records(clean), "errors": errors}
+
+
+def parse_roster(path: str, filename: str, kind: str, chunk_size: int) -> Dict:
+    """
+    Parse and validate a whole roster file, chunk by chunk
+
+    Process-pool entry point: everything returned is plain Python data.
+
+    Returns:
+        {"total_rows": int, "chunks": [{"rows": int, "records": [...], "errors": [...]}, ...]}
+    """
+    chunks = list(iter_roster_chunks(path, filename, kind, chunk_size))
+    return {"total_rows": sum(chunk["rows"] for chunk in chunks), "chunks": chunks}
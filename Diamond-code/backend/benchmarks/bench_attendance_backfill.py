@@ -0,0 +1,114 @@
+"""
+Benchmark: historical attendance backfill
+
+Loads a generated wide register - 1,000 students x a school year of dates -
+through parse_register (vectorized melt) and AttendanceImportService.load
+(COPY on PostgreSQL, executemany on SQLite), reports parse and load time and
+DB round trips, then checks attendance_daily_rollup against a full rebuild
+and that loading the same register again inserts nothing.
+
+Run with: python -m benchmarks.bench_attendance_backfill
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.services.attendance_import import AttendanceImportService
+from app.services.attendance_rollup import AttendanceRollupService
+from app.utils.register_parser import parse_register
+from benchmarks.bench_attendance_mark import RoundTripCounter, make_engine, seed
+
+STUDENTS = 1000
+SCHOOL_DAYS = 240
+MARKS = ["P", "P", "P", "P", "P", "P", "A", "L", "LV", ""]
+
+
+def school_days(count: int):
+    day = date(2025, 6, 2)
+    days = []
+    while len(days) < count:
+        if day.weekday() < 6:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def write_register(path: str):
+    days = school_days(SCHOOL_DAYS)
+    with open(path, "w", newline="") as target:
+        writer = csv.writer(target)
+        writer.writerow(["unique_id", "name", *(day.strftime("%d/%m/%Y") for day in days)])
+        for i in range(STUDENTS):
+            writer.writerow([f"BENCH-STU-{i:05d}", f"Student {i}", *(MARKS[(i * 7 + d) % len(MARKS)] for d in range(len(days)))])
+
+
+def rollup_cells(db):
+    return sorted(
+        (row.date, row.class_name, row.status.value, row.admin_approved, row.record_count)
+        for row in db.query(AttendanceDailyRollup).filter(AttendanceDailyRollup.record_count != 0)
+    )
+
+
+def run() -> int:
+    engine = make_engine()
+    Session = sessionmaker(bind=engine, autoflush=False)
+    counter = RoundTripCounter(engine)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = Session()
+    teacher = seed(db, STUDENTS)
+    teacher_id = teacher.id
+    db.close()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "register.csv")
+        write_register(path)
+        started = time.perf_counter()
+        parsed = parse_register(path, path)
+        parse_s = time.perf_counter() - started
+
+    db = Session()
+    counter.count = 0
+    started = time.perf_counter()
+    summary = AttendanceImportService.load(db, parsed, teacher_id)
+    db.commit()
+    load_s = time.perf_counter() - started
+    round_trips = counter.count
+
+    print(f"{STUDENTS} students x {SCHOOL_DAYS} days = {len(parsed['statuses'])} marks ({engine.dialect.name})")
+    print(f"parse (melt):     {parse_s:6.2f} s")
+    print(f"load + rollup:    {load_s:6.2f} s, {round_trips} round trips, {summary['inserted']} inserted")
+
+    incremental = rollup_cells(db)
+    AttendanceRollupService.rebuild(db)
+    db.commit()
+    rebuilt = rollup_cells(db)
+
+    again = AttendanceImportService.load(db, parsed, teacher_id)
+    db.rollback()
+    db.close()
+
+    if incremental != rebuilt:
+        print("❌ Rollup does not match a rebuild from the attendance table")
+        return 1
+    if again["inserted"] != 0:
+        print(f"❌ Loading the register again inserted {again['inserted']} duplicate records")
+        return 1
+    print("✅ Rollup matches a full rebuild; re-loading the register inserts nothing")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,158 @@
+"""
+Benchmark: POST /attendance/mark write path
+
+Compares the old per-record loop (lookup student, lookup existing row,
+commit + refresh per record) with AttendanceMarkingService's set-based
+upsert for 50/500/5000-record payloads, reporting DB round trips and latency.
+
+Run with: python -m benchmarks.bench_attendance_mark
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.services.attendance_service import AttendanceMarkingService
+
+PAYLOAD_SIZES = [50, 500, 5000]
+
+
+class RoundTripCounter:
+    """Counts statements sent to the database (each one is a round trip)"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def _on_commit(self, *args, **kwargs):
+        self.count += 1
+
+
+def make_engine():
+    url = os.getenv("BENCH_DATABASE_URL", "sqlite://")
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    return create_engine(url)
+
+
+def seed(db, student_count: int) -> Teacher:
+    teacher = Teacher(unique_id="BENCH-TCH-001", first_name="Bench", last_name="Teacher", full_name="Bench Teacher")
+    db.add(teacher)
+    db.add_all([
+        Student(
+            unique_id=f"BENCH-STU-{i:05d}",
+            first_name="Student",
+            last_name=str(i),
+            full_name=f"Student {i}",
+            class_name="Class 8",
+            is_active="Active"
+        )
+        for i in range(student_count)
+    ])
+    db.commit()
+    return teacher
+
+
+def build_payload(student_ids):
+    statuses = [s.value for s in AttendanceStatus]
+    return [
+        {"student_id": student_id, "status": statuses[i % len(statuses)], "remarks": ""}
+        for i, student_id in enumerate(student_ids)
+    ]
+
+
+def mark_per_record(db, teacher_id, attendance_date, student_records):
+    """The previous implementation of mark_attendance's write loop"""
+    for record in student_records:
+        db.query(Student).filter(Student.id == record['student_id']).first()
+        existing = db.query(Attendance).filter(
+            Attendance.student_id == record['student_id'],
+            Attendance.date == attendance_date
+        ).first()
+        if existing:
+            if existing.submitted_for_approval:
+                continue
+            existing.status = AttendanceStatus(record['status'])
+            existing.remarks = record.get('remarks', '')
+            existing.teacher_id = teacher_id
+            existing.submitted_for_approval = True
+            existing.submitted_at = datetime.now()
+            db.commit()
+            db.refresh(existing)
+        else:
+            new_attendance = Attendance(
+                student_id=record['student_id'],
+                date=attendance_date,
+                status=AttendanceStatus(record['status']),
+                remarks=record.get('remarks', ''),
+                teacher_id=teacher_id,
+                is_draft=False,
+                submitted_for_approval=True,
+                submitted_at=datetime.now(),
+                admin_approved=False
+            )
+            db.add(new_attendance)
+            db.commit()
+            db.refresh(new_attendance)
+
+
+def mark_bulk(db, teacher_id, attendance_date, student_records):
+    """The set-based path now used by mark_attendance"""
+    records = {
+        r['student_id']: {"status": AttendanceStatus(r['status']), "remarks": r.get('remarks', '')}
+        for r in student_records
+    }
+    AttendanceMarkingService.get_students_by_id(db, list(records.keys()))
+    AttendanceMarkingService.upsert_batch(db, teacher_id, attendance_date, records, is_draft=False)
+    db.commit()
+
+
+def run():
+    engine = make_engine()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    counter = RoundTripCounter(engine)
+
+    db = Session()
+    teacher = seed(db, max(PAYLOAD_SIZES))
+    student_ids = [row.id for row in db.query(Student.id).order_by(Student.id).all()]
+    teacher_id = teacher.id
+    db.close()
+
+    print(f"{'records':>8} | {'path':<11} | {'round trips':>11} | {'latency (ms)':>12}")
+    print("-" * 52)
+
+    day = date(2026, 1, 1)
+    for size in PAYLOAD_SIZES:
+        payload = build_payload(student_ids[:size])
+        for label, mark in (("per-record", mark_per_record), ("bulk", mark_bulk)):
+            day += timedelta(days=1)
+            db = Session()
+            counter.count = 0
+            started = time.perf_counter()
+            mark(db, teacher_id, day, payload)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            db.close()
+            print(f"{size:>8} | {label:<11} | {counter.count:>11} | {elapsed_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,147 @@
+"""
+Benchmark: broadcast in-app messages
+
+Sends the same announcement to 2,000 parents a number of times, first the
+way /messages/send-to-parents used to (a full communications row per
+parent), then through the endpoint as it is now (one broadcast row plus a
+message_receipts row per parent). Reports write time, database growth and
+the time of one parent's /messages/inbox and /messages/unread-count.
+
+Run with: python -m benchmarks.bench_broadcast
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response
+from sqlalchemy import and_, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.api.v1.messages import get_inbox, get_unread_count, send_to_parents
+from app.models.communication import Communication
+from app.models.parent import Parent
+from app.models.user import User, UserRole
+from app.services.unread_counter import unread_counter
+from app.utils.pagination import PageParams
+from benchmarks.bench_attendance_mark import make_engine
+
+PARENTS = 2000
+ANNOUNCEMENTS = 20
+INBOX_PAGE = 50
+MESSAGE = (
+    "Dear Parents, the school will remain closed on Friday for the annual maintenance of the campus. "
+    "Classes resume on Monday as usual. Please make sure students complete the weekend assignments "
+    "shared by their class teachers, and reach out to the office for any questions. "
+) * 2
+
+
+def database_bytes(db) -> int:
+    if db.get_bind().dialect.name == "postgresql":
+        return db.execute(text("SELECT pg_database_size(current_database())")).scalar()
+    # Pages in use: the second run reuses the pages freed when the first run's tables were dropped
+    pages = db.execute(text("PRAGMA page_count")).scalar() - db.execute(text("PRAGMA freelist_count")).scalar()
+    return pages * db.execute(text("PRAGMA page_size")).scalar()
+
+
+def old_send(db, sender_id: int, subject: str):
+    """The previous send_to_parents write: one full copy of the message per parent"""
+    parents = db.query(Parent).filter(Parent.is_active == True).all()
+    for parent in parents:
+        db.add(Communication(
+            sender_id=sender_id,
+            recipient_id=parent.id,
+            recipient_type="parent",
+            subject=subject,
+            message=MESSAGE,
+            message_type="IN_APP",
+            is_sent=True,
+            sent_at=datetime.utcnow(),
+            delivery_status="delivered"
+        ))
+    db.flush()
+    db.commit()
+
+
+def old_inbox(db, parent_id: int):
+    messages = db.query(Communication).filter(
+        Communication.recipient_type == "parent",
+        Communication.recipient_id == parent_id,
+        Communication.message_type == "IN_APP"
+    ).order_by(Communication.id.desc()).limit(INBOX_PAGE + 1).all()
+    unread = db.query(Communication).filter(and_(
+        Communication.recipient_type == "parent",
+        Communication.recipient_id == parent_id,
+        Communication.message_type == "IN_APP",
+        Communication.is_read == False
+    )).count()
+    return messages, unread
+
+
+def timed(fn, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def setup(engine):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    # The unread counter counts on a miss through its own sessions
+    unread_counter.session_factory = Session
+    db = Session()
+    admin = User(unique_id="BENCH-ADM-001", email="bench@example.com", username="bench", full_name="Bench Admin",
+                 hashed_password="x", role=UserRole.ADMIN)
+    db.add(admin)
+    db.add_all([Parent(phone_number=f"+9197{i:08d}", name=f"Parent {i}", is_active=True) for i in range(PARENTS)])
+    db.commit()
+    parent = db.query(Parent).order_by(Parent.id.desc()).first()
+    return db, admin, parent
+
+
+def run():
+    engine = make_engine()
+    print(f"{PARENTS} parents x {ANNOUNCEMENTS} announcements of {len(MESSAGE)} chars ({engine.dialect.name})")
+    print(f"{'path':<22} {'write / send':>13} {'db growth':>10} {'inbox page':>11} {'unread count':>13}")
+
+    db, admin, parent = setup(engine)
+    before = database_bytes(db)
+    started = time.perf_counter()
+    for i in range(ANNOUNCEMENTS):
+        old_send(db, admin.id, f"Announcement {i}")
+    write = (time.perf_counter() - started) / ANNOUNCEMENTS
+    growth = database_bytes(db) - before
+    read = timed(lambda: old_inbox(db, parent.id))
+    print(f"{'row per parent (before)':<22} {write * 1000:>10.0f} ms {growth / 1024 / 1024:>7.2f} MB {read * 1000:>8.2f} ms {'(incl.)':>13}")
+    db.close()
+
+    db, admin, parent = setup(engine)
+    before = database_bytes(db)
+    started = time.perf_counter()
+    for i in range(ANNOUNCEMENTS):
+        asyncio.run(send_to_parents({"subject": f"Announcement {i}", "message": MESSAGE}, db, admin))
+    write = (time.perf_counter() - started) / ANNOUNCEMENTS
+    growth = database_bytes(db) - before
+    page = PageParams(cursor=None, limit=INBOX_PAGE, fields=None)
+    inbox = timed(lambda: asyncio.run(get_inbox(Response(), page, None, db, parent)))
+    unread = timed(lambda: asyncio.run(get_unread_count(db, parent)))
+    print(f"{'broadcast + receipts':<22} {write * 1000:>10.0f} ms {growth / 1024 / 1024:>7.2f} MB {inbox * 1000:>8.2f} ms {unread * 1000:>10.2f} ms")
+
+    messages = asyncio.run(get_inbox(Response(), page, None, db, parent))
+    assert len(messages) == ANNOUNCEMENTS and asyncio.run(get_unread_count(db, parent)) == {"count": ANNOUNCEMENTS}
+    print(f"✅ Every parent has {ANNOUNCEMENTS} unread messages, stored as "
+          f"{db.query(Communication).count()} communications rows")
+    db.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,90 @@
+"""
+Benchmark: CSV vs XLSX roster parsing
+
+Writes the same generated 50k-row student roster as .xlsx and .csv and
+streams each through iter_roster_chunks (read, validate, build records),
+keeping only one chunk at a time like the import job worker does. Reports
+rows/sec and peak Python memory per format, plus the whole-file
+parse_roster on the XLSX file for comparison. Memory is measured with
+tracemalloc in a second, untimed pass since tracing slows parsing down.
+
+Run with: python -m benchmarks.bench_csv_vs_xlsx
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.utils.roster_parser import iter_roster_chunks, parse_roster
+from benchmarks.bench_roster_import import HEADER, write_roster
+
+ROWS = 50000
+
+
+def write_roster_csv(path: str, rows: int):
+    """The same rows write_roster() puts in the .xlsx file"""
+    born = date(2010, 1, 1)
+    with open(path, "w", newline="") as target:
+        writer = csv.writer(target)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            writer.writerow([
+                "" if i % 500 == 7 else f"Student{i}", f"Surname{i % 97}", born + timedelta(days=i % 1500),
+                "Female" if i % 2 else "Male", f"{7 + i % 4}", f"Parent {i}",
+                9800000000 + (i if i % 1000 != 999 else i - 1), f"parent{i}@example.com", f"{i} Main Road", f"97{i:08d}"
+            ])
+
+
+def stream(path: str):
+    """Parse chunk by chunk, dropping each chunk before the next (the worker commits in between)"""
+    rows = records = 0
+    for chunk in iter_roster_chunks(path, path, "students", settings.IMPORT_CHUNK_SIZE):
+        rows += chunk["rows"]
+        records += len(chunk["records"])
+    return rows, records
+
+
+def whole_file(path: str):
+    parsed = parse_roster(path, path, "students", settings.IMPORT_CHUNK_SIZE)
+    return parsed["total_rows"], sum(len(chunk["records"]) for chunk in parsed["chunks"])
+
+
+def measure(parse, path: str):
+    started = time.perf_counter()
+    rows, records = parse(path)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, records, elapsed, peak / (1024 * 1024)
+
+
+def run():
+    with tempfile.TemporaryDirectory() as workdir:
+        xlsx_path = os.path.join(workdir, f"roster_{ROWS}.xlsx")
+        csv_path = os.path.join(workdir, f"roster_{ROWS}.csv")
+        write_roster(xlsx_path, ROWS)
+        write_roster_csv(csv_path, ROWS)
+        print(f"{ROWS} rows: xlsx {os.path.getsize(xlsx_path) / 1e6:.1f} MB, csv {os.path.getsize(csv_path) / 1e6:.1f} MB\n")
+
+        print(f"{'format':<18} | {'valid rows':>10} | {'seconds':>7} | {'rows/sec':>9} | {'peak MB':>7}")
+        print("-" * 66)
+        for label, parse, path in (
+            ("xlsx (whole file)", whole_file, xlsx_path),
+            ("xlsx (streamed)", stream, xlsx_path),
+            ("csv (streamed)", stream, csv_path),
+        ):
+            rows, records, elapsed, peak_mb = measure(parse, path)
+            print(f"{label:<18} | {records:>10} | {elapsed:>7.2f} | {rows / elapsed:>9.0f} | {peak_mb:>7.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,122 @@
+"""
+Benchmark: streaming attendance export
+
+Exports 20k and 80k attendance rows through the /export writers - CSV and
+write-only XLSX fed by a yield_per query - and reports time to the first
+chunk, total time and peak Python memory (traced in a separate pass, since
+tracemalloc slows everything down). For comparison it also builds the same
+CSV the way /attendance/history used to: .all() first, then serialize.
+Peak memory should stay the same as the row count grows.
+
+Run with: python -m benchmarks.bench_export
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import csv
+import io
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.api.v1.exports import EXPORT_YIELD_PER
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.student import Student
+from app.utils.db import chunked
+from app.utils.export import stream_csv, stream_xlsx
+from benchmarks.bench_attendance_mark import make_engine, seed
+
+STUDENTS = 1000
+ROW_COUNTS = [20_000, 80_000]
+STATUSES = list(AttendanceStatus)
+
+
+def seed_attendance(db, teacher_id: int, first: int, last: int):
+    student_ids = [row.id for row in db.query(Student.id).order_by(Student.id)]
+    start = date(2022, 6, 1)
+    records = [
+        {
+            "student_id": student_ids[i % STUDENTS],
+            "teacher_id": teacher_id,
+            "date": start + timedelta(days=i // STUDENTS),
+            "status": STATUSES[i % 7 % len(STATUSES)],
+            "admin_approved": True
+        }
+        for i in range(first, last)
+    ]
+    for batch in chunked(records, 10_000):
+        db.execute(insert(Attendance.__table__), batch)
+    db.commit()
+
+
+def export_query(db):
+    return db.query(
+        Attendance.id, Attendance.date, Student.unique_id, Student.full_name,
+        Student.class_name, Attendance.status, Attendance.remarks, Attendance.admin_approved
+    ).join(Student, Attendance.student_id == Student.id).order_by(Attendance.date, Attendance.id)
+
+
+def measure(make_body):
+    """(seconds to first chunk, total seconds, bytes, peak traced MB)"""
+    started = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in make_body():
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    total = time.perf_counter() - started
+
+    tracemalloc.start()
+    for chunk in make_body():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, size, peak / 1024 / 1024
+
+
+def materialized_csv(query):
+    """The old shape: every row in memory, then one serialized body"""
+    rows = query.all()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([value.value if hasattr(value, "value") else value for value in row])
+    yield buffer.getvalue()
+
+
+def run():
+    engine = make_engine()
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    teacher = seed(db, STUDENTS)
+    headers = [column["name"] for column in export_query(db).column_descriptions]
+
+    print(f"{STUDENTS} students, yield_per={EXPORT_YIELD_PER} ({engine.dialect.name})")
+    print(f"{'rows':>8} {'writer':<14} {'first chunk':>12} {'total':>9} {'size':>9} {'peak mem':>9}")
+    seeded = 0
+    for rows in ROW_COUNTS:
+        seed_attendance(db, teacher.id, seeded, rows)
+        seeded = rows
+        writers = [
+            ("csv", lambda: stream_csv(headers, export_query(db).yield_per(EXPORT_YIELD_PER))),
+            ("xlsx", lambda: stream_xlsx(headers, export_query(db).yield_per(EXPORT_YIELD_PER), "Attendance")),
+            ("csv via .all()", lambda: materialized_csv(export_query(db))),
+        ]
+        for name, make_body in writers:
+            first, total, size, peak = measure(make_body)
+            print(f"{rows:>8} {name:<14} {first * 1000:>9.0f} ms {total:>7.2f} s {size / 1024 / 1024:>6.1f} MB {peak:>6.1f} MB")
+    db.close()
+
+
+if __name__ == "__main__":
+    run()
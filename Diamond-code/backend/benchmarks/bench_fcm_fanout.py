@@ -0,0 +1,109 @@
+"""
+Benchmark: FCM fan-out, per-token send vs chunked send_each
+
+Patches firebase_admin.messaging with a local FCM stub that charges a fixed
+HTTPS round trip per message. send_each in firebase-admin sends each message
+of a chunk concurrently over a pooled session; the stub does the same with a
+thread pool, so per-token and batched numbers are comparable.
+
+Run with: python -m benchmarks.bench_fcm_fanout [--latency-ms 40]
+"""
+import argparse
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_admin import messaging
+
+from app.services.fcm_push_notification_service import FCMPushNotificationService, FCM_BATCH_SIZE
+
+RECIPIENT_COUNTS = [100, 1000, 5000]
+
+
+class LocalFCMStub:
+    """Stands in for fcm.googleapis.com: every message costs one simulated round trip"""
+
+    def __init__(self, latency_ms: float, max_workers: int = 50):
+        self.latency = latency_ms / 1000
+        self.max_workers = max_workers
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def send(self, message, dry_run=False, app=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            return f"projects/stub/messages/{self.requests}"
+
+    def send_each(self, messages, dry_run=False, app=None):
+        if len(messages) > FCM_BATCH_SIZE:
+            raise ValueError(f"send_each accepts at most {FCM_BATCH_SIZE} messages")
+        with ThreadPoolExecutor(max_workers=min(len(messages), self.max_workers)) as pool:
+            message_ids = list(pool.map(self.send, messages))
+        responses = [SimpleNamespace(success=True, message_id=mid, exception=None) for mid in message_ids]
+        return SimpleNamespace(responses=responses, success_count=len(responses), failure_count=0)
+
+    def install(self):
+        messaging.send = self.send
+        messaging.send_each = self.send_each
+        FCMPushNotificationService._initialized = True
+
+
+def build_notifications(count: int):
+    return [
+        {
+            "fcm_token": f"stub-token-{i}",
+            **FCMPushNotificationService.attendance_notification_content(f"Student {i}", "present", "2026-10-17")
+        }
+        for i in range(count)
+    ]
+
+
+def per_token(notifications):
+    for notif in notifications:
+        FCMPushNotificationService.send_notification(
+            fcm_token=notif["fcm_token"], title=notif["title"], body=notif["body"], data=notif["data"]
+        )
+
+
+def batched(notifications):
+    FCMPushNotificationService.send_bulk_notifications(notifications)
+
+
+def run(latency_ms: float):
+    stub = LocalFCMStub(latency_ms)
+    stub.install()
+
+    print(f"Stub round trip: {latency_ms:.0f} ms per message\n")
+    print(f"{'recipients':>10} | {'path':<10} | {'seconds':>8} | {'msgs/sec':>9}")
+    print("-" * 47)
+
+    # Silence the per-message console output from the service while timing
+    devnull = open(os.devnull, "w")
+    for count in RECIPIENT_COUNTS:
+        notifications = build_notifications(count)
+        for label, send in (("per-token", per_token), ("send_each", batched)):
+            if label == "per-token" and count > 1000:
+                print(f"{count:>10} | {label:<10} | {'skipped':>8} | {'-':>9}")
+                continue
+            stdout, sys.stdout = sys.stdout, devnull
+            started = time.perf_counter()
+            try:
+                send(notifications)
+            finally:
+                sys.stdout = stdout
+            elapsed = time.perf_counter() - started
+            print(f"{count:>10} | {label:<10} | {elapsed:>8.2f} | {count / elapsed:>9.0f}")
+    devnull.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=40)
+    args = parser.parse_args()
+    run(args.latency_ms)
@@ -0,0 +1,124 @@
+"""
+Benchmark: conditional inbox
+
+One parent with 400 messages from 20 different senders opens the inbox
+repeatedly. Compares a plain query that lazy-loads each sender, the
+endpoint's joined load without a validator, and the endpoint revalidating
+with If-None-Match when nothing changed (304). Reports statements sent to
+the database, response bytes and time per open.
+
+Run with: python -m benchmarks.bench_inbox_etag
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.api.v1.messages import get_inbox
+from app.models.communication import Communication, MessageReceipt
+from app.models.parent import Parent
+from app.models.user import User, UserRole
+from app.utils.pagination import PageParams
+from benchmarks.bench_attendance_mark import RoundTripCounter, make_engine
+
+MESSAGES = 400
+SENDERS = 20
+OPENS = 50
+BODY = "The school will remain closed on Friday for maintenance. Classes resume on Monday. " * 3
+
+
+def seed(db) -> Parent:
+    senders = [
+        User(unique_id=f"BENCH-ADM-{i:03d}", email=f"admin{i}@example.com", username=f"admin{i}",
+             full_name=f"Admin {i}", hashed_password="x", role=UserRole.ADMIN)
+        for i in range(SENDERS)
+    ]
+    parent = Parent(phone_number="+919700000001", name="Bench Parent", is_active=True)
+    db.add_all(senders + [parent])
+    db.flush()
+    for i in range(MESSAGES):
+        message = Communication(sender_id=senders[i % SENDERS].id, recipient_type="parent", subject=f"Notice {i}",
+                                message=BODY, message_type="IN_APP", is_bulk=True, is_sent=True)
+        db.add(message)
+        db.flush()
+        db.execute(insert(MessageReceipt.__table__), [
+            {"message_id": message.id, "recipient_type": "parent", "recipient_id": parent.id, "is_read": i % 3 != 0}
+        ])
+    db.commit()
+    return parent
+
+
+def lazy_inbox(db, parent: Parent) -> bytes:
+    """Inbox rows rendered with a lazy load per sender, as before joinedload"""
+    rows = db.query(Communication, MessageReceipt).join(
+        MessageReceipt, MessageReceipt.message_id == Communication.id
+    ).filter(
+        MessageReceipt.recipient_type == "parent",
+        MessageReceipt.recipient_id == parent.id
+    ).order_by(MessageReceipt.message_id.desc()).limit(501).all()
+    return json.dumps([
+        {"id": message.id, "subject": message.subject, "message": message.message,
+         "sender_name": message.sender.full_name if message.sender else "Admin",
+         "is_read": receipt.is_read, "created_at": str(message.created_at), "read_at": None}
+        for message, receipt in rows
+    ]).encode()
+
+
+def endpoint_inbox(db, parent: Parent, if_none_match=None) -> bytes:
+    result = asyncio.run(get_inbox(Response(), PageParams(cursor=None, limit=500, fields=None), if_none_match, db, parent))
+    if isinstance(result, Response):
+        return result.body  # Empty for a 304
+    return json.dumps(result, default=str).encode()
+
+
+def run():
+    engine = make_engine()
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    seed_db = Session()
+    parent_id = seed(seed_db).id
+    seed_db.close()
+    trips = RoundTripCounter(engine)
+
+    print(f"{MESSAGES} messages from {SENDERS} senders, {OPENS} inbox opens ({engine.dialect.name})")
+    print(f"{'path':<28} {'statements/open':>16} {'bytes/open':>11} {'ms/open':>8}")
+
+    def measure(name, fetch):
+        trips.count = 0
+        size = 0
+        started = time.perf_counter()
+        for _ in range(OPENS):
+            # A fresh session per open, like a request
+            db = Session()
+            parent = db.get(Parent, parent_id)
+            trips.count -= 1  # Authentication, not part of the inbox
+            size = len(fetch(db, parent))
+            db.close()
+        seconds = (time.perf_counter() - started) / OPENS
+        print(f"{name:<28} {trips.count / OPENS:>16.1f} {size:>11} {seconds * 1000:>8.2f}")
+
+    measure("lazy sender (before)", lazy_inbox)
+    measure("joined sender, 200", endpoint_inbox)
+
+    # The ETag the app stored from its last 200
+    response = Response()
+    db = Session()
+    asyncio.run(get_inbox(response, PageParams(cursor=None, limit=500, fields=None), None, db, db.get(Parent, parent_id)))
+    db.close()
+    etag = response.headers["etag"]
+    measure("If-None-Match, 304", lambda db, parent: endpoint_inbox(db, parent, etag))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,112 @@
+"""
+Benchmark: login latency while a teacher import hashes passwords
+
+Simulates one API worker's event loop: a client thread submits a login
+(bcrypt verify) every 500 ms while an import hashes default passwords for a
+batch of new teacher accounts. Compares the old behaviour (bcrypt called
+directly on the event loop, as import_teachers and /auth/login used to) with
+the hashing process pool, reporting login p50/p99/max and how long the
+import took.
+
+Run with: python -m benchmarks.bench_login_during_import
+PASSWORD_HASH_WORKERS sets the pool size (defaults to min(4, CPU count)).
+"""
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.security import (
+    get_hash_pool, get_password_hash, hash_passwords, shutdown_hash_pool,
+    verify_password, verify_password_async
+)
+
+IMPORT_ACCOUNTS = 16
+PROBE_INTERVAL_SECONDS = 0.5
+
+
+async def verify_on_loop(plain_password: str, hashed_password: str) -> bool:
+    """The previous /auth/login behaviour"""
+    return verify_password(plain_password, hashed_password)
+
+
+async def import_on_loop(passwords):
+    """The previous import_teachers behaviour: one bcrypt call per row on the loop"""
+    for password in passwords:
+        get_password_hash(password)
+
+
+async def import_in_pool(passwords):
+    """The import path now: the chunk runs in the threadpool, hashes fan out to the pool"""
+    await asyncio.to_thread(hash_passwords, passwords)
+
+
+def login_probe(loop, verify, hashed_password: str, stop: threading.Event, latencies: list):
+    """
+    Client thread: submit a login to the loop every interval, like external
+    requests arriving on a fixed schedule, and time each one to completion
+    """
+    pending = []
+    while not stop.is_set():
+        submitted = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(verify("secret-password", hashed_password), loop)
+        future.add_done_callback(lambda _, submitted=submitted: latencies.append((time.perf_counter() - submitted) * 1000))
+        pending.append(future)
+        time.sleep(PROBE_INTERVAL_SECONDS)
+    for future in pending:
+        future.result()
+
+
+async def scenario(verify, run_import, hashed_password: str):
+    passwords = [f"{9800000000 + i}"[-4:] for i in range(IMPORT_ACCOUNTS)]
+    stop = threading.Event()
+    latencies = []
+    loop = asyncio.get_running_loop()
+    probe = threading.Thread(target=login_probe, args=(loop, verify, hashed_password, stop, latencies))
+    probe.start()
+    await asyncio.sleep(0.2)
+
+    started = time.perf_counter()
+    await run_import(passwords)
+    import_ms = (time.perf_counter() - started) * 1000
+
+    stop.set()
+    # Let logins still queued on the loop finish
+    while probe.is_alive():
+        await asyncio.sleep(0.05)
+    return latencies, import_ms
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main():
+    hashed_password = get_password_hash("secret-password")
+    if get_hash_pool() is not None:
+        # Start the worker processes before timing anything
+        await verify_password_async("warm-up", hashed_password)
+
+    print(f"hash workers: {settings.PASSWORD_HASH_WORKERS}, accounts imported: {IMPORT_ACCOUNTS}")
+    print(f"{'path':<8} | {'logins':>6} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'max (ms)':>9} | {'import (ms)':>11}")
+    print("-" * 68)
+    for label, verify, run_import in (
+        ("on loop", verify_on_loop, import_on_loop),
+        ("pool", verify_password_async, import_in_pool),
+    ):
+        latencies, import_ms = await scenario(verify, run_import, hashed_password)
+        print(
+            f"{label:<8} | {len(latencies):>6} | {statistics.median(latencies):>9.0f} | "
+            f"{percentile(latencies, 0.99):>9.0f} | {max(latencies):>9.0f} | {import_ms:>11.0f}"
+        )
+    shutdown_hash_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
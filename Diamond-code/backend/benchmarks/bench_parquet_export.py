@@ -0,0 +1,150 @@
+"""
+Benchmark: Parquet export for analytics
+
+Seeds a year of attendance for 1,000 students, then compares the JSON an
+analyst gets from /attendance/history with the month-partitioned Parquet
+dataset from ParquetExportService: bytes on disk and time to load into
+pandas. Then marks one more day and runs the export again to show that the
+incremental run only rewrites the current month, and checks the dataset
+matches the table.
+
+Run with: python -m benchmarks.bench_parquet_export
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, time as day_time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.student import Student
+from app.services.parquet_export import PARQUET_TABLES, ParquetExportService
+from app.utils.db import chunked
+from benchmarks.bench_attendance_mark import make_engine, seed
+
+STUDENTS = 1000
+SCHOOL_DAYS = 200
+STATUSES = list(AttendanceStatus)
+FIRST_DAY = date(2025, 6, 2)
+
+
+def mark_days(db, teacher_id: int, student_ids, days):
+    records = [
+        {
+            "student_id": student_id,
+            "teacher_id": teacher_id,
+            "date": day,
+            "status": STATUSES[(student_id + day.toordinal()) % 7 % len(STATUSES)],
+            "remarks": "",
+            "is_draft": False,
+            "submitted_for_approval": True,
+            "admin_approved": True,
+            "approved_by": None,
+            "whatsapp_sent": True,
+            # Approved the evening of the day, so the watermark moves forward day by day
+            "updated_at": datetime.combine(day, day_time(18))
+        }
+        for day in days
+        for student_id in student_ids
+    ]
+    for batch in chunked(records, 10_000):
+        db.execute(insert(Attendance.__table__), batch)
+    db.commit()
+
+
+def history_json(db) -> str:
+    """The same rows in /attendance/history's JSON shape"""
+    rows = db.query(
+        Attendance.id, Attendance.date, Attendance.status, Attendance.remarks, Attendance.admin_approved,
+        Student.id.label("student_id"), Student.full_name, Student.unique_id, Student.class_name, Student.section
+    ).join(Student, Attendance.student_id == Student.id).yield_per(5000)
+    return json.dumps([
+        {
+            "id": row.id,
+            "student_id": row.student_id,
+            "student_name": row.full_name,
+            "student_unique_id": row.unique_id,
+            "class_name": row.class_name,
+            "section": row.section or "",
+            "date": row.date.isoformat(),
+            "status": row.status.value,
+            "marked_by": "Bench Teacher",
+            "approved_by": None,
+            "remarks": row.remarks or "",
+            "is_approved": row.admin_approved
+        }
+        for row in rows
+    ])
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run():
+    engine = make_engine()
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    teacher = seed(db, STUDENTS)
+    student_ids = [row.id for row in db.query(Student.id)]
+    days = [FIRST_DAY + timedelta(days=i) for i in range(SCHOOL_DAYS)]
+    mark_days(db, teacher.id, student_ids, days)
+    total = STUDENTS * SCHOOL_DAYS
+    print(f"{STUDENTS} students x {SCHOOL_DAYS} days = {total} attendance rows ({engine.dialect.name})")
+
+    out_dir = tempfile.mkdtemp(prefix="bench-parquet-")
+    try:
+        table = PARQUET_TABLES["attendance"]
+
+        started = time.perf_counter()
+        payload = history_json(db)
+        json_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        pd.DataFrame(json.loads(payload))
+        json_load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        summary = ParquetExportService.export_table(db, table, out_dir)
+        parquet_seconds = time.perf_counter() - started
+        dataset = os.path.join(out_dir, "attendance")
+        started = time.perf_counter()
+        frame = pd.read_parquet(dataset)
+        parquet_load = time.perf_counter() - started
+
+        print(f"{'format':<10} {'size':>9} {'write':>8} {'load into pandas':>17}")
+        print(f"{'JSON':<10} {len(payload) / 1024 / 1024:>6.1f} MB {json_seconds:>6.2f} s {json_load:>15.2f} s")
+        print(f"{'Parquet':<10} {directory_size(dataset) / 1024 / 1024:>6.1f} MB {parquet_seconds:>6.2f} s {parquet_load:>15.2f} s"
+              f"  ({len(summary['months'])} month partitions)")
+        print(f"status column dtype: {frame['status'].dtype}")
+
+        # Nightly run: one more day marked
+        next_day = days[-1] + timedelta(days=1)
+        mark_days(db, teacher.id, student_ids, [next_day])
+        started = time.perf_counter()
+        summary = ParquetExportService.export_table(db, table, out_dir)
+        print(f"incremental run: rewrote {', '.join(summary['months'])} ({summary['rows']} rows) "
+              f"in {time.perf_counter() - started:.2f} s")
+
+        frame = pd.read_parquet(dataset)
+        assert len(frame) == total + STUDENTS and frame["id"].is_unique, "dataset does not match the table"
+        print("✅ Dataset matches the attendance table")
+    finally:
+        shutil.rmtree(out_dir)
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,127 @@
+"""
+Benchmark: student roster import
+
+Compares the old import loop (pd.read_excel, iterrows, a duplicate query and
+an ID query per row, flush per row) with RosterImportService (streaming
+openpyxl parse, vectorized validation, one duplicate query and one bulk
+INSERT per chunk) on generated 1k/10k-row .xlsx files, reporting DB round
+trips and latency. Parsing is timed in-process here; the endpoint runs it in
+a worker process so the event loop stays free.
+
+Run with: python -m benchmarks.bench_roster_import
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from openpyxl import Workbook
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.student import Student
+from app.services.roster_import import RosterImportService
+from app.services.unique_id_generator import UniqueIdGenerator
+from app.utils.roster_parser import parse_roster
+from benchmarks.bench_attendance_mark import RoundTripCounter, make_engine
+
+ROW_COUNTS = [1000, 10000]
+
+HEADER = ["first_name", "last_name", "date_of_birth", "gender", "class_name", "parent_name",
+          "parent_phone", "parent_email", "address", "emergency_contact"]
+
+
+def write_roster(path: str, rows: int):
+    """Generated roster with a few invalid and duplicate rows mixed in"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Students")
+    sheet.append(HEADER)
+    born = date(2010, 1, 1)
+    for i in range(rows):
+        first_name = None if i % 500 == 7 else f"Student{i}"
+        sheet.append([
+            first_name, f"Surname{i % 97}", born + timedelta(days=i % 1500), "Female" if i % 2 else "Male",
+            f"{7 + i % 4}", f"Parent {i}", 9800000000 + (i if i % 1000 != 999 else i - 1),
+            f"parent{i}@example.com", f"{i} Main Road", f"97{i:08d}"
+        ])
+    workbook.save(path)
+
+
+def import_per_row(db, path: str) -> int:
+    """The previous implementation of the import loop"""
+    df = pd.read_excel(path)
+    imported = 0
+    for idx, row in df.iterrows():
+        required_fields = ['first_name', 'last_name', 'class_name', 'parent_phone']
+        if any(pd.isna(row.get(field)) for field in required_fields):
+            continue
+        parent_phone = str(row['parent_phone']).strip()
+        full_name = f"{str(row['first_name']).strip()} {str(row['last_name']).strip()}"
+        existing = db.query(Student).filter(
+            Student.parent_phone == parent_phone,
+            Student.full_name == full_name
+        ).first()
+        if existing:
+            continue
+        student = Student(
+            unique_id=UniqueIdGenerator.generate_student_id(db),
+            first_name=str(row['first_name']).strip(),
+            last_name=str(row['last_name']).strip(),
+            full_name=full_name,
+            class_name=str(row['class_name']).strip(),
+            date_of_birth=pd.to_datetime(row['date_of_birth']).date() if not pd.isna(row.get('date_of_birth')) else None,
+            gender=str(row.get('gender', '')).strip() if not pd.isna(row.get('gender')) else '',
+            parent_name=str(row.get('parent_name', '')).strip() if not pd.isna(row.get('parent_name')) else '',
+            parent_phone=parent_phone,
+            parent_email=str(row.get('parent_email', '')).strip() if not pd.isna(row.get('parent_email')) else '',
+            address=str(row.get('address', '')).strip() if not pd.isna(row.get('address')) else '',
+            emergency_contact=str(row.get('emergency_contact', '')).strip() if not pd.isna(row.get('emergency_contact')) else '',
+            admission_date=datetime.now().date(),
+        )
+        db.add(student)
+        db.flush()
+        imported += 1
+    db.commit()
+    return imported
+
+
+def import_chunked(db, path: str) -> int:
+    """The streaming path now used by /import/students/import"""
+    parsed = parse_roster(path, path, "students", settings.IMPORT_CHUNK_SIZE)
+    return RosterImportService.import_students(db, parsed)["imported_count"]
+
+
+def run():
+    engine = make_engine()
+    Session = sessionmaker(bind=engine, autoflush=False)
+    counter = RoundTripCounter(engine)
+
+    print(f"{'rows':>8} | {'path':<9} | {'imported':>8} | {'round trips':>11} | {'latency (ms)':>12}")
+    print("-" * 61)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in ROW_COUNTS:
+            path = os.path.join(workdir, f"roster_{rows}.xlsx")
+            write_roster(path, rows)
+            for label, run_import in (("per-row", import_per_row), ("chunked", import_chunked)):
+                Base.metadata.drop_all(bind=engine)
+                Base.metadata.create_all(bind=engine)
+                db = Session()
+                counter.count = 0
+                started = time.perf_counter()
+                imported = run_import(db, path)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                db.close()
+                print(f"{rows:>8} | {label:<9} | {imported:>8} | {counter.count:>11} | {elapsed_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    run()
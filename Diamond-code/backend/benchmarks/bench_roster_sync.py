@@ -0,0 +1,85 @@
+"""
+Benchmark: re-uploading an unchanged roster
+
+Compares the admin workaround for refreshing a roster (/students/clear-all
+followed by a full re-import) with a mode=sync import (RosterSyncService: one
+query for the current roster, an in-memory diff, bulk statements for the
+delta only) on a 3,000-student sheet, reporting DB round trips and latency.
+The sheet is parsed once up front; parsing is the same for both paths and
+runs in the parser pool in the API.
+
+Run with: python -m benchmarks.bench_roster_sync
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import copy
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.student import Student
+from app.services.roster_import import RosterImportService
+from app.services.roster_sync import RosterSyncService
+from app.utils.roster_parser import parse_roster
+from benchmarks.bench_attendance_mark import RoundTripCounter, make_engine
+from benchmarks.bench_roster_import import write_roster
+
+ROSTER_ROWS = 3000
+
+
+def clear_and_reimport(db, parsed) -> str:
+    """What admins do today: delete every student, then import the sheet again"""
+    db.query(Student).delete()
+    summary = RosterImportService.import_students(db, parsed)
+    return f"{summary['imported_count']} re-inserted"
+
+
+def sync(db, parsed) -> str:
+    summary, _, _ = RosterSyncService.sync(db, "students", parsed)
+    db.commit()
+    return (
+        f"{summary['inserted']} inserted, {summary['updated']} updated, "
+        f"{summary['deactivated']} deactivated, {summary['unchanged']} unchanged"
+    )
+
+
+def run():
+    engine = make_engine()
+    Session = sessionmaker(bind=engine, autoflush=False)
+    counter = RoundTripCounter(engine)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, f"roster_{ROSTER_ROWS}.xlsx")
+        write_roster(path, ROSTER_ROWS)
+        started = time.perf_counter()
+        parsed = parse_roster(path, path, "students", settings.IMPORT_CHUNK_SIZE)
+        print(f"parsed {parsed['total_rows']} rows in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+    print(f"{'path':<20} | {'round trips':>11} | {'latency (ms)':>12} | result")
+    print("-" * 90)
+    for label, refresh in (("clear + re-import", clear_and_reimport), ("sync (unchanged)", sync)):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = Session()
+        RosterImportService.import_students(db, copy.deepcopy(parsed))
+        db.close()
+
+        db = Session()
+        counter.count = 0
+        started = time.perf_counter()
+        result = refresh(db, copy.deepcopy(parsed))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        db.close()
+        print(f"{label:<20} | {counter.count:>11} | {elapsed_ms:>12.1f} | {result}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,144 @@
+"""
+Benchmark: unread-count polling
+
+2,000 parents with a few months of broadcasts (receipts, some read). Every
+parent polls the unread count ten times, first with the COUNT query
+/messages/unread-count used to run per poll, then through UnreadCounter.
+Then 2,000 long-polls wait on the counter while one broadcast goes out, and
+the benchmark reports how fast every waiter saw the change and how many
+statements reached the database meanwhile.
+
+Run with: python -m benchmarks.bench_unread_count
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database for production-like numbers).
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.communication import Communication, MessageReceipt
+from app.models.parent import Parent
+from app.models.user import User, UserRole
+from app.services.unread_counter import UnreadCounter
+from benchmarks.bench_attendance_mark import RoundTripCounter, make_engine
+
+PARENTS = 2000
+BROADCASTS = 60
+POLLS_PER_PARENT = 10
+
+
+def seed(db):
+    admin = User(unique_id="BENCH-ADM-001", email="bench@example.com", username="bench", full_name="Bench Admin",
+                 hashed_password="x", role=UserRole.ADMIN)
+    db.add(admin)
+    db.add_all([Parent(phone_number=f"+9197{i:08d}", name=f"Parent {i}", is_active=True) for i in range(PARENTS)])
+    db.flush()
+    parent_ids = [row.id for row in db.query(Parent.id)]
+    for i in range(BROADCASTS):
+        broadcast = Communication(sender_id=admin.id, recipient_type="parent", subject=f"Announcement {i}",
+                                  message="Announcement", message_type="IN_APP", is_bulk=True, is_sent=True)
+        db.add(broadcast)
+        db.flush()
+        # Older broadcasts have mostly been read
+        db.execute(insert(MessageReceipt.__table__), [
+            {"message_id": broadcast.id, "recipient_type": "parent", "recipient_id": parent_id,
+             "is_read": (parent_id + i) % BROADCASTS < BROADCASTS - 5, "read_at": None}
+            for parent_id in parent_ids
+        ])
+    db.commit()
+    return admin, parent_ids
+
+
+def old_unread_count(db, parent_id: int) -> int:
+    return db.query(func.count(MessageReceipt.message_id)).join(
+        Communication, MessageReceipt.message_id == Communication.id
+    ).filter(
+        MessageReceipt.recipient_type == "parent",
+        MessageReceipt.recipient_id == parent_id,
+        MessageReceipt.is_read == False,
+        Communication.message_type == "IN_APP"
+    ).scalar()
+
+
+async def long_poll(counter: UnreadCounter, db, admin, parent_ids):
+    """Every parent waits on its count; one broadcast wakes them all"""
+    since = {parent_id: counter.get("parent", parent_id) for parent_id in parent_ids}
+    woken = []
+
+    async def wait(parent_id):
+        count = await counter.wait_for_change("parent", parent_id, since[parent_id], timeout=30)
+        woken.append((time.perf_counter(), count != since[parent_id]))
+
+    waiters = [asyncio.create_task(wait(parent_id)) for parent_id in parent_ids]
+    await asyncio.sleep(0.5)
+
+    broadcast = Communication(sender_id=admin.id, recipient_type="parent", subject="New", message="New",
+                              message_type="IN_APP", is_bulk=True, is_sent=True, sent_at=datetime.utcnow())
+    db.add(broadcast)
+    db.flush()
+    db.execute(insert(MessageReceipt.__table__), [
+        {"message_id": broadcast.id, "recipient_type": "parent", "recipient_id": parent_id, "is_read": False}
+        for parent_id in parent_ids
+    ])
+    db.commit()
+    sent = time.perf_counter()
+    counter.add("parent", parent_ids, 1)
+    await asyncio.gather(*waiters)
+    return max(at for at, _ in woken) - sent, sum(changed for _, changed in woken)
+
+
+def run():
+    engine = make_engine()
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    admin, parent_ids = seed(db)
+    trips = RoundTripCounter(engine)
+    polls = PARENTS * POLLS_PER_PARENT
+    print(f"{PARENTS} parents, {BROADCASTS} broadcasts ({PARENTS * BROADCASTS} receipts), "
+          f"{polls} polls ({engine.dialect.name})")
+    print(f"{'path':<24} {'seconds':>8} {'per poll':>10} {'db statements':>14}")
+
+    trips.count = 0
+    started = time.perf_counter()
+    expected = {}
+    for _ in range(POLLS_PER_PARENT):
+        for parent_id in parent_ids:
+            expected[parent_id] = old_unread_count(db, parent_id)
+    seconds = time.perf_counter() - started
+    print(f"{'COUNT per poll (before)':<24} {seconds:>8.2f} {seconds / polls * 1e6:>7.0f} us {trips.count:>14}")
+
+    counter = UnreadCounter(reconcile_interval=300, session_factory=Session)
+    trips.count = 0
+    started = time.perf_counter()
+    for _ in range(POLLS_PER_PARENT):
+        for parent_id in parent_ids:
+            assert counter.get("parent", parent_id) == expected[parent_id]
+    seconds = time.perf_counter() - started
+    print(f"{'UnreadCounter':<24} {seconds:>8.2f} {seconds / polls * 1e6:>7.0f} us {trips.count:>14}  "
+          f"(first poll per parent counts from SQL)")
+
+    trips.count = 0
+    started = time.perf_counter()
+    corrected = counter.reconcile()
+    print(f"reconcile of {PARENTS} counters: {time.perf_counter() - started:.2f} s, "
+          f"{trips.count} statements, {corrected} corrected")
+
+    trips.count = 0
+    latency, changed = asyncio.run(long_poll(counter, db, admin, parent_ids))
+    print(f"long-poll: {changed}/{PARENTS} waiters saw the broadcast within {latency * 1000:.0f} ms; "
+          f"{trips.count} statements (the broadcast's own writes)")
+    db.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,239 @@
+"""
+Benchmark: WhatsApp mass send against a local Twilio stub
+
+Starts an aiohttp server that answers Twilio's Messages API after a fixed
+latency, points the Twilio client at it and compares the old loop (blocking
+messages.create per parent, on the event loop) with send_mass_communication
+(create_async over the shared keep-alive transport, WHATSAPP_SEND_CONCURRENCY
+in flight). Reports wall time, TCP connections opened, database round trips
+and the worst event loop stall seen by a ticker task while the send runs.
+The approval path (send_attendance_messages) is timed the same way, and two
+overlapping sends to the same parents check that no chat counts are lost.
+
+Run with: python -m benchmarks.bench_whatsapp_mass_send [--latency-ms 150]
+Uses an in-memory SQLite database for the chat and communication rows.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Placeholder credentials so the service builds its Twilio client; requests only reach the stub
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbench00000000000000000000000000")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench-token")
+
+from datetime import date
+
+from aiohttp import web
+from sqlalchemy.orm import sessionmaker
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from app.core.config import settings
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.student import Student
+from app.models.whatsapp_chat import WhatsAppChat
+from app.services.whatsapp_service import SharedTwilioHttpClient, WhatsAppService
+from benchmarks.bench_attendance_mark import RoundTripCounter, make_engine, seed
+
+TWILIO_API = "https://api.twilio.com"
+SEQUENTIAL_RECIPIENTS = 100
+CONCURRENT_RECIPIENTS = [100, 1000]
+APPROVAL_RECORDS = 1000
+
+
+class LocalTwilioStub:
+    """
+    Stands in for api.twilio.com: every message costs one simulated round trip
+
+    Runs on its own event loop in a thread, so the blocking client of the old
+    loop can reach it.
+    """
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.messages = 0
+        self.connections = set()
+        self.base_url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    async def create_message(self, request):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        await request.post()
+        await asyncio.sleep(self.latency)
+        self.messages += 1
+        return web.json_response({"sid": f"SM{self.messages:032d}", "status": "queued"}, status=201)
+
+    async def _serve(self):
+        app = web.Application()
+        app.router.add_post("/2010-04-01/Accounts/{sid}/Messages.json", self.create_message)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def start(self):
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._serve(), self._loop).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def reset(self):
+        self.messages = 0
+        self.connections = set()
+
+
+class StubAsyncHttpClient(SharedTwilioHttpClient):
+    def __init__(self, stub: LocalTwilioStub):
+        super().__init__(pool_size=settings.TWILIO_HTTP_POOL_SIZE, timeout=settings.TWILIO_HTTP_TIMEOUT_SECONDS)
+        self.stub = stub
+
+    async def request(self, method, url, *args, **kwargs):
+        return await super().request(method, url.replace(TWILIO_API, self.stub.base_url), *args, **kwargs)
+
+
+class StubSyncHttpClient(TwilioHttpClient):
+    def __init__(self, stub: LocalTwilioStub):
+        super().__init__()
+        self.stub = stub
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, url.replace(TWILIO_API, self.stub.base_url), *args, **kwargs)
+
+
+class LoopStallMonitor:
+    """Ticks every 10 ms and records the longest gap between ticks"""
+
+    def __init__(self):
+        self.worst = 0.0
+        self._task = None
+
+    async def _tick(self):
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            self.worst = max(self.worst, now - last - 0.01)
+            last = now
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._tick())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc):
+        # Let the ticker run once more so a loop that never yielded is measured too
+        await asyncio.sleep(0.02)
+        self._task.cancel()
+
+
+def phone_numbers(count: int, first: int = 0):
+    return [f"+91987{i:07d}" for i in range(first, first + count)]
+
+
+def seed_approved_attendance(db, count: int):
+    """One approved record per student, each student with a parent phone"""
+    teacher = seed(db, count)
+    students = db.query(Student).order_by(Student.id).all()
+    for student, phone_number in zip(students, phone_numbers(count, first=500_000)):
+        student.parent_phone = phone_number
+    db.add_all([
+        Attendance(student_id=student.id, teacher_id=teacher.id, date=date(2026, 10, 16),
+                   status=AttendanceStatus.PRESENT, admin_approved=True)
+        for student in students
+    ])
+    db.commit()
+    # Loaded fresh, as the approval loop holds them
+    return [tuple(row) for row in db.query(Attendance, Student).join(Student, Attendance.student_id == Student.id)]
+
+
+async def old_loop(stub: LocalTwilioStub, numbers):
+    """The previous send_mass_communication: one blocking messages.create per parent"""
+    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=StubSyncHttpClient(stub))
+    for number in numbers:
+        client.messages.create(body="Announcement", from_="whatsapp:+14155238886", to=f"whatsapp:{number}")
+
+
+async def run(latency_ms: float):
+    stub = LocalTwilioStub(latency_ms)
+    stub.start()
+    engine = make_engine()
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    round_trips = RoundTripCounter(engine)
+    service = WhatsAppService(http_client=StubAsyncHttpClient(stub))
+
+    print(f"Twilio stub latency {latency_ms:.0f} ms, concurrency {settings.WHATSAPP_SEND_CONCURRENCY}, "
+          f"pool {settings.TWILIO_HTTP_POOL_SIZE}")
+    print(f"{'path':<26} {'recipients':>10} {'seconds':>8} {'msgs/s':>7} {'connections':>11} {'db trips':>9} "
+          f"{'worst loop stall':>17}")
+
+    def report(name, count, seconds, stall, trips="-"):
+        print(f"{name:<26} {count:>10} {seconds:>8.2f} {count / seconds:>7.0f} {len(stub.connections):>11} {trips:>9} "
+              f"{stall * 1000:>14.0f} ms")
+
+    try:
+        stub.reset()
+        numbers = phone_numbers(SEQUENTIAL_RECIPIENTS)
+        async with LoopStallMonitor() as monitor:
+            started = time.perf_counter()
+            await old_loop(stub, numbers)
+            seconds = time.perf_counter() - started
+        report("blocking loop (before)", len(numbers), seconds, monitor.worst)
+
+        for count in CONCURRENT_RECIPIENTS:
+            stub.reset()
+            numbers = phone_numbers(count)
+            round_trips.count = 0
+            async with LoopStallMonitor() as monitor:
+                started = time.perf_counter()
+                results = await service.send_mass_communication(
+                    "Holiday", "School is closed tomorrow", numbers, ["Parent"] * count, db
+                )
+                seconds = time.perf_counter() - started
+            report("send_mass_communication", count, seconds, monitor.worst, round_trips.count)
+            assert results == {"sent": count, "failed": 0}, results
+
+        records = seed_approved_attendance(db, APPROVAL_RECORDS)
+        stub.reset()
+        round_trips.count = 0
+        async with LoopStallMonitor() as monitor:
+            started = time.perf_counter()
+            sent = await service.send_attendance_messages(records, db)
+            seconds = time.perf_counter() - started
+        report("send_attendance_messages", len(records), seconds, monitor.worst, round_trips.count)
+        assert all(sent.values()), "some attendance messages failed"
+
+        # Two announcements to the same parents at once: every send must be counted
+        numbers = phone_numbers(100, first=900_000)
+        await asyncio.gather(*(
+            service.send_mass_communication(title, "Overlapping send", numbers, [], db)
+            for title in ("First", "Second")
+        ))
+        counts = {row.messages_sent_count for row in db.query(WhatsAppChat.messages_sent_count).filter(
+            WhatsAppChat.phone_number.in_(numbers)
+        )}
+        assert counts == {2}, counts
+        print("✅ Overlapping sends counted on every chat (messages_sent_count = 2)")
+    finally:
+        await service.close()
+        stub.stop()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=150)
+    args = parser.parse_args()
+    asyncio.run(run(args.latency_ms))
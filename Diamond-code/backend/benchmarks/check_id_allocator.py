@@ -0,0 +1,96 @@
+"""
+Concurrency check for UniqueIdGenerator
+
+Starts several processes that reserve single IDs and blocks of IDs from the
+same series at the same time (like imports running on several uvicorn
+workers) and exits non-zero if any ID is handed out twice or the numbers
+do not continue after the IDs that already existed.
+
+Run with: python -m benchmarks.check_id_allocator
+Uses a temporary SQLite file unless BENCH_DATABASE_URL is set (point it at
+a scratch Postgres database - tables are dropped and recreated).
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+PROCESSES = 8
+RESERVATIONS_PER_PROCESS = 40
+MAX_BLOCK = 50
+EXISTING_STUDENTS = 25
+
+
+def reserve_many(seed: int):
+    """Worker process: reserve IDs in separate transactions, return them all"""
+    from app.services.unique_id_generator import UniqueIdGenerator
+    from benchmarks.bench_attendance_mark import make_engine
+
+    engine = make_engine()
+    Session = sessionmaker(bind=engine, autoflush=False)
+    rng = random.Random(seed)
+    issued = []
+    for _ in range(RESERVATIONS_PER_PROCESS):
+        db = Session()
+        try:
+            count = 1 if rng.random() < 0.5 else rng.randint(2, MAX_BLOCK)
+            issued.extend(UniqueIdGenerator.reserve(db, "student", count))
+            db.commit()
+        finally:
+            db.close()
+    engine.dispose()
+    return issued
+
+
+def run() -> int:
+    from app.core.database import Base
+    import app.models  # noqa: F401  (register all tables)
+    from app.models.student import Student
+    from benchmarks.bench_attendance_mark import make_engine
+
+    engine = make_engine()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add_all([
+        Student(unique_id=f"Diamond-STU-{i:03d}", first_name="Existing", last_name=str(i), full_name=f"Existing {i}")
+        for i in range(1, EXISTING_STUDENTS + 1)
+    ])
+    db.commit()
+    db.close()
+    engine.dispose()
+
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(PROCESSES) as pool:
+        results = pool.map(reserve_many, range(PROCESSES))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    issued = [unique_id for result in results for unique_id in result]
+    numbers = sorted(int(unique_id.rsplit("-", 1)[-1]) for unique_id in issued)
+    duplicates = len(issued) - len(set(issued))
+    expected = list(range(EXISTING_STUDENTS + 1, EXISTING_STUDENTS + 1 + len(issued)))
+
+    print(f"{PROCESSES} processes issued {len(issued)} IDs in {elapsed_ms:.0f} ms")
+    if duplicates:
+        print(f"❌ {duplicates} IDs were issued more than once")
+        return 1
+    if numbers != expected:
+        print(f"❌ IDs are not the contiguous range after the existing {EXISTING_STUDENTS} students")
+        return 1
+    print("✅ No duplicates, no gaps")
+    return 0
+
+
+if __name__ == "__main__":
+    if "BENCH_DATABASE_URL" not in os.environ:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        os.environ["BENCH_DATABASE_URL"] = f"sqlite:///{scratch.name}"
+    sys.exit(run())
@@ -0,0 +1,215 @@
+"""
+Query plan check for the hot read paths
+
+Seeds a scratch database, runs EXPLAIN on the pending-approval, per-student
+attendance, inbox, unread-count, activity-feed, class-roster and OTP queries,
+and exits non-zero if any of them falls back to a full table scan. Run it
+after schema changes to catch a dropped or unusable index.
+
+Run with: python -m benchmarks.check_query_plans
+Uses an in-memory SQLite database unless BENCH_DATABASE_URL is set
+(point it at a scratch Postgres database - tables are created and seeded).
+"""
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  (register all tables)
+from app.models.activity_log import ActivityLog
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.communication import Communication, MessageReceipt
+from app.models.parent import OTP
+from app.models.student import Student
+from app.models.teacher import Teacher
+from benchmarks.bench_attendance_mark import make_engine
+
+STUDENT_COUNT = 2000
+DAYS = 20
+
+
+def seed(db):
+    teacher = Teacher(unique_id="PLAN-TCH-001", first_name="Plan", last_name="Teacher", full_name="Plan Teacher")
+    db.add(teacher)
+    db.flush()
+    db.execute(Student.__table__.insert(), [
+        {
+            "unique_id": f"PLAN-STU-{i:05d}",
+            "first_name": "Student",
+            "last_name": str(i),
+            "full_name": f"Student {i}",
+            "class_name": f"Class {i % 12 + 1}",
+            "is_active": "Active" if i % 20 else "Inactive"
+        }
+        for i in range(STUDENT_COUNT)
+    ])
+    student_ids = [row.id for row in db.query(Student.id).all()]
+
+    start = date(2026, 1, 1)
+    statuses = list(AttendanceStatus)
+    db.execute(Attendance.__table__.insert(), [
+        {
+            "student_id": student_id,
+            "date": start + timedelta(days=day),
+            "status": statuses[student_id % len(statuses)],
+            "teacher_id": teacher.id,
+            "is_draft": False,
+            "submitted_for_approval": True,
+            "admin_approved": day < DAYS - 1
+        }
+        for day in range(DAYS)
+        for student_id in student_ids
+    ])
+    db.execute(Communication.__table__.insert(), [
+        {
+            "sender_id": 1,
+            "recipient_type": "parent",
+            "message_type": "IN_APP" if i % 3 else "WHATSAPP",
+            "subject": "Notice",
+            "message": "Message body",
+            "is_bulk": True
+        }
+        for i in range(60)
+    ])
+    # In-app messages reach each parent through a receipt
+    message_ids = [row.id for row in db.query(Communication.id).filter(Communication.message_type == "IN_APP")]
+    db.execute(MessageReceipt.__table__.insert(), [
+        {
+            "message_id": message_id,
+            "recipient_type": "parent",
+            "recipient_id": parent_id,
+            "is_read": bool((message_id + parent_id) % 4)
+        }
+        for message_id in message_ids
+        for parent_id in range(500)
+    ])
+    action_types = ["login", "view", "edit", "attendance_approved", "student_added", "notice_published"]
+    db.execute(ActivityLog.__table__.insert(), [
+        {
+            "user_name": "Admin",
+            "action_type": action_types[i % len(action_types)],
+            "description": "Activity"
+        }
+        for i in range(20000)
+    ])
+    expires = datetime.utcnow() + timedelta(minutes=5)
+    db.execute(OTP.__table__.insert(), [
+        {"phone_number": f"98765{i:05d}", "otp_code": "123456", "expires_at": expires}
+        for i in range(5000)
+    ])
+    db.commit()
+
+
+def hot_queries(db):
+    """(label, query) for each read path the indexes are meant to serve"""
+    return [
+        ("pending approval", db.query(Attendance).filter(
+            Attendance.date == date(2026, 1, DAYS),
+            Attendance.admin_approved == False,
+            Attendance.submitted_for_approval == True
+        )),
+        ("student attendance on date", db.query(Attendance).filter(
+            Attendance.student_id == 10,
+            Attendance.date == date(2026, 1, 5)
+        )),
+        ("inbox", db.query(Communication, MessageReceipt).join(
+            MessageReceipt, MessageReceipt.message_id == Communication.id
+        ).filter(and_(
+            MessageReceipt.recipient_type == "parent",
+            MessageReceipt.recipient_id == 42,
+            Communication.message_type == "IN_APP"
+        )).order_by(MessageReceipt.message_id.desc()).limit(50)),
+        ("unread count", db.query(func.count(MessageReceipt.message_id)).join(
+            Communication, MessageReceipt.message_id == Communication.id
+        ).filter(and_(
+            MessageReceipt.recipient_type == "parent",
+            MessageReceipt.recipient_id == 42,
+            MessageReceipt.is_read == False,
+            Communication.message_type == "IN_APP"
+        ))),
+        ("important activity feed", db.query(ActivityLog).filter(
+            ActivityLog.action_type.in_(["attendance_approved", "student_added", "notice_published"])
+        ).order_by(ActivityLog.created_at.desc()).limit(20)),
+        ("class roster", db.query(Student).filter(
+            Student.class_name == "Class 8",
+            Student.is_active == "Active"
+        )),
+        ("otp lookup", db.query(OTP).filter(
+            OTP.phone_number == "9876500042",
+            OTP.otp_code == "123456",
+            OTP.is_verified == False,
+            OTP.expires_at > datetime.utcnow()
+        )),
+    ]
+
+
+def explain(db, query):
+    """Return (plan lines, tables read with a full scan)"""
+    compiled = query.statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    if db.bind.dialect.name == "postgresql":
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, scans = [], set()
+        _walk_postgres(plan[0]["Plan"], 0, lines, scans)
+        return lines, scans
+
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    lines = [row[-1] for row in rows]
+    # "SCAN <table>" without an index is a full scan; "SEARCH ... USING INDEX" is not
+    scans = {
+        line.split()[1] for line in lines
+        if line.startswith("SCAN ") and "USING" not in line
+    }
+    return lines, scans
+
+
+def _walk_postgres(node, depth, lines, scans):
+    lines.append(f"{'  ' * depth}{node['Node Type']} {node.get('Relation Name', '')}".rstrip())
+    if node["Node Type"] == "Seq Scan":
+        scans.add(node["Relation Name"])
+    for child in node.get("Plans", []):
+        _walk_postgres(child, depth + 1, lines, scans)
+
+
+def run() -> int:
+    engine = make_engine()
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    db = Session()
+    if db.query(Student.id).first() is not None:
+        print("❌ students table is not empty - point BENCH_DATABASE_URL at a scratch database")
+        return 2
+    seed(db)
+    if engine.dialect.name == "postgresql":
+        db.execute(text("ANALYZE"))
+        # Small seeded tables otherwise make a seq scan look cheapest
+        db.execute(text("SET enable_seqscan = off"))
+
+    failures = 0
+    for label, query in hot_queries(db):
+        lines, scans = explain(db, query)
+        status = "FULL SCAN " + ", ".join(sorted(scans)) if scans else "ok"
+        print(f"{label:<28} {status}")
+        for line in lines:
+            print(f"    {line}")
+        if scans:
+            failures += 1
+
+    db.close()
+    if failures:
+        print(f"❌ {failures} hot queries use a full table scan")
+        return 1
+    print("✅ All hot queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -9,11 +9,11 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from app.core.database import SessionLocal
 from app.models.parent import Parent
 from app.models.student import Student
 from app.models.communication import Communication
+from app.utils.phone import normalize_phone
 
 
 def cleanup_orphaned_parents():
@@ -30,17 +30,11 @@ def cleanup_orphaned_parents():
         print("="*60)
 
         for parent in all_parents:
-            phone = parent.phone_number
-            phone_without_prefix = phone.replace('+91', '') if phone.startswith('+91') else phone
-            phone_with_prefix = f"+91{phone_without_prefix}" if not phone.startswith('+91') else phone
+            phone = normalize_phone(parent.phone_number)
 
             # Check if parent has any active students
             active_students = db.query(Student).filter(
-                or_(
-                    Student.parent_phone == phone,
-                    Student.parent_phone == phone_with_prefix,
-                    Student.parent_phone == phone_without_prefix
-                ),
+                Student.parent_phone_normalized == phone,
                 Student.is_active == "Active"
             ).all()
 
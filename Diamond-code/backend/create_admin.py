@@ -8,6 +8,7 @@ import getpass
 from app.core.database import SessionLocal
 from app.models.user import User, UserRole
 from app.core.security import get_password_hash
+from app.services.unique_id_generator import UniqueIdGenerator
 
 def create_admin():
     print("=" * 60)
@@ -60,9 +61,7 @@ def create_admin():
             sys.exit(1)
         
         # Generate unique ID
-        last_admin = db.query(User).filter(User.role == UserRole.ADMIN).order_by(User.id.desc()).first()
-        admin_number = (last_admin.id + 1) if last_admin else 1
-        unique_id = f"Diamond-ADM-{admin_number:03d}"
+        unique_id = UniqueIdGenerator.generate_admin_id(db)
         
         # Create admin
         admin = User(
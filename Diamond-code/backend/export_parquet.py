@@ -0,0 +1,55 @@
+"""
+Export attendance, teacher attendance, communications and activity logs as
+month-partitioned Parquet datasets for analytics
+Meant to run nightly (cron); each run only rewrites the months with rows
+changed since the previous one. Use --full after bulk deletes.
+
+Usage:
+    python export_parquet.py [--full] [--dir exports/parquet] [--tables attendance,communications]
+
+Read a dataset with: pandas.read_parquet("exports/parquet/attendance")
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - register all models
+from app.services.parquet_export import PARQUET_TABLES, ParquetExportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental Parquet export for analytics")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermarks and rewrite every month")
+    parser.add_argument("--dir", default=settings.PARQUET_EXPORT_DIR, help="Output directory")
+    parser.add_argument("--tables", help=f"Comma-separated subset of: {', '.join(PARQUET_TABLES)}")
+    args = parser.parse_args()
+
+    tables = [name.strip() for name in args.tables.split(",")] if args.tables else None
+    unknown = [name for name in tables or [] if name not in PARQUET_TABLES]
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(unknown)}")
+
+    db = SessionLocal()
+    try:
+        for name in tables or PARQUET_TABLES:
+            started = time.perf_counter()
+            summary = ParquetExportService.export_table(db, PARQUET_TABLES[name], args.dir, full=args.full)
+            months = ", ".join(summary["months"]) or "nothing changed"
+            print(f"✅ {name}: {summary['rows']} rows ({months}) in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        print(f"❌ Parquet export failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
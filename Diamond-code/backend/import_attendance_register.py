@@ -0,0 +1,53 @@
+"""
+Backfill historical attendance from a wide register (students x dates)
+Same loader as POST /api/v1/import/attendance, for registers too large to upload
+
+Usage:
+    python import_attendance_register.py <register.xlsx|.csv> <teacher_id> [approved_by_user_id]
+"""
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - register all models
+from app.models.teacher import Teacher
+from app.services.attendance_import import AttendanceImportService
+from app.utils.register_parser import parse_register
+
+
+def import_register(path: str, teacher_id: int, approved_by: int = None):
+    started = time.perf_counter()
+    parsed = parse_register(path, path)
+    print(f"📄 {parsed['students']} students x {parsed['dates']} dates -> {len(parsed['statuses'])} marks "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    db = SessionLocal()
+    try:
+        if not db.get(Teacher, teacher_id):
+            print(f"❌ Teacher {teacher_id} not found")
+            return
+        summary = AttendanceImportService.load(db, parsed, teacher_id, approved_by)
+        db.commit()
+        print(f"✅ Inserted {summary['inserted']} records, skipped {summary['skipped_existing']} existing "
+              f"({time.perf_counter() - started:.1f}s total)")
+        if summary["unknown_students"]:
+            print(f"⚠️  Unknown unique_ids: {', '.join(summary['unknown_students'])}")
+        for error in summary["errors"] or []:
+            print(f"⚠️  Row {error['row']}: {error['error']}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error importing attendance register: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    import_register(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else None)
@@ -0,0 +1,41 @@
+"""
+Bring the database schema up to date - run before starting the API
+Run with: python migrate.py
+
+A database without any tables is created from the models and stamped at
+the latest Alembic revision (the revisions alter tables that already
+exist, so they cannot build a schema from nothing). Any other database is
+upgraded with alembic upgrade head. Procfile and railway.json run this
+before uvicorn.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.core.database import Base, engine
+import app.models  # noqa: F401  (register all tables)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+def migrate():
+    config = alembic_config()
+    if not inspect(engine).get_table_names():
+        print("🆕 Empty database - creating tables from the models")
+        Base.metadata.create_all(bind=engine)
+        command.stamp(config, "head")
+    else:
+        command.upgrade(config, "head")
+    print("✅ Database schema is up to date")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,37 @@
+"""
+Recompute attendance_daily_rollup from the attendance table
+Run after editing attendance rows by hand, or to verify the rollup has not drifted
+
+Usage:
+    python rebuild_attendance_rollup.py [start_date] [end_date]   (dates as YYYY-MM-DD)
+"""
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - register all models
+from app.services.attendance_rollup import AttendanceRollupService
+
+
+def rebuild(start_date: date = None, end_date: date = None):
+    db = SessionLocal()
+    try:
+        cells = AttendanceRollupService.rebuild(db, start_date=start_date, end_date=end_date)
+        db.commit()
+        print(f"✅ Rebuilt {cells} rollup cells")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding attendance rollup: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    start = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    end = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    rebuild(start, end)
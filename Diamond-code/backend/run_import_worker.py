@@ -0,0 +1,33 @@
+"""
+Import Job Worker - runs outside the API process
+Run with: python run_import_worker.py
+
+Set IMPORT_WORKER_ENABLED=false on the API service when running this, and
+point IMPORT_SPOOL_DIR at storage both processes can see - the API spools
+uploads there and this worker reads them. Several copies can run at once on
+PostgreSQL (jobs are claimed with FOR UPDATE SKIP LOCKED).
+"""
+import asyncio
+import logging
+
+import app.models  # noqa: F401  (register all tables)
+from app.services.import_job_worker import ImportJobWorker
+from app.services.roster_import import shutdown_parse_pool
+from app.services.whatsapp_service import whatsapp_service
+
+
+async def main():
+    try:
+        await ImportJobWorker().run()
+    finally:
+        await whatsapp_service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Import worker stopped")
+    finally:
+        shutdown_parse_pool()
@@ -0,0 +1,31 @@
+"""
+Notification Outbox Worker - runs outside the API process
+Run with: python run_notification_worker.py
+
+Set NOTIFICATION_WORKER_ENABLED=false on the API service when running this,
+so notifications are only drained here. Several copies can run at once on
+PostgreSQL (jobs are claimed with FOR UPDATE SKIP LOCKED).
+"""
+import asyncio
+import logging
+
+import app.models  # noqa: F401  (register all tables)
+from app.services.fcm_push_notification_service import FCMPushNotificationService
+from app.services.notification_worker import NotificationWorker
+from app.services.whatsapp_service import whatsapp_service
+
+
+async def main():
+    try:
+        await NotificationWorker().run()
+    finally:
+        await whatsapp_service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    FCMPushNotificationService.initialize()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Notification worker stopped")
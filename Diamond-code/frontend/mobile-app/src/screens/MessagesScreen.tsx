@@ -13,6 +13,7 @@ import AsyncStorage from '@react-native-async-storage/async-storage';
 import axios from 'axios';
 import Constants from 'expo-constants';
 import { MaterialIcons } from '@expo/vector-icons';
+import { STORAGE_KEYS } from '../utils/secureStorage';
 
 const API_BASE_URL = `${Constants.expoConfig?.extra?.apiUrl || 'http://localhost:8000'}/api/v1`;
 
@@ -44,11 +45,27 @@ export default function MessagesScreen({ navigation }: any) {
         return;
       }
 
+      // Show the last inbox at once; if nothing changed the server answers 304 with no body
+      const cached = JSON.parse((await AsyncStorage.getItem(STORAGE_KEYS.INBOX_CACHE)) || 'null');
+      if (cached) {
+        setMessages(cached.messages);
+      }
+
       const response = await axios.get(`${API_BASE_URL}/messages/inbox`, {
-        headers: { Authorization: `Bearer ${token}` },
+        headers: {
+          Authorization: `Bearer ${token}`,
+          ...(cached?.etag ? { 'If-None-Match': cached.etag } : {}),
+        },
+        validateStatus: status => (status >= 200 && status < 300) || status === 304,
       });
 
-      setMessages(response.data);
+      if (response.status !== 304) {
+        setMessages(response.data);
+        const etag = response.headers.etag;
+        if (etag) {
+          await AsyncStorage.setItem(STORAGE_KEYS.INBOX_CACHE, JSON.stringify({ etag, messages: response.data }));
+        }
+      }
     } catch (error: any) {
       console.error('Error loading messages:', error.response?.data || error.message);
     } finally {
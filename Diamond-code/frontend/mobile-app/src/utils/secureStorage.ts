@@ -13,6 +13,7 @@ export const STORAGE_KEYS = {
   PIN_ATTEMPTS: 'pin_attempts',
   PIN_LOCKED_UNTIL: 'pin_locked_until',
   PHONE_NUMBER: 'phone_number',
+  INBOX_CACHE: 'inbox_cache', // Last inbox response and its ETag
 };
 
 // Auth methods
@@ -161,6 +162,7 @@ export const clearAuthData = async (): Promise<void> => {
     STORAGE_KEYS.LAST_LOGIN,
     STORAGE_KEYS.PIN_ATTEMPTS,
     STORAGE_KEYS.PIN_LOCKED_UNTIL,
+    STORAGE_KEYS.INBOX_CACHE,
   ]);
 };
 
@@ -121,7 +121,7 @@ const Layout: React.FC = () => {
         setActivities(activitiesResponse.data.activities || []);
 
         // Fetch unread activities count (for badge)
-        const unreadResponse = await axios.get('/api/v1/activities/recent?unread_only=true&limit=100', {
+        const unreadResponse = await axios.get('/api/v1/activities/unread-count', {
           headers: { Authorization: `Bearer ${token}` }
         });
         setUnreadCount(unreadResponse.data.count || 0);
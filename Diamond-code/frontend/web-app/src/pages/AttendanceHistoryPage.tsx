@@ -137,45 +137,34 @@ const AttendanceHistoryPage: React.FC = () => {
 
   const classes = ['all', 'Class 7', 'Class 8', 'Class 9', 'Class 10'];
 
-  const exportToCSV = () => {
-    if (filteredData.length === 0) {
-      alert('No data to export');
-      return;
-    }
-
-    // Prepare CSV headers
-    const headers = ['Student Name', 'Student ID', 'Class', 'Date', 'Status', 'Marked By', 'Approved By', 'Remarks'];
-
-    // Prepare CSV rows
-    const rows = filteredData.map(record => [
-      record.student_name,
-      record.student_unique_id,
-      record.class_name,
-      format(new Date(record.date), 'dd MMM yyyy'),
-      record.status.toUpperCase(),
-      record.marked_by,
-      record.approved_by,
-      record.remarks || '-'
-    ]);
-
-    // Combine headers and rows
-    const csvContent = [
-      headers.join(','),
-      ...rows.map(row => row.map(cell => `"${cell}"`).join(','))
-    ].join('\n');
-
-    // Create blob and download
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-    const link = document.createElement('a');
-    const url = URL.createObjectURL(blob);
-
-    link.setAttribute('href', url);
-    link.setAttribute('download', `attendance_history_${format(new Date(), 'yyyy-MM-dd')}.csv`);
-    link.style.visibility = 'hidden';
+  const exportToCSV = async () => {
+    // Streamed by the server, so exports are not limited to the loaded history page
+    try {
+      const response = await axios.get(`${API_BASE_URL}/export/attendance`, {
+        params: {
+          start_date: startDate,
+          end_date: endDate,
+          class_name: classFilter === 'all' ? undefined : classFilter,
+          status: statusFilter === 'all' ? undefined : statusFilter,
+          format: 'csv'
+        },
+        headers: { Authorization: `Bearer ${token}` },
+        responseType: 'blob'
+      });
 
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
+      const url = URL.createObjectURL(new Blob([response.data], { type: 'text/csv;charset=utf-8;' }));
+      const link = document.createElement('a');
+      link.setAttribute('href', url);
+      link.setAttribute('download', `attendance_${startDate}_${endDate}.csv`);
+      link.style.visibility = 'hidden';
+
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      URL.revokeObjectURL(url);
+    } catch (error: any) {
+      alert(`❌ Error: ${error.response?.status === 403 ? 'Only admins can export attendance' : 'Failed to export attendance'}`);
+    }
   };
 
   return (
@@ -15,6 +15,8 @@ import {
   Divider,
   Collapse,
   IconButton,
+  Checkbox,
+  FormControlLabel,
 } from '@mui/material';
 import {
   Upload as UploadIcon,
@@ -41,6 +43,11 @@ const ImportPage: React.FC = () => {
   const [teacherUploadResult, setTeacherUploadResult] = useState<any>(null);
   const [studentUploading, setStudentUploading] = useState(false);
   const [teacherUploading, setTeacherUploading] = useState(false);
+  const [studentProgress, setStudentProgress] = useState<any>(null);
+  const [teacherProgress, setTeacherProgress] = useState<any>(null);
+  // Sync mode updates changed rows and deactivates ones missing from the sheet instead of only adding new rows
+  const [studentSyncMode, setStudentSyncMode] = useState(false);
+  const [teacherSyncMode, setTeacherSyncMode] = useState(false);
   const [studentErrorsExpanded, setStudentErrorsExpanded] = useState(false);
   const [teacherErrorsExpanded, setTeacherErrorsExpanded] = useState(false);
   const [studentListExpanded, setStudentListExpanded] = useState(false);
@@ -82,11 +89,11 @@ const ImportPage: React.FC = () => {
 
     if (e.dataTransfer.files && e.dataTransfer.files[0]) {
       const file = e.dataTransfer.files[0];
-      if (file.name.endsWith('.xlsx') || file.name.endsWith('.xls')) {
+      if (file.name.endsWith('.xlsx') || file.name.endsWith('.xls') || file.name.endsWith('.csv')) {
         setStudentFile(file);
         setStudentUploadResult(null);
       } else {
-        showToast('Please upload only Excel files (.xlsx or .xls)', 'error');
+        showToast('Please upload only Excel (.xlsx or .xls) or CSV files', 'error');
       }
     }
   };
@@ -111,15 +118,34 @@ const ImportPage: React.FC = () => {
 
     if (e.dataTransfer.files && e.dataTransfer.files[0]) {
       const file = e.dataTransfer.files[0];
-      if (file.name.endsWith('.xlsx') || file.name.endsWith('.xls')) {
+      if (file.name.endsWith('.xlsx') || file.name.endsWith('.xls') || file.name.endsWith('.csv')) {
         setTeacherFile(file);
         setTeacherUploadResult(null);
       } else {
-        showToast('Please upload only Excel files (.xlsx or .xls)', 'error');
+        showToast('Please upload only Excel (.xlsx or .xls) or CSV files', 'error');
       }
     }
   };
 
+  // Imports run as background jobs: poll until the job finishes, reporting progress as it goes
+  const waitForImportJob = async (jobId: number, onProgress: (job: any) => void) => {
+    while (true) {
+      const response = await axios.get(`${API_BASE_URL}/import/jobs/${jobId}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      onProgress(response.data);
+      if (response.data.status === 'completed' || response.data.status === 'failed') {
+        return response.data;
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+  };
+
+  const progressLabel = (job: any) =>
+    job && job.total_rows != null
+      ? `Importing... ${job.rows_processed}/${job.total_rows} rows`
+      : 'Uploading...';
+
   const handleStudentUpload = async () => {
     if (!studentFile) return;
 
@@ -129,7 +155,7 @@ const ImportPage: React.FC = () => {
 
     try {
       const response = await axios.post(
-        `${API_BASE_URL}/import/students/import`,
+        `${API_BASE_URL}/import/students/import${studentSyncMode ? '?mode=sync' : ''}`,
         formData,
         {
           headers: {
@@ -138,7 +164,8 @@ const ImportPage: React.FC = () => {
           },
         }
       );
-      setStudentUploadResult(response.data);
+      const job = await waitForImportJob(response.data.job_id, setStudentProgress);
+      setStudentUploadResult(job.status === 'failed' ? { error: true, message: job.message } : job);
       setStudentFile(null);
     } catch (error: any) {
       setStudentUploadResult({
@@ -147,6 +174,7 @@ const ImportPage: React.FC = () => {
       });
     } finally {
       setStudentUploading(false);
+      setStudentProgress(null);
     }
   };
 
@@ -159,7 +187,7 @@ const ImportPage: React.FC = () => {
 
     try {
       const response = await axios.post(
-        `${API_BASE_URL}/import/teachers/import`,
+        `${API_BASE_URL}/import/teachers/import${teacherSyncMode ? '?mode=sync' : ''}`,
         formData,
         {
           headers: {
@@ -168,7 +196,8 @@ const ImportPage: React.FC = () => {
           },
         }
       );
-      setTeacherUploadResult(response.data);
+      const job = await waitForImportJob(response.data.job_id, setTeacherProgress);
+      setTeacherUploadResult(job.status === 'failed' ? { error: true, message: job.message } : job);
       setTeacherFile(null);
     } catch (error: any) {
       setTeacherUploadResult({
@@ -177,6 +206,7 @@ const ImportPage: React.FC = () => {
       });
     } finally {
       setTeacherUploading(false);
+      setTeacherProgress(null);
     }
   };
 
@@ -281,7 +311,7 @@ const ImportPage: React.FC = () => {
                 Import Students
               </Typography>
               <Typography variant="body2" color="text.secondary" mb={2}>
-                Upload an Excel file (.xlsx or .xls) to import multiple students
+                Upload an Excel (.xlsx or .xls) or CSV file to import multiple students
               </Typography>
 
               <Button
@@ -315,7 +345,7 @@ const ImportPage: React.FC = () => {
                 onDrop={handleStudentDrop}
               >
                 <input
-                  accept=".xlsx,.xls"
+                  accept=".xlsx,.xls,.csv"
                   style={{ display: 'none' }}
                   id="student-file-upload"
                   type="file"
@@ -330,7 +360,7 @@ const ImportPage: React.FC = () => {
                     or click to browse
                   </Typography>
                   <Typography variant="caption" color="text.secondary">
-                    Supports: .xlsx, .xls
+                    Supports: .xlsx, .xls, .csv (fastest for large files)
                   </Typography>
                 </label>
               </Box>
@@ -355,6 +385,16 @@ const ImportPage: React.FC = () => {
                 </Paper>
               )}
 
+              <FormControlLabel
+                control={
+                  <Checkbox
+                    checked={studentSyncMode}
+                    onChange={(e) => setStudentSyncMode(e.target.checked)}
+                  />
+                }
+                label="Sync roster: update changed students and deactivate those missing from the file"
+              />
+
               <Button
                 variant="contained"
                 color="primary"
@@ -363,7 +403,7 @@ const ImportPage: React.FC = () => {
                 fullWidth
                 startIcon={studentUploading ? <CircularProgress size={20} /> : <UploadIcon />}
               >
-                {studentUploading ? 'Uploading...' : 'Upload Students'}
+                {studentUploading ? progressLabel(studentProgress) : 'Upload Students'}
               </Button>
 
               {studentUploadResult && (
@@ -450,7 +490,7 @@ const ImportPage: React.FC = () => {
                 Import Teachers
               </Typography>
               <Typography variant="body2" color="text.secondary" mb={2}>
-                Upload an Excel file (.xlsx or .xls) to import multiple teachers
+                Upload an Excel (.xlsx or .xls) or CSV file to import multiple teachers
               </Typography>
 
               <Button
@@ -484,7 +524,7 @@ const ImportPage: React.FC = () => {
                 onDrop={handleTeacherDrop}
               >
                 <input
-                  accept=".xlsx,.xls"
+                  accept=".xlsx,.xls,.csv"
                   style={{ display: 'none' }}
                   id="teacher-file-upload"
                   type="file"
@@ -499,7 +539,7 @@ const ImportPage: React.FC = () => {
                     or click to browse
                   </Typography>
                   <Typography variant="caption" color="text.secondary">
-                    Supports: .xlsx, .xls
+                    Supports: .xlsx, .xls, .csv (fastest for large files)
                   </Typography>
                 </label>
               </Box>
@@ -524,6 +564,16 @@ const ImportPage: React.FC = () => {
                 </Paper>
               )}
 
+              <FormControlLabel
+                control={
+                  <Checkbox
+                    checked={teacherSyncMode}
+                    onChange={(e) => setTeacherSyncMode(e.target.checked)}
+                  />
+                }
+                label="Sync roster: update changed teachers and deactivate those missing from the file"
+              />
+
               <Button
                 variant="contained"
                 color="primary"
@@ -532,7 +582,7 @@ const ImportPage: React.FC = () => {
                 fullWidth
                 startIcon={teacherUploading ? <CircularProgress size={20} /> : <UploadIcon />}
               >
-                {teacherUploading ? 'Uploading...' : 'Upload Teachers'}
+                {teacherUploading ? progressLabel(teacherProgress) : 'Upload Teachers'}
               </Button>
 
               {teacherUploadResult && (
@@ -643,7 +693,7 @@ const ImportPage: React.FC = () => {
             Tips:
           </Typography>
           <Typography variant="body2" color="text.secondary">
-            • Use only Excel files (.xlsx or .xls format)<br />
+            • Use Excel (.xlsx or .xls) or CSV files - CSV imports large rosters fastest<br />
             • Class names should be: 7, 8, 9, or 10 (no sections)<br />
             • Phone numbers should include country code (e.g., +91-9876543210)<br />
             • Email addresses must be valid and unique for teachers<br />